@@ -10,6 +10,7 @@ bl_info = {
 
 import bpy
 from .core.poll_server import poll_backend_for_render
+from .core import metrics
 
 # -----------------------------
 # Import Submodules
@@ -20,13 +21,18 @@ from . import ui
 # -----------------------------
 # Registration
 # -----------------------------
+METRICS_EXPORTERS = []
+
 def register():
     ops.register()
     ui.register()
     bpy.app.timers.register(poll_backend_for_render, first_interval=10)
+    METRICS_EXPORTERS.extend(metrics.start_exporters(metrics.METRICS_PORT, metrics.METRICS_FILE))
     print("VSE Instructor registered")
 
 def unregister():
+    metrics.stop_exporters(METRICS_EXPORTERS)
+    METRICS_EXPORTERS.clear()
     ui.unregister()
     ops.unregister()
     print("VSE Instructor unregistered")
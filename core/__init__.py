@@ -1,7 +1,16 @@
-from .logger import Logger
-from .vse_builder import VSEBuilder
-
 __all__ = [
-  'Logger'
-  'VSEBuilder'
-]
\ No newline at end of file
+  'Logger',
+  'VSEBuilder',
+]
+
+
+def __getattr__(name):
+  # Imported on first use so light entry points (e.g. the headless worker)
+  # only pay for the modules they need
+  if name == 'Logger':
+    from .logger import Logger
+    return Logger
+  if name == 'VSEBuilder':
+    from .vse_builder import VSEBuilder
+    return VSEBuilder
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
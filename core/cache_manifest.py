@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+MANIFEST_NAME = "manifest.json"
+
+
+def sha256_hex(binary):
+    return hashlib.sha256(binary).hexdigest()
+
+
+class CacheManifest:
+    """
+    Per-media record kept beside the cached file as media_dir/manifest.json.
+
+    Holds total_chunks, chunk_size, the size and sha256 of every chunk
+    received so far, and once published, the final file's size and digest
+    (sha256 over the ordered chunk hashes). It is always rewritten through a
+    temp file and rename, so a crash leaves either the old or the new copy.
+    """
+
+    # Seconds between manifest writes while chunks are streaming in
+    flush_interval = 2.0
+
+    def __init__(self, media_dir, media_id=None):
+        self.path = media_dir / MANIFEST_NAME
+        self.media_id = media_id
+        self.total_chunks = None
+        self.chunk_size = None
+        self.chunks = {}
+        self.final = None
+
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    # -------------------------------------------------------------------------
+    # LOAD / SAVE
+    # -------------------------------------------------------------------------
+    @classmethod
+    def load(cls, media_dir, media_id=None):
+        manifest = cls(media_dir, media_id)
+        if not manifest.path.exists():
+            return manifest
+
+        try:
+            data = json.loads(manifest.path.read_text())
+        except (OSError, ValueError):
+            return manifest
+
+        manifest.total_chunks = data.get("total_chunks")
+        manifest.chunk_size = data.get("chunk_size")
+        manifest.chunks = {int(k): v for k, v in data.get("chunks", {}).items()}
+        manifest.final = data.get("final")
+        return manifest
+
+    def exists(self):
+        return self.path.exists()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        data = {
+            "media_id": self.media_id,
+            "total_chunks": self.total_chunks,
+            "chunk_size": self.chunk_size,
+            "chunks": {str(k): v for k, v in sorted(self.chunks.items())},
+            "final": self.final,
+        }
+        tmp_path = self.path.with_name(MANIFEST_NAME + ".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+        self._last_flush = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self.total_chunks = None
+            self.chunk_size = None
+            self.chunks = {}
+            self.final = None
+
+    # -------------------------------------------------------------------------
+    # CHUNKS
+    # -------------------------------------------------------------------------
+    def record_chunk(self, index, binary):
+        """Thread safe. Flushes to disk at most every flush_interval seconds."""
+        entry = {"size": len(binary), "sha256": sha256_hex(binary)}
+
+        with self._lock:
+            self.chunks[index] = entry
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._save()
+
+    def chunk_matches(self, index, binary):
+        entry = self.chunks.get(index)
+        return (
+            entry is not None
+            and entry["size"] == len(binary)
+            and entry["sha256"] == sha256_hex(binary)
+        )
+
+    # -------------------------------------------------------------------------
+    # FINAL FILE
+    # -------------------------------------------------------------------------
+    def digest(self):
+        h = hashlib.sha256()
+        for index in range(self.total_chunks):
+            h.update(bytes.fromhex(self.chunks[index]["sha256"]))
+        return h.hexdigest()
+
+    def set_final(self, final_path):
+        with self._lock:
+            self.final = {
+                "name": final_path.name,
+                "size": final_path.stat().st_size,
+                "digest": self.digest(),
+            }
+            self._save()
+
+    def verify_final_quick(self, final_path):
+        """Cheap check: the manifest is complete and the file has the recorded size."""
+        if not self.final or self.final.get("name") != final_path.name:
+            return False
+        try:
+            return final_path.stat().st_size == self.final["size"]
+        except OSError:
+            return False
+
+    def adopt_file(self, path, total_chunks, chunk_size):
+        """Build chunk records from an already-assembled file (caches that predate manifests)."""
+        with self._lock:
+            self.total_chunks = total_chunks
+            self.chunk_size = chunk_size
+            self.chunks = {}
+
+            with open(path, "rb") as f:
+                for index in range(total_chunks):
+                    binary = f.read(chunk_size)
+                    self.chunks[index] = {"size": len(binary), "sha256": sha256_hex(binary)}
+
+        self.set_final(path)
+
+    def verify_ranges(self, path):
+        """
+        Hash every recorded chunk range of path (a final or partial file in
+        stream layout) and return the set of indices whose bytes match.
+        """
+        good = set()
+        if not self.chunk_size:
+            return good
+
+        with open(path, "rb") as f:
+            for index in sorted(self.chunks):
+                f.seek(index * self.chunk_size)
+                if self.chunk_matches(index, f.read(self.chunks[index]["size"])):
+                    good.add(index)
+
+        return good
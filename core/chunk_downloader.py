@@ -0,0 +1,331 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import metrics
+
+
+class ChunkDownloadError(Exception):
+    pass
+
+
+class BandwidthLimiter:
+    """
+    Token bucket shared by every download worker that uses it. consume()
+    takes the bytes just received and sleeps off any debt, so throughput
+    averages bytes_per_second. Setting `cancel` aborts the wait with
+    ChunkDownloadError.
+    """
+
+    def __init__(self, bytes_per_second, burst=None, cancel=None):
+        self.rate = float(bytes_per_second)
+        self.capacity = float(burst or bytes_per_second)
+        self.cancel = cancel or threading.Event()
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= nbytes
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if self.cancel.wait(delay) if delay else self.cancel.is_set():
+            raise ChunkDownloadError("Download cancelled")
+
+
+class ChunkDownloader:
+    """
+    Downloads the chunks of a single media item over a bounded worker pool.
+
+    fetch_chunk(media_id, index) must return (chunk_bytes, total_chunks)
+    and raise on any failure. An optional BandwidthLimiter caps throughput.
+    Only the calling thread logs; workers just fetch and write.
+    """
+
+    def __init__(self, fetch_chunk, max_workers=4, retries=3, backoff=0.5, log=None, limiter=None):
+        self.fetch_chunk = fetch_chunk
+        self.max_workers = max(1, int(max_workers))
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.log = log
+        self.limiter = limiter
+        # Bytes received by fetch() so far (a resumed download only counts what it fetched)
+        self.fetched_bytes = 0
+        self._fetched_lock = threading.Lock()
+
+    def _info(self, msg, *args):
+        if self.log:
+            self.log.info(msg, *args)
+
+    def _debug(self, msg, *args):
+        if self.log:
+            self.log.debug(msg, *args)
+
+    # -------------------------------------------------------------------------
+    # SINGLE CHUNK (with retry)
+    # -------------------------------------------------------------------------
+    def fetch(self, media_id, index):
+        """Returns (binary, total_chunks) for one chunk, retrying with backoff."""
+        attempt = 0
+
+        while True:
+            try:
+                binary, total_chunks = self.fetch_chunk(media_id, index)
+                break
+
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise ChunkDownloadError(
+                        f"Chunk {index} of {media_id} failed after {attempt} attempts: {e}"
+                    ) from e
+
+                metrics.CHUNK_RETRIES.labels("download").inc()
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+        with self._fetched_lock:
+            self.fetched_bytes += len(binary)
+        metrics.MEDIA_BYTES_DOWNLOADED.inc(len(binary))
+
+        if self.limiter:
+            self.limiter.consume(len(binary))
+
+        return binary, int(total_chunks)
+
+    def _download_one(self, media_id, index, sink):
+        binary, _ = self.fetch(media_id, index)
+        sink.write(index, binary)
+        return index
+
+    # -------------------------------------------------------------------------
+    # WHOLE MEDIA
+    # -------------------------------------------------------------------------
+    def download(self, media_id, sink):
+        """
+        Fetch every chunk of media_id that the sink does not already hold.
+        Returns total_chunks. Raises ChunkDownloadError when a chunk
+        cannot be fetched or stored.
+        """
+        total_chunks = sink.total_chunks
+
+        if total_chunks is None:
+            # The first missing chunk is fetched alone to learn total_chunks
+            first = 0
+            while sink.has(first):
+                first += 1
+
+            binary, total_chunks = self.fetch(media_id, first)
+            sink.begin(total_chunks)
+            sink.write(first, binary)
+            self._debug("Downloaded chunk %d/%d", first + 1, total_chunks)
+
+            candidates = range(first + 1, total_chunks)
+        else:
+            candidates = range(total_chunks)
+
+        pending = [index for index in candidates if not sink.has(index)]
+
+        if not pending:
+            return total_chunks
+
+        self._info("Fetching %d of %d chunks", len(pending), total_chunks)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(self._download_one, media_id, index, sink)
+                for index in pending
+            ]
+
+            try:
+                for future in as_completed(futures):
+                    index = future.result()
+                    self._debug("Downloaded chunk %d/%d", index + 1, total_chunks)
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return total_chunks
+
+
+# -----------------------------------------------------------------------------
+# SINKS
+# -----------------------------------------------------------------------------
+class PartsSink:
+    """
+    Stores each chunk as chunks_dir/NNNNN.part and concatenates them on
+    publish. Used to resume caches that were started in this layout.
+    Existing parts are checked against the manifest before being reused.
+    """
+
+    def __init__(self, chunks_dir, manifest):
+        self.chunks_dir = chunks_dir
+        self.manifest = manifest
+        self.total_chunks = None
+        self._checked = {}
+
+    def part_path(self, index):
+        return self.chunks_dir / f"{index:05d}.part"
+
+    def resume(self):
+        self.total_chunks = self.manifest.total_chunks
+        return sum(1 for index in range(self.total_chunks or 0) if self.has(index))
+
+    def has(self, index):
+        if index in self._checked:
+            return self._checked[index]
+
+        part_path = self.part_path(index)
+        ok = part_path.exists()
+
+        if ok:
+            binary = part_path.read_bytes()
+            if index in self.manifest.chunks:
+                ok = self.manifest.chunk_matches(index, binary)
+            else:
+                # Parts written before manifests existed are adopted as-is
+                self.manifest.record_chunk(index, binary)
+
+        self._checked[index] = ok
+        return ok
+
+    def begin(self, total_chunks):
+        self.total_chunks = total_chunks
+        self.manifest.total_chunks = total_chunks
+
+    def write(self, index, binary):
+        # Write beside the target and rename, so a part that exists is always complete
+        part_path = self.part_path(index)
+        tmp_path = part_path.with_suffix(".tmp")
+        tmp_path.write_bytes(binary)
+        tmp_path.replace(part_path)
+        self.manifest.record_chunk(index, binary)
+
+    def publish(self, final_path):
+        tmp_path = final_path.with_name(final_path.name + ".partial")
+
+        with open(tmp_path, "wb") as outfile:
+            for index in range(self.total_chunks):
+                with open(self.part_path(index), "rb") as part:
+                    shutil.copyfileobj(part, outfile)
+
+        os.replace(tmp_path, final_path)
+        self.manifest.chunk_size = self.manifest.chunks[0]["size"]
+        self.manifest.set_final(final_path)
+        shutil.rmtree(self.chunks_dir, ignore_errors=True)
+
+    def discard(self):
+        self.manifest.save()
+
+
+class StreamSink:
+    """
+    Writes every chunk straight into a preallocated `<final>.partial` at
+    index * chunk_size, then truncates and renames it into place on publish.
+    Each byte hits the disk once and no per-chunk files are left behind.
+
+    Chunk 0 fixes the chunk size; every chunk but the last must match it.
+    An interrupted partial file is resumed from the chunks that still
+    match the manifest.
+    """
+
+    def __init__(self, final_path, manifest):
+        self.final_path = final_path
+        self.partial_path = final_path.with_name(final_path.name + ".partial")
+        self.manifest = manifest
+        self.total_chunks = None
+        self.chunk_size = None
+        self.last_size = None
+        self.verified = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def resume(self):
+        """Reopen an interrupted partial file. Returns the number of chunks reused."""
+        manifest = self.manifest
+        if not (manifest.total_chunks and manifest.chunk_size and self.partial_path.exists()):
+            return 0
+
+        self.verified = manifest.verify_ranges(self.partial_path)
+        for index in [i for i in manifest.chunks if i not in self.verified]:
+            del manifest.chunks[index]
+
+        self.total_chunks = manifest.total_chunks
+        self.chunk_size = manifest.chunk_size
+        last = self.total_chunks - 1
+        if last in self.verified:
+            self.last_size = manifest.chunks[last]["size"]
+
+        self._file = open(self.partial_path, "r+b")
+        return len(self.verified)
+
+    def has(self, index):
+        return index in self.verified
+
+    def begin(self, total_chunks):
+        self.total_chunks = total_chunks
+        self._file = open(self.partial_path, "wb+")
+        self.manifest.reset()
+        self.manifest.total_chunks = total_chunks
+
+    def write(self, index, binary):
+        size = len(binary)
+        is_last = index == self.total_chunks - 1
+
+        if self.chunk_size is None:
+            if index != 0:
+                raise ChunkDownloadError("Streaming assembly must start at chunk 0")
+            self.chunk_size = size
+            self.manifest.chunk_size = size
+            self._preallocate(self.total_chunks * size)
+        elif (size != self.chunk_size and not is_last) or size > self.chunk_size:
+            raise ChunkDownloadError(
+                f"Chunk {index} is {size} bytes, expected {self.chunk_size}"
+            )
+
+        if is_last:
+            self.last_size = size
+
+        with self._lock:
+            self._file.seek(index * self.chunk_size)
+            self._file.write(binary)
+
+        self.manifest.record_chunk(index, binary)
+
+    def _preallocate(self, size):
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(self._file.fileno(), 0, size)
+                return
+            except OSError:
+                pass
+        self._file.truncate(size)
+
+    def publish(self, final_path=None):
+        final_path = final_path or self.final_path
+        total_size = (self.total_chunks - 1) * self.chunk_size + self.last_size
+
+        with self._lock:
+            self._file.truncate(total_size)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+        os.replace(self.partial_path, final_path)
+        self.manifest.set_final(final_path)
+
+    def discard(self):
+        """Close after a failed download, keeping the partial file for the next resume."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.manifest.save()
@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import metrics
+
+
+class ChunkUploadError(Exception):
+    pass
+
+
+class UploadProgress:
+    """
+    Upload state persisted beside the rendered file as `<file>.upload.json`:
+    media_id, chunking, the file's size/mtime, the owner (generation) it was
+    recorded for, and acknowledged indices. Progress only applies to the
+    exact file it was recorded for.
+    """
+
+    def __init__(self, filepath, chunk_size, owner=None):
+        self.filepath = filepath
+        self.path = filepath.with_name(filepath.name + ".upload.json")
+
+        stat = filepath.stat()
+        self.total_size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.chunk_size = chunk_size
+        self.total_chunks = math.ceil(self.total_size / chunk_size)
+        self.owner = owner
+        self.media_id = None
+        self.acked = set()
+
+        self._lock = threading.Lock()
+
+    def _restore(self):
+        """Adopt the saved progress if it was recorded for this exact file. Returns True if it was."""
+        if not self.path.exists():
+            return False
+
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return False
+
+        if (
+            data.get("total_size") != self.total_size
+            or data.get("mtime_ns") != self.mtime_ns
+            or data.get("chunk_size") != self.chunk_size
+            or data.get("owner") != self.owner
+        ):
+            return False
+
+        self.media_id = data["media_id"]
+        self.acked = set(data.get("acked", []))
+        return True
+
+    @classmethod
+    def load_or_create(cls, filepath, chunk_size, owner=None):
+        progress = cls(filepath, chunk_size, owner)
+
+        if not progress._restore():
+            progress.media_id = str(uuid.uuid4())
+            progress.save()
+
+        return progress
+
+    @classmethod
+    def find(cls, filepath, chunk_size, owner=None):
+        """
+        Saved progress of an interrupted upload of filepath, or None. The
+        file only gets progress once it is fully rendered, so a match means
+        the file can be uploaded again without re-rendering it.
+        """
+        try:
+            progress = cls(filepath, chunk_size, owner)
+        except OSError:
+            return None
+        return progress if progress._restore() else None
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        data = {
+            "media_id": self.media_id,
+            "total_size": self.total_size,
+            "mtime_ns": self.mtime_ns,
+            "owner": self.owner,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "acked": sorted(self.acked),
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+    def ack(self, index):
+        with self._lock:
+            self.acked.add(index)
+            self._save()
+
+    def pending(self):
+        return [i for i in range(self.total_chunks) if i not in self.acked]
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+class ChunkUploader:
+    """
+    Uploads a file's chunks over a bounded worker pool, retrying each chunk
+    on its own and recording every acknowledged chunk in UploadProgress.
+
+    upload_chunk(media_id, index, chunk_bytes, total_chunks) must return the
+    decoded server response ({"ok": bool, ...}) or raise.
+    """
+
+    def __init__(self, upload_chunk, max_workers=4, retries=3, backoff=0.5, log=None):
+        self.upload_chunk = upload_chunk
+        self.max_workers = max(1, int(max_workers))
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.log = log
+
+    def _info(self, msg, *args):
+        if self.log:
+            self.log.info(msg, *args)
+
+    def _debug(self, msg, *args):
+        if self.log:
+            self.log.debug(msg, *args)
+
+    def _send(self, progress, index):
+        with open(progress.filepath, "rb") as f:
+            f.seek(index * progress.chunk_size)
+            chunk_bytes = f.read(progress.chunk_size)
+
+        attempt = 0
+        while True:
+            try:
+                response = self.upload_chunk(progress.media_id, index, chunk_bytes, progress.total_chunks)
+                if not response.get("ok", True):
+                    raise ChunkUploadError(f"Server refused chunk {index}: {response.get('message')}")
+                break
+
+            except Exception as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise ChunkUploadError(
+                        f"Chunk {index} failed after {attempt} attempts: {e}"
+                    ) from e
+
+                metrics.CHUNK_RETRIES.labels("upload").inc()
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+
+        metrics.UPLOAD_BYTES.inc(len(chunk_bytes))
+        progress.ack(index)
+        return index
+
+    def upload(self, progress):
+        """Send every chunk not yet acknowledged. Raises ChunkUploadError on failure."""
+        pending = progress.pending()
+
+        if len(pending) < progress.total_chunks:
+            self._info(
+                f"Resuming upload {progress.media_id}: "
+                f"{progress.total_chunks - len(pending)}/{progress.total_chunks} chunks already sent"
+            )
+
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._send, progress, index) for index in pending]
+
+            try:
+                for future in as_completed(futures):
+                    index = future.result()
+                    self._debug("Uploaded chunk %d/%d", index + 1, progress.total_chunks)
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
@@ -0,0 +1,117 @@
+import os
+import socket
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLockTimeout(Exception):
+    pass
+
+
+class FileLock:
+    """
+    Advisory exclusive lock on a lock file, shared by every process on the
+    host (flock on POSIX, msvcrt.locking on Windows). Each FileLock opens
+    its own handle, so two FileLocks on one path also exclude each other
+    within a process.
+
+    The OS drops the lock when its holder exits or crashes, so a lock file
+    left behind by a dead worker is never stale: the next acquire() simply
+    takes it. The holder writes "pid@host" into the file for wait messages.
+    Lock files are tiny and are never deleted, which keeps every process
+    locking the same inode.
+    """
+
+    poll_interval = 0.05
+    max_poll_interval = 0.5
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd = None
+
+    @property
+    def locked(self):
+        return self._fd is not None
+
+    def _try_lock(self, fd):
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None, blocking=True):
+        """
+        Take the lock, waiting up to timeout seconds (None waits forever).
+        Returns False when not blocking and the lock is held elsewhere;
+        raises FileLockTimeout when the wait runs out.
+        """
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} is already locked by this FileLock")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = self.poll_interval
+        while not self._try_lock(fd):
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                os.close(fd)
+                if not blocking:
+                    return False
+                raise FileLockTimeout(f"Timed out after {timeout:g}s waiting for {self.path} ({self.holder()})")
+
+            time.sleep(delay if deadline is None else max(0, min(delay, deadline - time.monotonic())))
+            delay = min(delay * 2, self.max_poll_interval)
+
+        self._fd = fd
+        self._write_holder()
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def _write_holder(self):
+        # Windows cannot write inside the locked byte, so the holder goes after it
+        offset = 0 if fcntl else 1
+        try:
+            os.ftruncate(self._fd, offset)
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            os.write(self._fd, f"{os.getpid()}@{socket.gethostname()}".encode("utf-8"))
+        except OSError:
+            pass
+
+    def holder(self):
+        """"pid@host" of the last process to take the lock, for messages only."""
+        try:
+            return self.path.read_bytes().lstrip(b"\0").decode("utf-8", "replace").strip() or "unknown holder"
+        except OSError:
+            return "unknown holder"
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,68 @@
+import bpy
+from .logger import Logger
+
+SCENE_PREFIX = "VSEI_"
+
+log = Logger()
+
+# Strip attribute holding a datablock -> the bpy.data collection it lives in
+STRIP_DATABLOCKS = {
+    "sound": "sounds",
+    "clip": "movieclips",
+    "mask": "masks",
+}
+
+
+def create_generation_scene(generation_id):
+    """
+    Create an empty scene dedicated to one generation. Scenes left behind
+    by earlier jobs (e.g. after a crash) are torn down first.
+    """
+    for scene in list(bpy.data.scenes):
+        if scene.name.startswith(SCENE_PREFIX):
+            teardown_generation_scene(scene)
+
+    scene = bpy.data.scenes.new(f"{SCENE_PREFIX}{generation_id}")
+    scene.sequence_editor_create()
+
+    log.info(f"Created scene {scene.name}")
+    return scene
+
+
+def _strip_datablocks(scene):
+    """(collection name, datablock) for every sound, movie clip and mask the scene's strips use."""
+    found = {}
+    for strip in scene.sequence_editor.sequences_all:
+        for attr, collection in STRIP_DATABLOCKS.items():
+            datablock = getattr(strip, attr, None)
+            if datablock is not None:
+                found[(collection, datablock.name)] = datablock
+    return [(collection, datablock) for (collection, _), datablock in found.items()]
+
+
+def teardown_generation_scene(scene, purge=True):
+    """
+    Remove a generation's strips and scene, then the sounds, movie clips and
+    masks those strips used that nothing else references any more. Other
+    unused data in the file (e.g. the user's own) is left alone.
+    """
+    name = scene.name
+    datablocks = []
+
+    if scene.sequence_editor:
+        datablocks = _strip_datablocks(scene)
+        for strip in list(scene.sequence_editor.sequences):
+            scene.sequence_editor.sequences.remove(strip)
+        scene.sequence_editor_clear()
+
+    bpy.data.scenes.remove(scene)
+
+    if purge:
+        purged = 0
+        for collection, datablock in datablocks:
+            if datablock.users == 0:
+                getattr(bpy.data, collection).remove(datablock)
+                purged += 1
+        log.info(f"Removed scene {name} and {purged} unused datablock(s)")
+    else:
+        log.info(f"Removed scene {name}")
@@ -0,0 +1,276 @@
+import argparse
+from multiprocessing.connection import Client
+import os
+import signal
+import socket
+import threading
+import time
+
+from . import metrics
+from .logger import Logger
+from .http_client import shared_client
+from .job_poller import JobPoller
+from .lookahead import MediaLookahead
+from .vse_builder import VSEBuilder
+from .instruction_parser import InstructionError
+from .parallel_render import ParallelRenderError
+from .render_profiles import PRESETS
+from .smart_render import SmartRenderError
+from .generation_scene import create_generation_scene, teardown_generation_scene
+
+
+
+class HeadlessWorker:
+    """
+    Job loop for `blender -b --python worker.py`: probe, build, render
+    synchronously, upload, repeat. Uses no UI modules, timers or render
+    handlers. SIGTERM/SIGINT finish the current job and then stop the loop.
+    """
+
+    def __init__(self, machine_id, once=False, lookahead=True):
+        self.machine_id = machine_id
+        self.once = once
+        self.log = Logger()
+        self.poller = JobPoller(VSEBuilder.server_url, {"machine": machine_id}, log=self.log)
+        # Supervised workers never probe, so they never peek ahead either
+        self.lookahead = MediaLookahead(VSEBuilder.server_url, machine_id, self.log) if lookahead else None
+        self._stop = threading.Event()
+
+    # -------------------------------------------------------------------------
+    # SHUTDOWN
+    # -------------------------------------------------------------------------
+    def install_signal_handlers(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        if self._stop.is_set():
+            # Second signal: give up on the current job
+            raise KeyboardInterrupt
+
+        self.log.info(f"Received {signal.Signals(signum).name}, stopping after the current job")
+        self._stop.set()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopping(self):
+        return self._stop.is_set()
+
+    # -------------------------------------------------------------------------
+    # JOBS
+    # -------------------------------------------------------------------------
+    def render_and_upload(self, builder):
+        """Render the built timeline with the mode the instruction asks for and upload it."""
+        output = builder.instruction.get('output', {})
+        segment_seconds = output.get('segment_seconds')
+        processes = output.get('render_processes', VSEBuilder.render_processes)
+
+        if segment_seconds:
+            return builder.render_and_upload_segments(segment_seconds)
+
+        # An earlier attempt at this generation may have rendered it and stopped mid-upload
+        if builder.resume_pending_upload():
+            return builder.upload_rendered_media()
+
+        # Timelines that are plain cuts of matching sources skip the encoder
+        cuts = builder.smart_render_plan() if output.get('smart_render', VSEBuilder.smart_render) else None
+        if cuts:
+            try:
+                builder.render_stream_copy(cuts)
+                return builder.upload_rendered_media()
+            except SmartRenderError as e:
+                builder.log.warning(f"Stream copy failed, rendering normally: {e}")
+
+        if processes > 1:
+            builder.render_parallel(processes)
+        else:
+            # Blocking in background mode
+            builder.render_sequence()
+
+        return builder.upload_rendered_media()
+
+    def run_job(self, generation):
+        """
+        Build, render and upload one generation. Returns True once it is DONE;
+        any failure, including a failed upload, marks it FAILED instead.
+        """
+        generation_id = generation.get('_id')
+        started = time.monotonic()
+
+        scene = create_generation_scene(generation_id)
+        builder = VSEBuilder(generation.get('config'), scene=scene)
+        builder.set_generation(generation)
+        # None for jobs handed over by a supervisor, which did the probing
+        if self.poller.last_probe_seconds is not None:
+            builder.spans.record("probe", self.poller.last_probe_seconds)
+
+        try:
+            # Media warmed by the previous job's lookahead is now a cache hit
+            if self.lookahead:
+                self.lookahead.stop()
+            try:
+                builder.build()
+            finally:
+                if self.lookahead:
+                    self.lookahead.release()
+
+            # Warm the cache for the next queued job while this one renders
+            if self.lookahead:
+                self.lookahead.start(builder)
+
+            builder.log.info(f"[Render] Started generation {generation_id}")
+            builder.update_server_status("RENDERING")
+
+            media = self.render_and_upload(builder)
+
+            builder.log.info(f"[Render] Completed generation {generation_id}")
+
+            if not builder.finish_generation(media):
+                return False
+
+            self.log.info(f"Generation {generation_id} finished in {time.monotonic() - started:.1f}s")
+            return True
+
+        except InstructionError as e:
+            builder.fail_generation(f"Invalid instruction for generation {generation_id}: {e}")
+
+        except ParallelRenderError as e:
+            builder.fail_generation(f"Parallel render failed for generation {generation_id}: {e}")
+
+        except Exception as e:
+            builder.fail_generation(f"Generation {generation_id} failed: {e}")
+
+        finally:
+            teardown_generation_scene(scene)
+
+        return False
+
+    def run(self):
+        self.log.info(f"Headless worker {self.machine_id} started (pid {os.getpid()})")
+
+        while not self.stopping:
+            generation = self.poller.poll_once() if self.once else self.poller.acquire(self._stop)
+
+            if generation:
+                self.log.info("Found generation")
+                try:
+                    self.run_job(generation)
+                except Exception as e:
+                    self.log.error(f"Generation {generation.get('_id')} failed: {e}")
+
+                self.poller.job_finished()
+
+            if self.once:
+                break
+
+            self._stop.wait(self.poller.next_delay())
+
+        if self.lookahead:
+            self.lookahead.stop()
+
+        self.log.info(self.poller.stats.report())
+        self.log.info("Headless worker stopped")
+
+    def serve(self, conn, worker_id):
+        """
+        Supervised mode: take generations from the supervisor over conn instead
+        of probing, and report each one back when it is finished.
+        """
+        self.log.info(f"Worker {worker_id} serving supervisor (pid {os.getpid()})")
+        conn.send(("ready", worker_id))
+
+        while not self.stopping:
+            if not conn.poll(1.0):
+                continue
+
+            try:
+                message, payload = conn.recv()
+            except EOFError:
+                self.log.warning("Supervisor went away")
+                break
+
+            if message == "stop":
+                break
+
+            if message == "job":
+                try:
+                    ok = self.run_job(payload)
+                except Exception as e:
+                    self.log.error(f"Generation {payload.get('_id')} failed: {e}")
+                    ok = False
+
+                conn.send(("done" if ok else "failed", payload.get('_id')))
+
+        self.log.info(f"Worker {worker_id} stopped")
+
+
+# -----------------------------------------------------------------------------
+# ENTRY POINT
+# -----------------------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="worker.py", description="Headless VSE Instructor render worker")
+    parser.add_argument(
+        "--machine-id",
+        default=os.environ.get("VSE_INSTRUCTOR_MACHINE_ID") or socket.gethostname(),
+        help="Machine name sent with each probe (default: $VSE_INSTRUCTOR_MACHINE_ID or the hostname)"
+    )
+    parser.add_argument(
+        "--max-interval", type=float, default=JobPoller.max_interval,
+        help="Longest wait between idle probes when the backend has no long-poll"
+    )
+    parser.add_argument("--once", action="store_true", help="Probe once, run any job found, then exit")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG, INFO, WARNING or ERROR")
+    parser.add_argument("--server-url", default=VSEBuilder.server_url, help="Generation backend URL")
+    parser.add_argument(
+        "--supervisor",
+        help="host:port of a supervisor to take jobs from (authkey in $VSE_INSTRUCTOR_SUPERVISOR_KEY)"
+    )
+    parser.add_argument("--worker-id", default="0", help="Slot name reported to the supervisor")
+    parser.add_argument("--no-lookahead", action="store_true", help="Do not prefetch the next job's media")
+    parser.add_argument(
+        "--render-profile", default=VSEBuilder.render_profile, choices=sorted(PRESETS),
+        help="Render preset used unless the instruction names one"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=VSEBuilder.render_threads,
+        help="Render threads (default: $VSE_INSTRUCTOR_THREADS or every core)"
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=metrics.METRICS_PORT,
+        help="Serve Prometheus metrics on 127.0.0.1:PORT (default: $VSE_INSTRUCTOR_METRICS_PORT, off)"
+    )
+    parser.add_argument(
+        "--metrics-file", default=metrics.METRICS_FILE,
+        help="Rewrite Prometheus metrics to this file periodically (default: $VSE_INSTRUCTOR_METRICS_FILE, off)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv or [])
+    Logger.set_level(args.log_level)
+    VSEBuilder.server_url = args.server_url
+    JobPoller.max_interval = args.max_interval
+    VSEBuilder.render_profile = args.render_profile
+    VSEBuilder.render_threads = args.threads
+
+    worker = HeadlessWorker(args.machine_id, once=args.once, lookahead=not args.supervisor and not args.no_lookahead)
+    worker.install_signal_handlers()
+    exporters = metrics.start_exporters(args.metrics_port, args.metrics_file, log=worker.log)
+
+    try:
+        if args.supervisor:
+            host, port = args.supervisor.rsplit(":", 1)
+            authkey = bytes.fromhex(os.environ.get("VSE_INSTRUCTOR_SUPERVISOR_KEY", ""))
+            with Client((host, int(port)), authkey=authkey) as conn:
+                worker.serve(conn, args.worker_id)
+        else:
+            worker.run()
+    except KeyboardInterrupt:
+        worker.log.warning("Interrupted during a job, exiting")
+
+    metrics.stop_exporters(exporters)
+    shared_client.close()
+    return worker
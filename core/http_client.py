@@ -0,0 +1,185 @@
+import gzip
+import http.client
+import json
+import queue
+import random
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpError(Exception):
+    def __init__(self, status, body=b"", url=""):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.body = body
+        self.url = url
+
+
+class HttpResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def header(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8"))
+
+
+class HttpClient:
+    """
+    Small keep-alive HTTP client shared by the builder, poller and uploader.
+
+    Idle connections are pooled per (scheme, host, port) and reused across
+    threads. Responses are requested gzip-encoded and decoded transparently.
+    Network errors and 429/5xx responses are retried with exponential backoff
+    and jitter; a reused connection that the server already closed is retried
+    at once on a fresh one without spending a retry.
+    """
+
+    def __init__(self, timeout=30, retries=3, backoff=0.5, max_idle_per_host=8):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_idle_per_host = max_idle_per_host
+
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    # -------------------------------------------------------------------------
+    # CONNECTION POOL
+    # -------------------------------------------------------------------------
+    def _pool(self, key):
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = queue.LifoQueue()
+            return pool
+
+    def _connect(self, key, timeout):
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key, timeout):
+        pool = self._pool(key)
+        try:
+            conn = pool.get_nowait()
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            conn.timeout = timeout
+            return conn, True
+        except queue.Empty:
+            return self._connect(key, timeout), False
+
+    def _release(self, key, conn):
+        pool = self._pool(key)
+        if pool.qsize() >= self.max_idle_per_host:
+            conn.close()
+        else:
+            pool.put(conn)
+
+    def close(self):
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+
+        for pool in pools.values():
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+    # -------------------------------------------------------------------------
+    # REQUESTS
+    # -------------------------------------------------------------------------
+    def _send(self, key, method, target, body, headers, timeout):
+        stale_retry = True
+
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                res = conn.getresponse()
+                data = res.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if reused and stale_retry:
+                    stale_retry = False
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            if res.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            if res.getheader("Content-Encoding", "").lower() == "gzip":
+                data = gzip.decompress(data)
+
+            return HttpResponse(res.status, {k.lower(): v for k, v in res.getheaders()}, data)
+
+    def request(self, method, url, body=None, headers=None, timeout=None, retries=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        all_headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        all_headers.update(headers or {})
+
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        attempt = 0
+
+        while True:
+            try:
+                response = self._send(key, method, target, body, all_headers, timeout)
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+            else:
+                if response.status < 400:
+                    return response
+
+                error = HttpError(response.status, response.body, url)
+                if response.status not in RETRY_STATUSES:
+                    raise error
+
+            attempt += 1
+            if attempt > retries:
+                raise error
+
+            delay = self.backoff * (2 ** (attempt - 1))
+            time.sleep(delay + random.uniform(0, delay))
+
+    def post_json(self, url, payload, timeout=None, retries=None):
+        response = self.request(
+            "POST",
+            url,
+            body=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            timeout=timeout,
+            retries=retries
+        )
+        return response.json()
+
+
+# Process-wide client, so every call site shares the same connection pools
+shared_client = HttpClient()
@@ -0,0 +1,260 @@
+import hashlib
+import json
+
+MEDIA_TYPES = {"video", "audio", "image"}
+CLIP_TYPES = MEDIA_TYPES | {"text"}
+
+MAX_CHANNEL = 128
+DEFAULT_FPS = 24
+DEFAULT_TEXT_MS = 5000
+DEFAULT_IMAGE_MS = 5000
+
+
+class InstructionError(ValueError):
+    pass
+
+
+class ClipPlan:
+    """
+    One clip with every frame value precomputed at the sequence FPS.
+    duration_frames is None when the clip has no duration override, and
+    has_cut is False when clip_ref carries no cut.
+    """
+
+    __slots__ = (
+        "instance_id", "kind", "media_id", "clip_ref", "layer",
+        "start_frame", "end_frame", "duration_frames",
+        "has_cut", "cut_start_frame", "cut_end_frame", "text",
+    )
+
+    def __init__(self, instance_id, kind, media_id, clip_ref, layer):
+        self.instance_id = instance_id
+        self.kind = kind
+        self.media_id = media_id
+        self.clip_ref = clip_ref
+        self.layer = layer
+        self.start_frame = 0
+        self.end_frame = 0
+        self.duration_frames = None
+        self.has_cut = False
+        self.cut_start_frame = 0
+        self.cut_end_frame = 0
+        self.text = None
+
+    def signature(self):
+        """Stable digest of everything that shapes this clip's strips."""
+        fields = (
+            self.kind, self.media_id, self.layer,
+            self.start_frame, self.end_frame, self.duration_frames,
+            self.has_cut, self.cut_start_frame, self.cut_end_frame, self.text,
+        )
+        return hashlib.sha1(repr(fields).encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(self):
+        return (
+            f"ClipPlan({self.instance_id!r}, {self.kind}, layer={self.layer}, "
+            f"start={self.start_frame}, duration={self.duration_frames})"
+        )
+
+
+class TrackPlan:
+    __slots__ = ("track_id", "kind", "clips")
+
+    def __init__(self, track_id, kind, clips):
+        self.track_id = track_id
+        self.kind = kind
+        self.clips = clips
+
+    def __repr__(self):
+        return f"TrackPlan({self.track_id!r}, {self.kind}, {len(self.clips)} clips)"
+
+
+class TimelinePlan:
+    """
+    Validated, ready-to-build form of an instruction.
+    media maps each distinct media _id to its clip_ref, in first-use order.
+    skipped lists (location, type) of clips left out for an unsupported type,
+    with type None for clips that have no clip_ref.
+    """
+
+    __slots__ = ("fps", "tracks", "media", "output", "skipped")
+
+    def __init__(self, fps, tracks, media, output, skipped=()):
+        self.fps = fps
+        self.tracks = tracks
+        self.media = media
+        self.output = output
+        self.skipped = list(skipped)
+
+    def clips(self):
+        for track in self.tracks:
+            yield from track.clips
+
+    def __repr__(self):
+        return (
+            f"TimelinePlan(fps={self.fps}, tracks={self.tracks}, "
+            f"media={len(self.media)})"
+        )
+
+
+# -----------------------------------------------------------------------------
+# VALIDATION HELPERS
+# -----------------------------------------------------------------------------
+def _number(value, where, default=0):
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InstructionError(f"{where} must be a number, got {value!r}")
+    if value < 0:
+        raise InstructionError(f"{where} must not be negative, got {value!r}")
+    return value
+
+
+def _layer(value, where, kind):
+    if value is None:
+        return 1
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise InstructionError(f"{where} must be an integer channel, got {value!r}")
+
+    # video clips also take the channel above for their audio
+    top = MAX_CHANNEL - 1 if kind == "video" else MAX_CHANNEL
+    if not 1 <= value <= top:
+        raise InstructionError(f"{where} must be between 1 and {top}, got {value}")
+    return value
+
+
+# -----------------------------------------------------------------------------
+# PARSER
+# -----------------------------------------------------------------------------
+def parse_instruction(instruction, log=None):
+    """
+    Validate an instruction (JSON string or dict) and return a TimelinePlan.
+    Raises InstructionError on malformed input, before anything is fetched.
+    Clips of an unsupported type, or with no clip_ref, are skipped with a
+    warning on log, so an editor that adds a clip type does not break older
+    workers. Duplicate instanceIds are rejected: strips are matched to clips
+    by instanceId.
+    """
+    if isinstance(instruction, (str, bytes)):
+        try:
+            instruction = json.loads(instruction)
+        except ValueError as e:
+            raise InstructionError(f"Instruction is not valid JSON: {e}") from e
+
+    if not isinstance(instruction, dict):
+        raise InstructionError("Instruction must be an object")
+
+    seq = instruction.get("sequence", instruction)
+    if not isinstance(seq, dict):
+        raise InstructionError("sequence must be an object")
+
+    fps = seq.get("fps", DEFAULT_FPS)
+    if isinstance(fps, bool) or not isinstance(fps, (int, float)) or fps <= 0:
+        raise InstructionError(f"sequence.fps must be a positive number, got {fps!r}")
+
+    raw_tracks = seq.get("tracks", [])
+    if not isinstance(raw_tracks, list):
+        raise InstructionError("sequence.tracks must be a list")
+
+    output = instruction.get("output", {})
+    if not isinstance(output, dict):
+        raise InstructionError("output must be an object")
+
+    # Pass 1: validate and collect every ms value; pass 2 converts them in one go
+    tracks = []
+    media = {}
+    ms_values = []
+    fills = []
+    skipped = []
+    instance_ids = {}
+
+    for t, track in enumerate(raw_tracks):
+        if not isinstance(track, dict):
+            raise InstructionError(f"tracks[{t}] must be an object")
+
+        raw_clips = track.get("clips", [])
+        if not isinstance(raw_clips, list):
+            raise InstructionError(f"tracks[{t}].clips must be a list")
+
+        clips = []
+        for c, clip in enumerate(raw_clips):
+            where = f"tracks[{t}].clips[{c}]"
+            if not isinstance(clip, dict):
+                raise InstructionError(f"{where} must be an object")
+
+            clip_ref = clip.get("clip_ref")
+            if clip_ref is None:
+                skipped.append((where, None))
+                if log:
+                    log.warning(f"Skipping {where}: clip has no clip_ref")
+                continue
+
+            if not isinstance(clip_ref, dict):
+                raise InstructionError(f"{where}.clip_ref must be an object")
+
+            kind = clip_ref.get("type")
+            if kind not in CLIP_TYPES:
+                skipped.append((where, kind))
+                if log:
+                    log.warning(f"Skipping {where}: clip type {kind!r} is not supported")
+                continue
+
+            media_id = clip_ref.get("_id")
+            if kind in MEDIA_TYPES:
+                if not isinstance(media_id, str) or not media_id:
+                    raise InstructionError(f"{where}.clip_ref._id is required for {kind} clips")
+                media.setdefault(media_id, clip_ref)
+
+            instance_id = clip.get("instanceId") or f"clip_{t}_{c}"
+            if instance_id in instance_ids:
+                raise InstructionError(
+                    f"{where}.instanceId {instance_id!r} is already used by {instance_ids[instance_id]}"
+                )
+            instance_ids[instance_id] = where
+
+            plan = ClipPlan(
+                instance_id,
+                kind,
+                media_id,
+                clip_ref,
+                _layer(clip.get("layer"), f"{where}.layer", kind)
+            )
+
+            start_ms = _number(clip.get("start_ms"), f"{where}.start_ms")
+            duration_ms = _number(clip.get("duration_ms"), f"{where}.duration_ms")
+
+            if kind == "text":
+                plan.text = clip_ref.get("text")
+                duration_ms = duration_ms or DEFAULT_TEXT_MS
+                fills.append((plan, "end_frame", len(ms_values)))
+                ms_values.append(start_ms + duration_ms)
+            elif kind == "image":
+                duration_ms = duration_ms or DEFAULT_IMAGE_MS
+
+            fills.append((plan, "start_frame", len(ms_values)))
+            ms_values.append(start_ms)
+
+            if duration_ms:
+                fills.append((plan, "duration_frames", len(ms_values)))
+                ms_values.append(duration_ms)
+
+            cut = clip_ref.get("cut")
+            if cut and kind == "video":
+                if not isinstance(cut, dict):
+                    raise InstructionError(f"{where}.clip_ref.cut must be an object")
+                plan.has_cut = True
+                fills.append((plan, "cut_start_frame", len(ms_values)))
+                ms_values.append(_number(cut.get("start"), f"{where}.clip_ref.cut.start"))
+                fills.append((plan, "cut_end_frame", len(ms_values)))
+                ms_values.append(_number(cut.get("end"), f"{where}.clip_ref.cut.end"))
+
+            clips.append(plan)
+
+        tracks.append(TrackPlan(track.get("id"), track.get("type"), clips))
+
+    # Batched ms → frames at the sequence FPS
+    frames = [int((ms / 1000.0) * fps) for ms in ms_values]
+    for plan, attr, index in fills:
+        setattr(plan, attr, frames[index])
+
+    return TimelinePlan(fps, tracks, media, output, skipped)
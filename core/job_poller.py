@@ -0,0 +1,260 @@
+import random
+import threading
+import time
+from datetime import datetime
+
+from . import metrics
+from .http_client import shared_client
+
+PROBE_TIMEOUT = 5
+
+# Generation fields that may carry the time the backend queued it
+QUEUED_AT_KEYS = ("queued_at", "queuedAt", "created_at", "createdAt")
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PickupStats:
+    """
+    Job-acquisition counters plus two latency samples per job:
+
+    - wait: seconds this poller spent looking before it got the job
+    - pickup: seconds between the backend queueing the job and this poller
+      receiving it (only when the generation carries a queued-at timestamp)
+
+    Only the last `window` samples of each are kept.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self.probes = 0
+        self.empty = 0
+        self.errors = 0
+        self.jobs = 0
+        self.wait = []
+        self.pickup = []
+        self._lock = threading.Lock()
+
+    def _add(self, samples, value):
+        samples.append(value)
+        if len(samples) > self.window:
+            del samples[0]
+
+    def record_probe(self, found=False, error=False):
+        with self._lock:
+            self.probes += 1
+            if error:
+                self.errors += 1
+            elif not found:
+                self.empty += 1
+
+    def record_job(self, wait_seconds, pickup_seconds=None):
+        with self._lock:
+            self.jobs += 1
+            self._add(self.wait, wait_seconds)
+            if pickup_seconds is not None:
+                self._add(self.pickup, pickup_seconds)
+
+    @staticmethod
+    def _summary(samples):
+        ordered = sorted(samples)
+        if not ordered:
+            return {"count": 0}
+        return {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered),
+            "p50": _percentile(ordered, 0.5),
+            "p95": _percentile(ordered, 0.95),
+            "max": ordered[-1],
+        }
+
+    def summary(self):
+        with self._lock:
+            return {
+                "probes": self.probes,
+                "empty": self.empty,
+                "errors": self.errors,
+                "jobs": self.jobs,
+                "wait": self._summary(self.wait),
+                "pickup": self._summary(self.pickup),
+            }
+
+    def report(self):
+        s = self.summary()
+        parts = [f"Job pickup: {s['jobs']} jobs / {s['probes']} probes ({s['empty']} empty, {s['errors']} errors)"]
+        for name in ("wait", "pickup"):
+            stats = s[name]
+            if stats["count"]:
+                parts.append(
+                    f"{name} mean {stats['mean']:.2f}s p50 {stats['p50']:.2f}s "
+                    f"p95 {stats['p95']:.2f}s max {stats['max']:.2f}s"
+                )
+        return ", ".join(parts)
+
+
+class JobPoller:
+    """
+    Acquires generations from /probe_new_generation.
+
+    When the backend advertises long-poll support via GET /capabilities
+    ({"data": {"probe_long_poll": <max seconds>}}), each probe asks the
+    backend to hold the request until a job arrives and an empty answer is
+    followed straight away by the next probe. Otherwise, and after errors,
+    probes are spaced adaptively: fast_interval after a job finishes, then
+    growing by backoff_factor up to max_interval while idle or failing.
+    Every delay is jittered so an idle fleet drifts out of lockstep.
+
+    payload: dict sent with each probe, or a callable returning one.
+    """
+
+    fast_interval = 1.0
+    min_interval = 5.0
+    max_interval = 60.0
+    error_max_interval = 120.0
+    backoff_factor = 2.0
+    # Each delay is scaled by a random factor in [1 - jitter, 1 + jitter]
+    jitter = 0.5
+    long_poll_seconds = 25
+
+    def __init__(self, server_url, payload, client=None, long_poll=True, log=None):
+        self.server_url = server_url
+        self.payload = payload
+        self.client = client or shared_client
+        self.long_poll = long_poll
+        self.log = log
+        self.stats = PickupStats()
+
+        self._long_poll_seconds = None if long_poll else 0
+        self._interval = self.fast_interval
+        self._failures = 0
+        self._looking_since = time.monotonic()
+        # Duration of the most recent probe request, found or not
+        self.last_probe_seconds = None
+
+    def _info(self, msg, *args):
+        if self.log:
+            self.log.info(msg, *args)
+
+    def _debug(self, msg, *args):
+        if self.log:
+            self.log.debug(msg, *args)
+
+    # -------------------------------------------------------------------------
+    # PROBING
+    # -------------------------------------------------------------------------
+    def long_poll_seconds_supported(self):
+        """Seconds the backend will hold a probe open, 0 when it cannot. Cached."""
+        if self._long_poll_seconds is None:
+            try:
+                response = self.client.request("GET", f"{self.server_url}/capabilities", timeout=10, retries=0)
+                offered = response.json().get("data", {}).get("probe_long_poll") or 0
+                self._long_poll_seconds = min(float(offered), self.long_poll_seconds)
+            except Exception:
+                self._long_poll_seconds = 0
+
+            self._info(
+                f"Job pickup for {self.server_url}: "
+                f"{f'long-poll {self._long_poll_seconds:g}s' if self._long_poll_seconds else 'adaptive polling'}"
+            )
+
+        return self._long_poll_seconds
+
+    def _probe(self):
+        payload = dict(self.payload() if callable(self.payload) else self.payload)
+        wait = self.long_poll_seconds_supported()
+        if wait:
+            payload["wait"] = wait
+
+        # No client-side retry: a probe is never replayed, the next poll simply probes again
+        response = self.client.post_json(
+            f"{self.server_url}/probe_new_generation",
+            payload,
+            timeout=wait + PROBE_TIMEOUT,
+            retries=0
+        )
+
+        self._debug("Probe response: %s", response.get("message"))
+
+        if not response.get("ok"):
+            return None
+
+        return response.get("data") or None
+
+    @staticmethod
+    def _pickup_seconds(generation):
+        for key in QUEUED_AT_KEYS:
+            value = generation.get(key)
+            if not isinstance(value, str):
+                continue
+            try:
+                queued = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            if queued.tzinfo is None:
+                continue
+            return max(0.0, (datetime.now(queued.tzinfo) - queued).total_seconds())
+        return None
+
+    def poll_once(self):
+        """One probe. Returns a generation or None; next_delay() says when to probe again."""
+        started = time.monotonic()
+        try:
+            generation = self._probe()
+        except Exception as e:
+            self.last_probe_seconds = time.monotonic() - started
+            self.stats.record_probe(error=True)
+            metrics.PROBES.labels("error").inc()
+            self._failures += 1
+            self._interval = min(
+                max(self._interval, self.min_interval) * self.backoff_factor,
+                self.error_max_interval
+            )
+            self._info(f"Probe failed ({self._failures} in a row), retrying in ~{self._interval:.0f}s: {e}")
+            return None
+
+        self.last_probe_seconds = time.monotonic() - started
+        self._failures = 0
+        self.stats.record_probe(found=generation is not None)
+        metrics.PROBES.labels("empty" if generation is None else "job").inc()
+
+        if generation is None:
+            wait = self.long_poll_seconds_supported()
+            if wait and time.monotonic() - started >= wait / 2:
+                # The backend already waited; ask again right away
+                self._interval = 0
+            else:
+                self._interval = min(
+                    max(self._interval * self.backoff_factor, self.min_interval),
+                    self.max_interval
+                )
+            return None
+
+        self.stats.record_job(time.monotonic() - self._looking_since, self._pickup_seconds(generation))
+        metrics.JOBS_CLAIMED.inc()
+        self._interval = self.fast_interval
+        return generation
+
+    def next_delay(self):
+        """Jittered seconds to wait before the next probe."""
+        return self._interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def job_finished(self):
+        """Probe quickly again: more work often follows a finished job."""
+        self._interval = self.fast_interval
+        self._looking_since = time.monotonic()
+
+    def acquire(self, stop_event):
+        """Block until a generation is found (returned) or stop_event is set (None)."""
+        while not stop_event.is_set():
+            generation = self.poll_once()
+            if generation is not None:
+                return generation
+
+            stop_event.wait(self.next_delay())
+
+        return None
@@ -1,38 +1,143 @@
-import bpy
+import threading
+from collections import deque
+
+try:
+    import bpy
+except ImportError:
+    # Outside Blender (e.g. the worker supervisor) lines only go to stdout
+    bpy = None
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
 
 class Logger:
-    _buffer = []
+    """
+    Process-wide logger. Messages below `level` return before any
+    formatting, so pass values as %-style args rather than f-strings:
+
+        log.debug("Track data: %s", track)
+
+    Lines are kept in a fixed-size ring buffer and queued for the UI log
+    panel, which a Blender timer updates in batches on the main thread.
+    """
+
+    level = INFO
+    buffer_size = 1000
+    ui_max_lines = 200
+    flush_interval = 0.5
+
+    _buffer = deque(maxlen=buffer_size)
+    _pending_ui = deque(maxlen=ui_max_lines)
+    _timer_lock = threading.Lock()
+    _timer_registered = False
 
     @classmethod
-    def _push_ui(cls, line):
-        scene = bpy.context.scene if bpy.context else None
-        if not scene:
+    def set_level(cls, level):
+        if isinstance(level, str):
+            level = {name: value for value, name in LEVEL_NAMES.items()}[level.upper()]
+        cls.level = level
+
+    @classmethod
+    def is_enabled(cls, level):
+        return level >= cls.level
+
+    @classmethod
+    def lines(cls):
+        return list(cls._buffer)
+
+    # -------------------------------------------------------------------------
+    # UI FLUSH
+    # -------------------------------------------------------------------------
+    @classmethod
+    def _schedule_flush(cls):
+        if cls._timer_registered or bpy is None or bpy.app.background:
             return
 
-        props = getattr(scene, "vse_instructor_server_props", None)
+        # bpy.app.timers may only be touched from the main thread; lines logged
+        # by worker threads wait for the next main-thread log
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        with cls._timer_lock:
+            if cls._timer_registered:
+                return
+            cls._timer_registered = True
+
+        bpy.app.timers.register(cls._flush_timer, first_interval=cls.flush_interval, persistent=True)
+
+    @classmethod
+    def _flush_timer(cls):
+        cls.flush_ui()
+
+        if cls._pending_ui:
+            return cls.flush_interval
+
+        cls._timer_registered = False
+        return None
+
+    @classmethod
+    def flush_ui(cls):
+        """Copy queued lines into the server panel's log collection. Main thread only."""
+        if not cls._pending_ui or bpy is None:
+            return
+
+        lines = []
+        while cls._pending_ui:
+            lines.append(cls._pending_ui.popleft())
+
+        scene = bpy.context.scene if bpy.context else None
+        props = getattr(scene, "vse_instructor_server_props", None) if scene else None
         if not props:
             return
 
-        item = props.logs.add()
-        item.text = line
+        for line in lines[-cls.ui_max_lines:]:
+            props.logs.add().text = line
 
         # keep log size sane
-        if len(props.logs) > 200:
+        overflow = len(props.logs) - cls.ui_max_lines
+        for _ in range(max(0, overflow)):
             props.logs.remove(0)
 
         # also update "Last Message"
-        props.last_message = line
+        props.last_message = lines[-1]
 
+    # -------------------------------------------------------------------------
+    # LOGGING
+    # -------------------------------------------------------------------------
     @classmethod
-    def info(cls, msg: str):
-        line = f"[INFO] {msg}"
+    def log(cls, level, msg, *args):
+        if level < cls.level:
+            return
+
+        if args:
+            try:
+                msg = msg % args
+            except (TypeError, ValueError):
+                msg = " ".join(str(part) for part in (msg, *args))
+
+        line = f"[{LEVEL_NAMES.get(level, level)}] {msg}"
         cls._buffer.append(line)
+        cls._pending_ui.append(line)
         print(line)
-        cls._push_ui(line)
+        cls._schedule_flush()
 
     @classmethod
-    def error(cls, msg: str):
-        line = f"[ERROR] {msg}"
-        cls._buffer.append(line)
-        print(line)
-        cls._push_ui(line)
+    def debug(cls, msg, *args):
+        cls.log(DEBUG, msg, *args)
+
+    @classmethod
+    def info(cls, msg, *args):
+        cls.log(INFO, msg, *args)
+
+    @classmethod
+    def warning(cls, msg, *args):
+        cls.log(WARNING, msg, *args)
+
+    @classmethod
+    def error(cls, msg, *args):
+        cls.log(ERROR, msg, *args)
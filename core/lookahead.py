@@ -0,0 +1,123 @@
+import os
+import threading
+
+from .chunk_downloader import BandwidthLimiter
+from .http_client import HttpError, shared_client
+from .instruction_parser import InstructionError, parse_instruction
+from .media_resolver import MEDIA_CACHE, MediaResolver
+
+# Download ceiling for cache warm-up, so the running job's upload keeps its bandwidth
+# (override with VSE_INSTRUCTOR_LOOKAHEAD_BPS)
+LOOKAHEAD_BYTES_PER_SECOND = int(os.environ.get("VSE_INSTRUCTOR_LOOKAHEAD_BPS", 20 * 1024 ** 2))
+
+PIN_OWNER = "lookahead"
+
+
+class MediaLookahead:
+    """
+    While one generation renders, peeks at the next queued generation and
+    downloads its media into the cache in a background thread, so the next
+    build() finds every clip_ref already local.
+
+    The peek (POST /peek_next_generation) asks the backend to reserve that
+    generation for this machine for reserve_seconds, so other machines do
+    not claim it meanwhile; it is still picked up through the normal probe.
+    A backend without the endpoint turns lookahead off for the session.
+
+    Call stop() before the next build (warm-up and build must not write the
+    same cache entries at once) and release() after it.
+    """
+
+    reserve_seconds = 900
+    peek_timeout = 10
+
+    def __init__(self, server_url, machine_id, log, bytes_per_second=LOOKAHEAD_BYTES_PER_SECOND):
+        self.server_url = server_url
+        self.machine_id = machine_id
+        self.log = log
+        self.bytes_per_second = bytes_per_second
+        self.supported = True
+
+        self._thread = None
+        self._cancel = None
+
+    def peek(self, current_generation_id):
+        """The next queued generation, reserved for this machine, or None."""
+        try:
+            response = shared_client.post_json(
+                f"{self.server_url}/peek_next_generation",
+                {
+                    "machine": self.machine_id,
+                    "exclude": current_generation_id,
+                    "reserve_seconds": self.reserve_seconds,
+                },
+                timeout=self.peek_timeout,
+                retries=0
+            )
+        except HttpError as e:
+            if e.status in (404, 405, 501):
+                self.supported = False
+                self.log.info("Backend has no /peek_next_generation, media lookahead disabled")
+                return None
+            raise
+
+        if not response.get("ok"):
+            return None
+
+        return response.get("data") or None
+
+    def start(self, builder):
+        """Start warming the cache for whatever comes after builder's generation."""
+        if not self.supported or self.bytes_per_second <= 0:
+            return
+
+        self.stop()
+
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(builder.editor_url, builder.generation.get('_id'), self._cancel),
+            name="media-lookahead",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, editor_url, current_generation_id, cancel):
+        try:
+            generation = self.peek(current_generation_id)
+            if not generation or cancel.is_set():
+                return
+
+            plan = parse_instruction(generation.get('config'))
+            if not plan.media:
+                return
+
+            generation_id = generation.get('_id')
+            self.log.info(f"Lookahead: warming {len(plan.media)} media item(s) for generation {generation_id}")
+
+            MEDIA_CACHE.pin(PIN_OWNER, plan.media.keys())
+
+            limiter = BandwidthLimiter(self.bytes_per_second, cancel=cancel)
+            resolver = MediaResolver(editor_url, self.log, limiter=limiter)
+            paths = resolver.prefetch(plan.media)
+
+            ready = sum(1 for path in paths.values() if path)
+            self.log.info(f"Lookahead: {ready}/{len(plan.media)} media item(s) cached for generation {generation_id}")
+
+        except InstructionError as e:
+            self.log.info(f"Lookahead: next generation has an invalid instruction, skipping: {e}")
+        except Exception as e:
+            self.log.error(f"Lookahead failed: {e}")
+
+    def stop(self, timeout=None):
+        """Cancel any warm-up in progress and wait for it. Partial downloads stay resumable."""
+        if self._thread is None:
+            return
+
+        self._cancel.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def release(self):
+        """Let the warmed media be evicted again (the build that used it has pinned its own)."""
+        MEDIA_CACHE.unpin(PIN_OWNER)
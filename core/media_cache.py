@@ -0,0 +1,283 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .file_lock import FileLock
+
+# Byte budget for the media cache (override with VSE_INSTRUCTOR_CACHE_MAX_BYTES)
+CACHE_MAX_BYTES = int(os.environ.get("VSE_INSTRUCTOR_CACHE_MAX_BYTES", 50 * 1024 ** 3))
+
+INDEX_NAME = "cache_index.json"
+# Lock files live outside the entry directories, so evicting an entry never removes its lock
+LOCK_DIR_NAME = ".locks"
+# One held lock file per pinned entry and pinning process: PIN_DIR_NAME/<key>/<pid>-<owner>.lock
+PIN_DIR_NAME = ".pins"
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class MediaCache:
+    """
+    Size-bounded LRU bookkeeping for the media cache directory.
+
+    Every media item lives in its own entry directory under root. The index
+    (root/cache_index.json) records last access and size per entry plus
+    hit/miss/eviction counters. Entries pinned by an owner (e.g. the
+    generation being built) are never evicted.
+
+    Several processes may share root: every update happens under a file
+    lock, re-reading the index first if another process changed it. Pins
+    are lock files held by the pinning process, so they are honoured by
+    every process and lapse if it dies. Entries that are pinned anywhere or
+    whose entry_lock() is held (a download in progress) are never evicted.
+    """
+
+    def __init__(self, root, max_bytes=None):
+        self.root = Path(root)
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else int(max_bytes)
+        self.index_path = self.root / INDEX_NAME
+        self.lock_dir = self.root / LOCK_DIR_NAME
+        self.pin_dir = self.root / PIN_DIR_NAME
+
+        self._lock = threading.RLock()
+        self._index_lock = FileLock(self.lock_dir / f"{INDEX_NAME}.lock")
+        self._entries = None
+        self._stats = None
+        self._signature = None
+        self._pins = {}
+
+    # -------------------------------------------------------------------------
+    # INDEX
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def key(media_id):
+        return media_id.replace(":", "_")
+
+    def entry_dir(self, media_id):
+        return self.root / self.key(media_id)
+
+    def entry_lock(self, media_id):
+        """Cross-process lock held while an entry is being written."""
+        return FileLock(self.lock_dir / f"{self.key(media_id)}.lock")
+
+    @contextmanager
+    def _index(self):
+        """Thread and process exclusive access to a freshly loaded index, saved on exit."""
+        with self._lock, self._index_lock:
+            self._load()
+            yield
+            self._save()
+
+    def _index_signature(self):
+        try:
+            st = self.index_path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _load(self):
+        # Re-read only when another process has rewritten the index since we last did
+        signature = self._index_signature()
+        if self._entries is not None and signature == self._signature:
+            return
+
+        first_load = self._entries is None
+        data = {}
+        if signature is not None:
+            try:
+                data = json.loads(self.index_path.read_text())
+            except (OSError, ValueError):
+                data = {}
+
+        self._entries = data.get("entries", {})
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0}
+        self._stats.update(data.get("stats", {}))
+        self._signature = signature
+
+        if not first_load:
+            return
+
+        # Adopt entry directories that predate the index
+        self.root.mkdir(parents=True, exist_ok=True)
+        for path in self.root.iterdir():
+            if path.is_dir() and not path.name.startswith(".") and path.name not in self._entries:
+                self._entries[path.name] = {
+                    "last_access": path.stat().st_mtime,
+                    "size": _dir_size(path),
+                }
+
+        # Forget entries whose directory was removed by hand
+        for key in [k for k in self._entries if not (self.root / k).is_dir()]:
+            del self._entries[key]
+
+    def _save(self):
+        tmp_path = self.index_path.with_name(INDEX_NAME + ".tmp")
+        tmp_path.write_text(json.dumps({"entries": self._entries, "stats": self._stats}))
+        os.replace(tmp_path, self.index_path)
+        self._signature = self._index_signature()
+
+    # -------------------------------------------------------------------------
+    # ACCESS TRACKING
+    # -------------------------------------------------------------------------
+    def record_hit(self, media_id):
+        with self._index():
+            self._stats["hits"] += 1
+            key = self.key(media_id)
+            if key not in self._entries:
+                self._entries[key] = {"size": _dir_size(self.entry_dir(media_id))}
+            self._entries[key]["last_access"] = time.time()
+
+    def record_miss(self, media_id):
+        with self._index():
+            self._stats["misses"] += 1
+
+    def record_stored(self, media_id):
+        """Call once a media item is fully written; re-measures it and enforces the budget."""
+        with self._index():
+            self._entries[self.key(media_id)] = {
+                "last_access": time.time(),
+                "size": _dir_size(self.entry_dir(media_id)),
+            }
+            return self._evict()
+
+    # -------------------------------------------------------------------------
+    # PINNING
+    # -------------------------------------------------------------------------
+    def pin(self, owner, media_ids):
+        """
+        Protect media_ids from eviction by any process until unpin(owner).
+        Replaces owner's previous pins.
+        """
+        keys = {self.key(media_id) for media_id in media_ids}
+
+        # Under the index lock, so an eviction never sees a pin file before it is held
+        with self._lock, self._index_lock:
+            held = self._pins.setdefault(owner, {})
+            for key in set(held) - keys:
+                self._drop_pin(held.pop(key))
+            for key in keys - set(held):
+                lock = FileLock(self.pin_dir / key / f"{os.getpid()}-{owner}.lock")
+                if lock.acquire(blocking=False):
+                    held[key] = lock
+
+    def unpin(self, owner):
+        with self._lock, self._index_lock:
+            for lock in self._pins.pop(owner, {}).values():
+                self._drop_pin(lock)
+
+    @staticmethod
+    def _drop_pin(lock):
+        lock.release()
+        try:
+            lock.path.unlink()
+            lock.path.parent.rmdir()
+        except OSError:
+            pass
+
+    def _pinned(self):
+        """
+        Keys pinned by any process: those with a pin file whose lock is held.
+        Pin files left by processes that have exited are removed. Call with
+        the index lock held.
+        """
+        pinned = set()
+        for held in self._pins.values():
+            pinned |= set(held)
+
+        try:
+            key_dirs = [path for path in self.pin_dir.iterdir() if path.name not in pinned]
+        except OSError:
+            return pinned
+
+        for key_dir in key_dirs:
+            for path in list(key_dir.glob("*.lock")):
+                lock = FileLock(path)
+                if not lock.acquire(blocking=False):
+                    pinned.add(key_dir.name)
+                    break
+                self._drop_pin(lock)
+
+        return pinned
+
+    # -------------------------------------------------------------------------
+    # EVICTION
+    # -------------------------------------------------------------------------
+    def enforce_budget(self):
+        """Evict least-recently-used, unpinned entries until under budget. Returns evicted keys."""
+        with self._index():
+            return self._evict()
+
+    def _evict(self):
+        total = sum(entry.get("size", 0) for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return []
+
+        pinned = self._pinned()
+        candidates = sorted(
+            (key for key in self._entries if key not in pinned),
+            key=lambda k: self._entries[k].get("last_access", 0)
+        )
+
+        evicted = []
+        for key in candidates:
+            if total <= self.max_bytes:
+                break
+
+            # Skip entries being written, including by this process
+            lock = self.entry_lock(key)
+            if not lock.acquire(blocking=False):
+                continue
+
+            try:
+                size = self._entries[key].get("size", 0)
+                shutil.rmtree(self.root / key, ignore_errors=True)
+                del self._entries[key]
+            finally:
+                lock.release()
+
+            total -= size
+            self._stats["evictions"] += 1
+            self._stats["evicted_bytes"] += size
+            evicted.append(key)
+
+        return evicted
+
+    # -------------------------------------------------------------------------
+    # REPORTING
+    # -------------------------------------------------------------------------
+    def stats(self):
+        with self._lock, self._index_lock:
+            self._load()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "size_bytes": sum(entry.get("size", 0) for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": (self._stats["hits"] / lookups) if lookups else 0.0,
+                "evictions": self._stats["evictions"],
+                "evicted_bytes": self._stats["evicted_bytes"],
+            }
+
+    def report(self):
+        s = self.stats()
+        return (
+            f"Cache: {s['entries']} entries, "
+            f"{s['size_bytes'] / 1024 ** 2:.1f}/{s['max_bytes'] / 1024 ** 2:.0f} MB, "
+            f"hit rate {s['hit_rate']:.0%} ({s['hits']}/{s['hits'] + s['misses']}), "
+            f"{s['evictions']} evictions"
+        )
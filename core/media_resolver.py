@@ -0,0 +1,322 @@
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+
+from . import metrics
+from .cache_manifest import CacheManifest
+from .chunk_downloader import ChunkDownloader, ChunkDownloadError, PartsSink, StreamSink
+from .file_lock import FileLockTimeout
+from .http_client import shared_client
+from .media_cache import MediaCache
+from .spans import Span
+
+OCTET_STREAM = "application/octet-stream"
+HEADER_MEDIA_ID = "X-Media-Id"
+HEADER_CHUNK_INDEX = "X-Chunk-Index"
+HEADER_CHUNK_SIZE = "X-Chunk-Size"
+HEADER_TOTAL_CHUNKS = "X-Total-Chunks"
+
+MEDIA_TYPES = {"video", "audio", "image"}
+
+CACHE_ROOT = Path.home() / "VSEInstructorCache"
+CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+MEDIA_CACHE = MediaCache(CACHE_ROOT)
+
+MIME_MAP = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "video/mp4": ".mp4",
+    "audio/mpeg": ".mp3",
+    "audio/wav": ".wav",
+}
+
+
+class MediaResolver:
+    """
+    Downloads clip media from the editor backend into MEDIA_CACHE and
+    returns local paths. Needs no bpy, so it can warm the cache from a
+    background thread (see core.lookahead) as well as serve VSEBuilder.
+
+    limiter: optional BandwidthLimiter shared by every chunk download.
+    spans: optional SpanRecorder timing each download and assembly.
+    """
+
+    # Parallel chunk downloads per media item, and retries per chunk
+    download_workers = 4
+    download_retries = 3
+    # Distinct media items resolved at once during prefetch
+    prefetch_workers = 3
+    # "stream" writes chunks in place into the final file; "parts" keeps chunks/NNNNN.part
+    assembly_mode = "stream"
+    # "quick" trusts a cached file whose size matches its manifest; "full" re-hashes every chunk
+    cache_verify = "quick"
+    # Use raw octet-stream chunks when the backend supports them
+    binary_transport = True
+    # Prefix of the download/assembly span names recorded when spans is given
+    span_prefix = "build/media"
+    # Seconds to wait for another process (or thread) resolving the same media
+    lock_timeout = 1800
+    _capabilities = {}
+    _capabilities_lock = threading.Lock()
+
+    def __init__(self, editor_url, log, limiter=None, spans=None):
+        self.editor_url = editor_url
+        self.log = log
+        self.limiter = limiter
+        self.spans = spans
+
+    # -------------------------------------------------------------------------
+    # CHUNK TRANSPORT
+    # -------------------------------------------------------------------------
+    def binary_transport_supported(self):
+        """
+        True when the editor backend advertises raw octet-stream chunks via
+        GET /capabilities ({"data": {"chunk_transport": ["binary", ...]}}).
+        Any failure means the JSON/base64 protocol. Cached per backend URL.
+        """
+        if not self.binary_transport:
+            return False
+
+        # Prefetch threads all ask at once; only the first one fetches
+        with MediaResolver._capabilities_lock:
+            supported = MediaResolver._capabilities.get(self.editor_url)
+            if supported is None:
+                try:
+                    response = shared_client.request("GET", f"{self.editor_url}/capabilities", timeout=10, retries=0)
+                    transports = response.json().get("data", {}).get("chunk_transport", [])
+                    supported = "binary" in transports
+                except Exception:
+                    supported = False
+
+                MediaResolver._capabilities[self.editor_url] = supported
+                self.log.info(f"Chunk transport for {self.editor_url}: {'binary' if supported else 'json'}")
+
+        return supported
+
+    def _fetch_chunk(self, media_id, index):
+        """Returns (chunk_bytes, total_chunks). ChunkDownloader retries whole chunks, so the client does not."""
+        payload = {"media_id": media_id, "index": index}
+
+        if self.binary_transport_supported():
+            response = shared_client.request(
+                "POST",
+                f"{self.editor_url}/read_upload",
+                body=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json", "Accept": OCTET_STREAM},
+                timeout=30,
+                retries=0
+            )
+
+            # The server may still answer a single request in JSON
+            if response.header("Content-Type", "").startswith(OCTET_STREAM):
+                return response.body, int(response.header(HEADER_TOTAL_CHUNKS))
+
+            data = response.json()
+        else:
+            data = shared_client.post_json(f"{self.editor_url}/read_upload", payload, timeout=30, retries=0)
+
+        if not data.get("ok"):
+            raise ChunkDownloadError(f"Server refused chunk {index}: {data.get('message')}")
+
+        return base64.b64decode(data["data"]["chunk"]), data["data"]["total_chunks"]
+
+    @staticmethod
+    def infer_extension(clip_ref):
+        mime = clip_ref.get("mime")
+        title = clip_ref.get("title")
+
+        if mime in MIME_MAP:
+            return MIME_MAP[mime]
+
+        if title and "." in title:
+            return Path(title).suffix
+
+        return ".bin"  # absolute fallback
+
+    # -------------------------------------------------------------------------
+    # RESOLVE
+    # -------------------------------------------------------------------------
+    def resolve(self, clip_ref):
+        """
+        Local path of a video/audio/image clip_ref's media, downloading it if
+        needed. None on failure. Only one process or thread resolves a media
+        item at a time; the others wait and then find it cached.
+        """
+        media_id = clip_ref.get("_id")
+        lock = MEDIA_CACHE.entry_lock(media_id)
+
+        if not lock.acquire(blocking=False):
+            self.log.info(f"Media {media_id} is being fetched by {lock.holder()}, waiting...")
+            try:
+                with self._span("wait"):
+                    lock.acquire(timeout=self.lock_timeout)
+            except FileLockTimeout as e:
+                self.log.error(f"Gave up waiting for media {media_id}: {e}")
+                return None
+
+        try:
+            return self._resolve_locked(clip_ref)
+        finally:
+            lock.release()
+
+    def _resolve_locked(self, clip_ref):
+        media_id = clip_ref.get("_id")
+
+        media_dir = MEDIA_CACHE.entry_dir(media_id)
+        chunks_dir = media_dir / "chunks"
+        ext = self.infer_extension(clip_ref)
+        final_path = media_dir / f"final{ext}"
+
+        media_dir.mkdir(parents=True, exist_ok=True)
+
+        manifest = CacheManifest.load(media_dir, media_id)
+        downloader = ChunkDownloader(
+            self._fetch_chunk,
+            max_workers=self.download_workers,
+            retries=self.download_retries,
+            log=self.log,
+            limiter=self.limiter
+        )
+
+        # ----------------------------
+        # CACHE HIT (verified against the manifest)
+        # ----------------------------
+        if final_path.exists():
+            if not manifest.exists():
+                self._adopt_legacy_media(downloader, media_id, final_path, manifest)
+
+            with self._span("verify") as span:
+                verified = self._verify_cached(manifest, final_path)
+                span.add(bytes=final_path.stat().st_size)
+
+            if verified:
+                self.log.info(f"Using cached media: {final_path}")
+                MEDIA_CACHE.record_hit(media_id)
+                metrics.MEDIA_REQUESTS.labels("hit").inc()
+                metrics.MEDIA_BYTES_CACHED.inc(span.bytes)
+                return str(final_path)
+
+            # Reopen the damaged file so only the bad chunks are fetched again
+            self.log.error(f"Cached media failed verification: {final_path}")
+            manifest.final = None
+            os.replace(final_path, final_path.with_name(final_path.name + ".partial"))
+            reopened = True
+        else:
+            reopened = False
+
+        self.log.info("Media not cached. Fetching from server...")
+        MEDIA_CACHE.record_miss(media_id)
+        metrics.MEDIA_REQUESTS.labels("miss").inc()
+
+        # ----------------------------
+        # DOWNLOAD CHUNKS
+        # ----------------------------
+        # Downloads already started as .part files are resumed in that layout
+        if not reopened and (self.assembly_mode == "parts" or chunks_dir.is_dir()):
+            chunks_dir.mkdir(parents=True, exist_ok=True)
+            sink = PartsSink(chunks_dir, manifest)
+        else:
+            sink = StreamSink(final_path, manifest)
+
+        reused = sink.resume()
+        if reused:
+            self.log.info(f"Resuming download, {reused}/{sink.total_chunks} chunks verified")
+
+        started = time.monotonic()
+        try:
+            with self._span("download") as span:
+                try:
+                    downloader.download(media_id, sink)
+                finally:
+                    span.add(bytes=downloader.fetched_bytes)
+        except ChunkDownloadError as e:
+            sink.discard()
+            self.log.error(f"Failed to fetch media {media_id}: {e}")
+            return None
+
+        elapsed = time.monotonic() - started
+        if downloader.fetched_bytes and elapsed > 0:
+            metrics.DOWNLOAD_RATE.observe(downloader.fetched_bytes / elapsed)
+
+        # ----------------------------
+        # PUBLISH FINAL BINARY (ONCE)
+        # ----------------------------
+        self.log.info("Assembling final binary...")
+        with self._span("assembly") as span:
+            sink.publish(final_path)
+            span.add(bytes=final_path.stat().st_size)
+
+        evicted = MEDIA_CACHE.record_stored(media_id)
+        if evicted:
+            self.log.info(f"Cache over budget, evicted: {', '.join(evicted)}")
+
+        self.log.info(f"Media assembled: {final_path}")
+
+        return str(final_path)
+
+    def _span(self, name):
+        if self.spans is None:
+            return nullcontext(Span(name))
+        return self.spans.span(f"{self.span_prefix}/{name}")
+
+    def _verify_cached(self, manifest, final_path):
+        if not manifest.verify_final_quick(final_path):
+            return False
+
+        if self.cache_verify == "full":
+            return len(manifest.verify_ranges(final_path)) == manifest.total_chunks
+
+        return True
+
+    def _adopt_legacy_media(self, downloader, media_id, final_path, manifest):
+        """
+        A final file cached before manifests existed is kept only if its size
+        fits the server's chunking and its first chunk matches.
+        """
+        self.log.info(f"No manifest for cached media, checking: {final_path}")
+
+        try:
+            binary, total_chunks = downloader.fetch(media_id, 0)
+        except ChunkDownloadError as e:
+            self.log.error(f"Could not check cached media {media_id}: {e}")
+            return
+
+        chunk_size = len(binary)
+        size = final_path.stat().st_size
+
+        with open(final_path, "rb") as f:
+            head = f.read(chunk_size)
+
+        if (total_chunks - 1) * chunk_size < size <= total_chunks * chunk_size and head == binary:
+            manifest.adopt_file(final_path, total_chunks, chunk_size)
+
+    # -------------------------------------------------------------------------
+    # PREFETCH
+    # -------------------------------------------------------------------------
+    def prefetch(self, clip_refs):
+        """
+        Resolve several media items (media_id -> clip_ref) concurrently.
+        Returns media_id -> local path, or None for items that failed.
+        """
+        paths = {}
+
+        with ThreadPoolExecutor(max_workers=self.prefetch_workers) as pool:
+            futures = {
+                pool.submit(self.resolve, clip_ref): media_id
+                for media_id, clip_ref in clip_refs.items()
+            }
+
+            for future in as_completed(futures):
+                media_id = futures[future]
+                try:
+                    paths[media_id] = future.result()
+                except Exception as e:
+                    self.log.error(f"Failed to prefetch media {media_id}: {e}")
+                    paths[media_id] = None
+
+        return paths
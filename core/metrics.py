@@ -0,0 +1,303 @@
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PREFIX = "vse_instructor_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Exporter defaults; with neither a port nor a file nothing is exported
+METRICS_PORT = int(os.environ.get("VSE_INSTRUCTOR_METRICS_PORT") or 0)
+METRICS_FILE = os.environ.get("VSE_INSTRUCTOR_METRICS_FILE") or None
+METRICS_INTERVAL = float(os.environ.get("VSE_INSTRUCTOR_METRICS_INTERVAL") or 15)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+# -----------------------------------------------------------------------------
+# METRIC TYPES
+# -----------------------------------------------------------------------------
+class _Metric:
+    """
+    A metric family. Without label names it is its own single series;
+    with them, labels(...) returns the series for those values. Resolve
+    labelled series once outside hot loops: an update is then one
+    uncontended lock and an add.
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._series_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        series = self._series.get(values)
+        if series is None:
+            with self._series_lock:
+                series = self._series.get(values)
+                if series is None:
+                    series = self._series[values] = self._child()
+        return series
+
+    def _child(self):
+        child = object.__new__(type(self))
+        child.__dict__.update(self.__dict__)
+        child._series = {}
+        child._lock = threading.Lock()
+        child._reset()
+        return child
+
+    def _all_series(self):
+        if not self.labelnames:
+            return [((), self)]
+        with self._series_lock:
+            return sorted(self._series.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, series in self._all_series():
+            lines.extend(series._samples(self.name, self.labelnames, values))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _reset(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def _samples(self, name, labelnames, values):
+        return [f"{name}_total{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _samples(self, name, labelnames, values):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            labels = _format_labels(labelnames, values, [("le", _format_value(float(bound)))])
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {count}")
+        return lines
+
+
+# -----------------------------------------------------------------------------
+# REGISTRY
+# -----------------------------------------------------------------------------
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, buckets, labelnames=()):
+        return self.register(Histogram(name, help, buckets, labelnames))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+_BYTES_PER_SECOND = tuple(2 ** n * 1024 for n in range(6, 18, 2))  # 64 KiB/s … 64 MiB/s
+
+PROBES = REGISTRY.counter("probes", "Probes sent to /probe_new_generation", ["result"])
+JOBS_CLAIMED = REGISTRY.counter("jobs_claimed", "Generations received from a probe")
+JOBS_FINISHED = REGISTRY.counter("jobs_finished", "Generations finished, by final status", ["status"])
+JOB_SECONDS = REGISTRY.histogram(
+    "job_duration_seconds", "Time from taking a generation to its final status",
+    (10, 30, 60, 120, 300, 600, 1200, 3600)
+)
+
+MEDIA_REQUESTS = REGISTRY.counter("media_requests", "Media items resolved, by cache result", ["result"])
+MEDIA_BYTES_DOWNLOADED = REGISTRY.counter("media_downloaded_bytes", "Media bytes fetched from the editor backend")
+MEDIA_BYTES_CACHED = REGISTRY.counter("media_cached_bytes", "Media bytes served from the local cache")
+DOWNLOAD_RATE = REGISTRY.histogram(
+    "media_download_bytes_per_second", "Throughput of each media download", _BYTES_PER_SECOND
+)
+
+UPLOAD_BYTES = REGISTRY.counter("upload_bytes", "Rendered bytes sent to the editor backend")
+UPLOAD_RATE = REGISTRY.histogram("upload_bytes_per_second", "Throughput of each rendered upload", _BYTES_PER_SECOND)
+CHUNK_RETRIES = REGISTRY.counter("chunk_retries", "Chunk transfers retried", ["direction"])
+
+RENDER_FRAMES = REGISTRY.counter("render_frames", "Frames rendered")
+RENDER_FPS = REGISTRY.histogram("render_fps", "Frames per second of each render", (1, 2, 5, 10, 25, 50, 100, 250))
+
+
+# -----------------------------------------------------------------------------
+# EXPORTERS
+# -----------------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Serves the registry at http://host:port/metrics from a daemon thread."""
+
+    def __init__(self, port, host="127.0.0.1", registry=REGISTRY):
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.registry = registry
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class MetricsFileWriter:
+    """
+    Rewrites path with the registry every interval seconds (atomically, so
+    e.g. node_exporter's textfile collector never reads a partial file).
+    """
+
+    def __init__(self, path, interval=15.0, registry=REGISTRY):
+        self.path = Path(path)
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+
+    def write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass
+
+    def start(self):
+        self.write()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+def start_exporters(port=0, path=None, interval=METRICS_INTERVAL, log=None):
+    """
+    Serve the registry on 127.0.0.1:port and/or rewrite it to path every
+    interval seconds. Returns the started exporters; stop each with stop().
+    """
+    exporters = []
+
+    if port:
+        try:
+            server = MetricsServer(port).start()
+        except OSError as e:
+            if log:
+                log.error(f"Could not serve metrics on port {port}: {e}")
+        else:
+            exporters.append(server)
+            if log:
+                log.info(f"Serving metrics at http://{server.address[0]}:{server.address[1]}/metrics")
+
+    if path:
+        exporters.append(MetricsFileWriter(path, interval).start())
+        if log:
+            log.info(f"Writing metrics to {path} every {interval:g}s")
+
+    return exporters
+
+
+def stop_exporters(exporters):
+    for exporter in exporters:
+        exporter.stop()
@@ -0,0 +1,213 @@
+import os
+import subprocess
+import time
+from pathlib import Path
+
+
+class ParallelRenderError(Exception):
+    pass
+
+
+class ProcessRunner:
+    """
+    Starts the external processes used by ParallelRenderer. Executables are
+    plain attributes so tests can point them at stand-in scripts.
+    """
+
+    def __init__(self, blender="blender", ffmpeg="ffmpeg", ffprobe="ffprobe"):
+        self.blender = blender
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+
+    def start(self, args, log_path, append=False):
+        """Start args in the background, writing stdout/stderr to log_path (appending if append)."""
+        log_file = open(log_path, "ab" if append else "wb")
+        try:
+            return subprocess.Popen(args, stdout=log_file, stderr=subprocess.STDOUT)
+        finally:
+            log_file.close()
+
+    def run(self, args, log_path):
+        """Run args to completion and return its exit code."""
+        return self.start(args, log_path).wait()
+
+    def capture(self, args, timeout=60):
+        """Run args to completion and return (exit code, stdout bytes)."""
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=timeout)
+        return result.returncode, result.stdout
+
+
+# -----------------------------------------------------------------------------
+# PLANNING
+# -----------------------------------------------------------------------------
+def plan_segments(frame_start, frame_end, count):
+    """
+    Split the inclusive range frame_start..frame_end into at most count
+    contiguous (start, end) ranges whose lengths differ by at most one frame.
+    """
+    total = frame_end - frame_start + 1
+    if total <= 0:
+        raise ValueError(f"Empty frame range {frame_start} → {frame_end}")
+
+    count = max(1, min(int(count), total))
+    base, extra = divmod(total, count)
+
+    segments = []
+    start = frame_start
+    for index in range(count):
+        length = base + (1 if index < extra else 0)
+        segments.append((start, start + length - 1))
+        start += length
+
+    return segments
+
+
+def segment_command(runner, blend_path, scene_name, frame_start, frame_end, output_prefix, threads=0):
+    """Command line rendering one frame range of a saved .blend in the background."""
+    args = [runner.blender, "-b", str(blend_path), "-S", scene_name]
+    if threads:
+        args += ["-t", str(threads)]
+    args += [
+        "-s", str(frame_start),
+        "-e", str(frame_end),
+        "-o", str(output_prefix),
+        "-a",
+    ]
+    return args
+
+
+def concat_command(runner, list_path, output_path):
+    """ffmpeg concat-demuxer command joining the listed files by stream copy."""
+    return [
+        runner.ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "concat", "-safe", "0",
+        "-i", str(list_path),
+        "-c", "copy",
+        str(output_path),
+    ]
+
+
+def write_concat_list(paths, list_path):
+    lines = []
+    for path in paths:
+        escaped = str(Path(path).resolve()).replace("'", "'\\''")
+        lines.append(f"file '{escaped}'")
+    Path(list_path).write_text("\n".join(lines) + "\n")
+
+
+def log_tail(log_path, lines=20):
+    try:
+        return "\n".join(Path(log_path).read_text(errors="replace").splitlines()[-lines:])
+    except OSError:
+        return ""
+
+
+# -----------------------------------------------------------------------------
+# RENDERER
+# -----------------------------------------------------------------------------
+class ParallelRenderer:
+    """
+    Renders a saved .blend as N frame-range segments in separate background
+    Blender processes, then joins the segments into one container with
+    ffmpeg stream copy (no re-encode).
+    """
+
+    def __init__(self, runner=None, processes=None, cores=None, log=None):
+        self.runner = runner or ProcessRunner()
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        # Cores shared by the segment processes (default: all of them)
+        self.cores = max(1, int(cores or os.cpu_count() or 1))
+        self.log = log
+
+    def _info(self, msg, *args):
+        if self.log:
+            self.log.info(msg, *args)
+
+    def render_segments(self, blend_path, scene_name, frame_start, frame_end, work_dir):
+        """Render every segment concurrently. Returns the segment files in frame order."""
+        work_dir = Path(work_dir)
+        work_dir.mkdir(parents=True, exist_ok=True)
+
+        segments = plan_segments(frame_start, frame_end, self.processes)
+        # Share the cores between processes instead of each one claiming all of them
+        threads = max(1, self.cores // len(segments))
+
+        running = []
+        try:
+            for index, (start, end) in enumerate(segments):
+                prefix = work_dir / f"segment_{index:05d}_"
+                for stale in work_dir.glob(f"{prefix.name}*"):
+                    stale.unlink()
+
+                log_path = work_dir / f"segment_{index:05d}.log"
+                args = segment_command(self.runner, blend_path, scene_name, start, end, f"{prefix}####", threads)
+                running.append((index, prefix, log_path, self.runner.start(args, log_path)))
+
+            self._info(f"Rendering {len(segments)} segments of {frame_start} → {frame_end} in parallel")
+            started = time.monotonic()
+
+            failed = None
+            for index, prefix, log_path, process in running:
+                code = process.wait()
+                if code != 0 and failed is None:
+                    failed = (index, code, log_path)
+                    for _, _, _, other in running:
+                        if other.poll() is None:
+                            other.terminate()
+
+        except OSError as e:
+            raise ParallelRenderError(f"Could not run segment renders: {e}") from e
+
+        finally:
+            # Never leave segment renders behind, whatever went wrong
+            for _, _, _, process in running:
+                if process.poll() is None:
+                    process.terminate()
+                    process.wait()
+
+        if failed:
+            index, code, log_path = failed
+            raise ParallelRenderError(
+                f"Segment {index} exited with code {code}:\n{log_tail(log_path)}"
+            )
+
+        paths = []
+        for index, prefix, log_path, _ in running:
+            outputs = sorted(p for p in work_dir.glob(f"{prefix.name}*") if p.suffix != ".log")
+            if not outputs:
+                raise ParallelRenderError(f"Segment {index} produced no output:\n{log_tail(log_path)}")
+            paths.append(outputs[0])
+
+        self._info(f"Rendered {len(paths)} segments in {time.monotonic() - started:.1f}s")
+        return paths
+
+    def concat(self, paths, output_path):
+        """Join segment files into output_path without re-encoding."""
+        output_path = Path(output_path)
+        list_path = output_path.with_name(output_path.name + ".concat.txt")
+        log_path = output_path.with_name(output_path.name + ".concat.log")
+
+        try:
+            write_concat_list(paths, list_path)
+            code = self.runner.run(concat_command(self.runner, list_path, output_path), log_path)
+        except OSError as e:
+            raise ParallelRenderError(f"Could not run concat: {e}") from e
+        if code != 0:
+            raise ParallelRenderError(f"Concat exited with code {code}:\n{log_tail(log_path)}")
+
+        list_path.unlink(missing_ok=True)
+        log_path.unlink(missing_ok=True)
+        return output_path
+
+    def render(self, blend_path, scene_name, frame_start, frame_end, output_path, work_dir=None):
+        output_path = Path(output_path)
+        work_dir = Path(work_dir or output_path.with_name(output_path.stem + "_parallel"))
+
+        paths = self.render_segments(blend_path, scene_name, frame_start, frame_end, work_dir)
+        self.concat(paths, output_path)
+
+        for path in work_dir.iterdir():
+            path.unlink()
+        work_dir.rmdir()
+
+        return output_path
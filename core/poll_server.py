@@ -1,9 +1,8 @@
-import json
-import urllib.request
 import bpy
+import os
 from .logger import Logger
 
-MACHINE_ID = "savvy-m1-air-2020"
+MACHINE_ID = os.environ.get("VSE_INSTRUCTOR_MACHINE_ID", "savvy-m1-air-2020")
 
 IS_RENDERING = False
 HANDLERS_ATTACHED = False
@@ -11,6 +10,49 @@ POLL_INTERVAL = 60
 
 
 from .vse_builder import VSEBuilder
+from .instruction_parser import InstructionError
+from .parallel_render import ParallelRenderError
+from .smart_render import SmartRenderError
+from .generation_scene import create_generation_scene, teardown_generation_scene
+from .http_client import shared_client
+from .job_poller import JobPoller
+from .lookahead import MediaLookahead
+
+# Probes run on Blender's main thread, so never hold one open with long-poll
+POLLER = JobPoller(VSEBuilder.server_url, {"machine": MACHINE_ID}, long_poll=False, log=Logger())
+LOOKAHEAD = MediaLookahead(VSEBuilder.server_url, MACHINE_ID, Logger())
+
+
+def resume_polling():
+    # Work often comes in bursts: look again soon after finishing a job
+    POLLER.job_finished()
+    bpy.app.timers.register(
+        poll_backend_for_render,
+        first_interval=POLLER.next_delay()
+    )
+
+
+def end_render_job(builder):
+    """Clear the rendering flag, remove the generation's scene and resume polling."""
+    global IS_RENDERING
+
+    IS_RENDERING = False
+    teardown_generation_scene(builder.scene)
+
+    # 🔁 Resume polling
+    resume_polling()
+
+
+def report_failed(generation_id):
+    """Mark a generation FAILED when it failed before a builder could. Never raises."""
+    try:
+        shared_client.post_json(f"{VSEBuilder.server_url}/update_generation_status", {
+            "_id": generation_id,
+            "status": "FAILED",
+            "time": VSEBuilder.iso_now(),
+        }, timeout=30)
+    except Exception as e:
+        logger.error(f"Could not mark generation {generation_id} as failed: {e}")
 
 
 def render_sequence(builder):
@@ -33,6 +75,8 @@ def render_sequence(builder):
         global IS_RENDERING, HANDLERS_ATTACHED
 
         builder.log.info(f"[Render] Completed generation {generation_id}")
+        # This handler runs inside the render operator; the upload is not render time
+        builder.spans.finish(builder.render_span)
 
         # 🛑 VERY IMPORTANT: Remove handlers FIRST
         if on_start in bpy.app.handlers.render_pre:
@@ -42,28 +86,137 @@ def render_sequence(builder):
             bpy.app.handlers.render_complete.remove(on_complete)
 
         # Upload once
-        media = builder.upload_rendered_media()
-        if media:
-            builder.generation_complete(media.get('_id'))
-
-        builder.update_server_status("DONE")
+        try:
+            builder.finish_generation(builder.upload_rendered_media())
+        except Exception as e:
+            builder.fail_generation(f"Could not finish generation {generation_id}: {e}")
 
         IS_RENDERING = False
         HANDLERS_ATTACHED = False
 
-        # 🔁 Resume polling
+        # Removing the scene inside its own render handler is unsafe; defer it
         bpy.app.timers.register(
-            poll_backend_for_render,
-            first_interval=POLL_INTERVAL
+            lambda: teardown_generation_scene(builder.scene),
+            first_interval=0.1
         )
 
+        # 🔁 Resume polling
+        resume_polling()
+
     bpy.app.handlers.render_pre.append(on_start)
     bpy.app.handlers.render_complete.append(on_complete)
 
-    builder.render_sequence(
-        on_complete=None,  # avoid double-wiring
-        on_start=None
-    )
+    try:
+        builder.render_sequence(
+            on_complete=None,  # avoid double-wiring
+            on_start=None
+        )
+    except Exception as e:
+        # on_complete already finished the job if the render got that far
+        if not IS_RENDERING:
+            raise
+
+        # The render never completed, so on_complete will not clean up
+        if on_start in bpy.app.handlers.render_pre:
+            bpy.app.handlers.render_pre.remove(on_start)
+        if on_complete in bpy.app.handlers.render_complete:
+            bpy.app.handlers.render_complete.remove(on_complete)
+        HANDLERS_ATTACHED = False
+
+        builder.fail_generation(f"Render failed for generation {generation_id}: {e}")
+        end_render_job(builder)
+
+
+def render_pipelined(builder, segment_seconds):
+    """
+    Render in segments and upload each finished segment while the next one
+    encodes. The backend assembles the final media from the segment manifest.
+    """
+    generation_id = builder.generation.get('_id')
+
+    try:
+        builder.log.info(f"[Render] Started generation {generation_id} ({segment_seconds}s segments)")
+        builder.update_server_status("RENDERING")
+
+        media = builder.render_and_upload_segments(segment_seconds)
+
+        builder.log.info(f"[Render] Completed generation {generation_id}")
+
+        builder.finish_generation(media)
+
+    except Exception as e:
+        builder.fail_generation(f"Segmented render failed for generation {generation_id}: {e}")
+
+    finally:
+        end_render_job(builder)
+
+
+def render_parallel(builder, processes):
+    """
+    Render across several background Blender processes, then upload the
+    stream-copied result as a single media item.
+    """
+    generation_id = builder.generation.get('_id')
+
+    try:
+        builder.log.info(f"[Render] Started generation {generation_id} ({processes} processes)")
+        builder.update_server_status("RENDERING")
+
+        builder.render_parallel(processes)
+
+        builder.log.info(f"[Render] Completed generation {generation_id}")
+
+        builder.finish_generation(builder.upload_rendered_media())
+
+    except ParallelRenderError as e:
+        builder.fail_generation(f"Parallel render failed for generation {generation_id}: {e}")
+
+    except Exception as e:
+        builder.fail_generation(f"Generation {generation_id} failed: {e}")
+
+    finally:
+        end_render_job(builder)
+
+
+def render_stream_copy(builder, cuts):
+    """
+    Produce the output by stream-copying source cuts instead of rendering.
+    Returns False, leaving the job to a normal render, if the copy fails.
+    """
+    generation_id = builder.generation.get('_id')
+
+    try:
+        builder.log.info(f"[Render] Started generation {generation_id} (stream copy)")
+        builder.update_server_status("RENDERING")
+
+        try:
+            builder.render_stream_copy(cuts)
+        except SmartRenderError as e:
+            builder.log.warning(f"Stream copy failed, rendering normally: {e}")
+            return False
+
+        builder.log.info(f"[Render] Completed generation {generation_id}")
+
+        builder.finish_generation(builder.upload_rendered_media())
+
+    except Exception as e:
+        builder.fail_generation(f"Stream copy failed for generation {generation_id}: {e}")
+
+    end_render_job(builder)
+    return True
+
+
+def upload_existing_render(builder):
+    """Resume the interrupted upload of a render already on disk instead of rendering again."""
+    try:
+        builder.update_server_status("RENDERING")
+        builder.finish_generation(builder.upload_rendered_media())
+
+    except Exception as e:
+        builder.fail_generation(f"Upload failed for generation {builder.generation.get('_id')}: {e}")
+
+    finally:
+        end_render_job(builder)
 
 
 def start_render_job(generation):
@@ -71,14 +224,54 @@ def start_render_job(generation):
 
     IS_RENDERING = True
 
-    builder = VSEBuilder(generation.get('config'))
+    # Each generation gets its own scene, removed again once it is uploaded
+    scene = create_generation_scene(generation.get('_id'))
+    builder = VSEBuilder(generation.get('config'), scene=scene)
     builder.set_generation(generation)
+    if POLLER.last_probe_seconds is not None:
+        builder.spans.record("probe", POLLER.last_probe_seconds)
 
-    builder.build()
+    # Media warmed by the previous job's lookahead is now a cache hit
+    LOOKAHEAD.stop()
+    try:
+        builder.build()
+    except Exception as e:
+        reason = "Invalid instruction" if isinstance(e, InstructionError) else "Build failed"
+        builder.fail_generation(f"{reason} for generation {generation.get('_id')}: {e}")
+        teardown_generation_scene(scene)
+        IS_RENDERING = False
+        return False
+    finally:
+        LOOKAHEAD.release()
+
+    # Warm the cache for the next queued job while this one renders
+    LOOKAHEAD.start(builder)
+
+    # Instructions that ask for segmented output upload while rendering
+    output = builder.instruction.get('output', {})
+    segment_seconds = output.get('segment_seconds')
+    processes = output.get('render_processes', VSEBuilder.render_processes)
+    if segment_seconds:
+        render_pipelined(builder, segment_seconds)
+        return True
+
+    # An earlier attempt at this generation may have rendered it and stopped mid-upload
+    if builder.resume_pending_upload():
+        upload_existing_render(builder)
+        return True
+
+    # Timelines that are plain cuts of matching sources skip the encoder
+    cuts = builder.smart_render_plan() if output.get('smart_render', VSEBuilder.smart_render) else None
+    if cuts and render_stream_copy(builder, cuts):
+        pass
+    elif processes > 1:
+        render_parallel(builder, processes)
+    else:
+        render_sequence(
+            builder
+        )
 
-    render_sequence(
-        builder
-    )
+    return True
 
 logger = Logger()
 def poll_backend_for_render():
@@ -90,39 +283,30 @@ def poll_backend_for_render():
     if IS_RENDERING:
         return POLL_INTERVAL
 
-    try:
-        payload = json.dumps({
-            "machine": MACHINE_ID
-        }).encode("utf-8")
-
-        logger.info("Sending Probe for generation request")
-        req = urllib.request.Request(
-            url=f"{VSEBuilder.server_url}/probe_new_generation",
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-
-        with urllib.request.urlopen(req, timeout=5) as res:
-            response = json.loads(res.read().decode("utf-8"))
-
-        logger.info(f"Probe response: {response.get('message')}")
-
-        # 🔍 No job
-        if not response.get("ok"):
-            return POLL_INTERVAL
+    logger.info("Sending Probe for generation request")
+    generation = POLLER.poll_once()
 
-        # 🎯 Job found
-        generation = response.get("data")
-        if not generation:
-            return POLL_INTERVAL
+    # 🔍 No job
+    if not generation:
+        return POLLER.next_delay()
 
+    try:
         # Stop polling → start render
         logger.info("Found generation")
-        start_render_job(generation)
+        if not start_render_job(generation):
+            POLLER.job_finished()
+            return POLLER.next_delay()
 
         return None  # stop timer until render completes
 
     except Exception as e:
-        logger.error("Polling error:", e)
-        return POLL_INTERVAL
+        logger.error("Render job error: %s", e)
+
+        # Render paths that already resumed polling have cleared the flag
+        if not IS_RENDERING:
+            return None
+
+        # Nothing has reported this generation yet
+        report_failed(generation.get('_id'))
+        IS_RENDERING = False
+        return POLLER.next_delay()
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+from pathlib import Path
+
+try:
+    import bpy
+except ImportError:
+    # The worker supervisor only needs the preset names
+    bpy = None
+
+# One JSON line per finished render, for comparing presets
+RENDER_LOG = Path.home() / "VSE_Instructor_Renders" / "render_log.jsonl"
+
+# Timelines without scene strips never touch the 3D engine, so the cheapest
+# one only saves start-up; the sequencer cache is what matters. A final
+# render reads each output frame once, so only decoded source frames
+# (raw cache) are worth keeping.
+PRESETS = {
+    "sequencer": {
+        "engine": "BLENDER_WORKBENCH",
+        "use_compositing": False,
+        "cache_raw": True,
+        "cache_preprocessed": False,
+        "cache_composite": False,
+        "cache_final": False,
+        "prefetch": False,
+        "memory_cache_mb": 4096,
+    },
+    "sequencer_lowmem": {
+        "engine": "BLENDER_WORKBENCH",
+        "use_compositing": False,
+        "cache_raw": False,
+        "cache_preprocessed": False,
+        "cache_composite": False,
+        "cache_final": False,
+        "prefetch": False,
+        "memory_cache_mb": 1024,
+    },
+    # What every render used before profiles existed
+    "eevee": {
+        "engine": "BLENDER_EEVEE_NEXT",
+        "use_compositing": True,
+        "cache_raw": True,
+        "cache_preprocessed": False,
+        "cache_composite": False,
+        "cache_final": True,
+        "prefetch": False,
+        "memory_cache_mb": None,
+    },
+}
+
+DEFAULT_PRESET = "sequencer"
+# Used instead of a Workbench preset's engine when scene strips need real 3D rendering
+SCENE_STRIP_ENGINE = "BLENDER_EEVEE_NEXT"
+
+
+def allotted_threads():
+    """Cores this worker may use: $VSE_INSTRUCTOR_THREADS, else every core."""
+    return int(os.environ.get("VSE_INSTRUCTOR_THREADS", 0)) or os.cpu_count() or 1
+
+
+def resolve_profile(spec):
+    """
+    spec: preset name, or {"preset": name, ...overrides}. Returns
+    (name, settings). Unknown presets fall back to DEFAULT_PRESET.
+    """
+    overrides = {}
+    if isinstance(spec, dict):
+        overrides = {k: v for k, v in spec.items() if k != "preset"}
+        spec = spec.get("preset")
+
+    name = spec if spec in PRESETS else DEFAULT_PRESET
+    settings = dict(PRESETS[name])
+    settings.update(overrides)
+    return name, settings
+
+
+def apply_profile(scene, spec, threads=None):
+    """Configure scene for rendering with a profile. Returns the settings actually applied."""
+    name, settings = resolve_profile(spec)
+    threads = int(settings.get("threads") or threads or allotted_threads())
+
+    engine = settings["engine"]
+    if engine == "BLENDER_WORKBENCH" and any(s.type == 'SCENE' for s in scene.sequence_editor.sequences_all):
+        engine = SCENE_STRIP_ENGINE
+
+    render = scene.render
+    render.engine = engine
+    render.use_sequencer = True
+    render.use_compositing = bool(settings["use_compositing"])
+    render.threads_mode = 'FIXED'
+    render.threads = threads
+
+    editor = scene.sequence_editor
+    editor.use_cache_raw = bool(settings["cache_raw"])
+    editor.use_cache_preprocessed = bool(settings["cache_preprocessed"])
+    editor.use_cache_composite = bool(settings["cache_composite"])
+    editor.use_cache_final = bool(settings["cache_final"])
+    editor.use_prefetch = bool(settings["prefetch"])
+
+    # A preference, so it applies to the whole process. Only background
+    # workers own their process; the add-on leaves the user's setting alone
+    if settings.get("memory_cache_mb") and bpy.app.background:
+        bpy.context.preferences.system.memory_cache_limit = int(settings["memory_cache_mb"])
+
+    return {
+        "profile": name,
+        "engine": engine,
+        "threads": threads,
+        "use_compositing": render.use_compositing,
+        "cache": {
+            "raw": editor.use_cache_raw,
+            "preprocessed": editor.use_cache_preprocessed,
+            "composite": editor.use_cache_composite,
+            "final": editor.use_cache_final,
+        },
+        "prefetch": editor.use_prefetch,
+        "memory_cache_mb": bpy.context.preferences.system.memory_cache_limit,
+        "resolution": [render.resolution_x, render.resolution_y, render.resolution_percentage],
+        "fps": render.fps / render.fps_base,
+    }
+
+
+def record_render(generation_id, mode, settings, frames, seconds, log_path=RENDER_LOG):
+    """Append one render's settings and throughput to the render log. Returns the record."""
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "generation": generation_id,
+        "mode": mode,
+        "frames": frames,
+        "seconds": round(seconds, 3),
+        "frames_per_second": round(frames / seconds, 3) if seconds > 0 else None,
+        "settings": settings,
+    }
+
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    return record
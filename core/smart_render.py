@@ -0,0 +1,230 @@
+import json
+import shutil
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+
+from .parallel_render import ProcessRunner, concat_command, write_concat_list, log_tail
+
+# Blender ffmpeg codec names → ffprobe codec_name
+VIDEO_CODECS = {
+    "H264": "h264",
+    "HEVC": "hevc",
+    "H265": "hevc",
+    "MPEG4": "mpeg4",
+    "AV1": "av1",
+    "VP9": "vp9",
+}
+AUDIO_CODECS = {
+    "AAC": "aac",
+    "MP3": "mp3",
+    "OPUS": "opus",
+    "FLAC": "flac",
+    "PCM": "pcm_s16le",
+}
+
+
+class SmartRenderError(Exception):
+    pass
+
+
+class SourceCut:
+    """One stream-copied range: seconds into a source file."""
+
+    __slots__ = ("path", "start", "duration")
+
+    def __init__(self, path, start, duration):
+        self.path = path
+        self.start = start
+        self.duration = duration
+
+    def __repr__(self):
+        return f"SourceCut({self.path!r}, start={self.start:.3f}, duration={self.duration:.3f})"
+
+
+# -----------------------------------------------------------------------------
+# PROBING
+# -----------------------------------------------------------------------------
+def probe_media(path, runner):
+    """ffprobe stream and format info for path, or None if it cannot be read."""
+    try:
+        code, out = runner.capture([
+            runner.ffprobe, "-v", "error", "-print_format", "json",
+            "-show_streams", "-show_format", str(path),
+        ])
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    if code != 0:
+        return None
+
+    try:
+        return json.loads(out)
+    except ValueError:
+        return None
+
+
+def keyframe_times(path, runner):
+    """Presentation times (seconds) of the first video stream's keyframes, from packet flags."""
+    try:
+        code, out = runner.capture([
+            runner.ffprobe, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path),
+        ], timeout=300)
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+    if code != 0:
+        return []
+
+    times = []
+    for line in out.decode("utf-8", "replace").splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags:
+            try:
+                times.append(float(pts))
+            except ValueError:
+                pass
+    return times
+
+
+def _streams(info, kind):
+    return [s for s in info.get("streams", []) if s.get("codec_type") == kind]
+
+
+def check_source(info, output_spec, fps):
+    """Reason the source cannot be copied into output_spec's container, or None."""
+    if info is None:
+        return "source could not be probed"
+
+    video_spec = output_spec.get("video", {})
+    audio_spec = output_spec.get("audio", {})
+    container = output_spec.get("container", "mp4").lower()
+
+    if container not in info.get("format", {}).get("format_name", "").split(","):
+        return f"source container is not {container}"
+
+    videos = _streams(info, "video")
+    if len(videos) != 1:
+        return f"source has {len(videos)} video streams"
+    video = videos[0]
+
+    codec = VIDEO_CODECS.get(video_spec.get("codec", "H264").upper())
+    if video.get("codec_name") != codec:
+        return f"source video codec {video.get('codec_name')} is not {codec}"
+
+    size = (video.get("width"), video.get("height"))
+    wanted = (video_spec.get("width", 1920), video_spec.get("height", 1080))
+    if size != wanted:
+        return f"source size {size[0]}x{size[1]} is not {wanted[0]}x{wanted[1]}"
+
+    try:
+        source_fps = Fraction(video.get("r_frame_rate", "0/1"))
+    except (ValueError, ZeroDivisionError):
+        return "source frame rate unknown"
+    if abs(float(source_fps) - fps) > 0.01:
+        return f"source frame rate {float(source_fps):.3f} is not {fps:.3f}"
+
+    pixel_format = video_spec.get("pixel_format")
+    if pixel_format and video.get("pix_fmt") != pixel_format:
+        return f"source pixel format {video.get('pix_fmt')} is not {pixel_format}"
+
+    audios = _streams(info, "audio")
+    if len(audios) > 1:
+        return f"source has {len(audios)} audio streams"
+    if audios:
+        audio = audios[0]
+        codec = AUDIO_CODECS.get(audio_spec.get("codec", "AAC").upper())
+        if audio.get("codec_name") != codec:
+            return f"source audio codec {audio.get('codec_name')} is not {codec}"
+        if audio.get("channels") != audio_spec.get("channels", 2):
+            return f"source has {audio.get('channels')} audio channels"
+
+    return None
+
+
+# -----------------------------------------------------------------------------
+# PLANNING
+# -----------------------------------------------------------------------------
+def plan_stream_copy(segments, fps, output_spec, runner=None):
+    """
+    segments: [(source_path, source_offset_frames, length_frames), ...] in
+    timeline order, already checked to be contiguous and composite-free.
+    Returns ([SourceCut, ...], None) when every segment can be stream-copied,
+    else (None, reason).
+    """
+    runner = runner or ProcessRunner()
+    infos = {}
+    keyframes = {}
+    audio = set()
+    cuts = []
+
+    for path, offset, length in segments:
+        if path not in infos:
+            infos[path] = probe_media(path, runner)
+            reason = check_source(infos[path], output_spec, fps)
+            if reason:
+                return None, f"{Path(path).name}: {reason}"
+            audio.add(bool(_streams(infos[path], "audio")))
+
+        start = offset / fps
+        # A stream copy can only begin on a keyframe
+        if offset:
+            if path not in keyframes:
+                keyframes[path] = keyframe_times(path, runner)
+            if not any(abs(t - start) < 0.5 / fps for t in keyframes[path]):
+                return None, f"{Path(path).name}: cut at frame {offset} is not on a keyframe"
+
+        cuts.append(SourceCut(path, start, length / fps))
+
+    # Mixing sources with and without audio would need a silent track
+    if len(audio) > 1:
+        return None, "some sources have audio and some do not"
+
+    return cuts, None
+
+
+# -----------------------------------------------------------------------------
+# COPY
+# -----------------------------------------------------------------------------
+def cut_command(runner, cut, output_path):
+    return [
+        runner.ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{cut.start:.6f}", "-i", str(cut.path),
+        "-t", f"{cut.duration:.6f}",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c", "copy", "-avoid_negative_ts", "make_zero",
+        str(output_path),
+    ]
+
+
+def render_stream_copy(cuts, output_path, runner=None, work_dir=None):
+    """Write cuts, in order, to output_path without re-encoding. Raises SmartRenderError."""
+    runner = runner or ProcessRunner()
+    output_path = Path(output_path)
+    work_dir = Path(work_dir or output_path.with_name(output_path.stem + "_copy"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        parts = []
+        for index, cut in enumerate(cuts):
+            part = work_dir / f"cut_{index:05d}{output_path.suffix}"
+            log_path = work_dir / f"cut_{index:05d}.log"
+            if runner.run(cut_command(runner, cut, part), log_path) != 0:
+                raise SmartRenderError(f"Cutting {cut} failed:\n{log_tail(log_path)}")
+            parts.append(part)
+
+        if len(parts) == 1:
+            shutil.move(str(parts[0]), str(output_path))
+        else:
+            list_path = work_dir / "concat.txt"
+            log_path = work_dir / "concat.log"
+            write_concat_list(parts, list_path)
+            if runner.run(concat_command(runner, list_path, output_path), log_path) != 0:
+                raise SmartRenderError(f"Concat failed:\n{log_tail(log_path)}")
+    except OSError as e:
+        raise SmartRenderError(f"Stream copy failed: {e}") from e
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return output_path
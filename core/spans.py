@@ -0,0 +1,186 @@
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+class Span:
+    """
+    One timed phase. Names are paths ("build/media/download") so sub-phases
+    recorded from worker threads still total up under their phase.
+    """
+
+    __slots__ = ("name", "started", "seconds", "bytes", "frames", "error")
+
+    def __init__(self, name, bytes=0, frames=0):
+        self.name = name
+        self.started = time.monotonic()
+        self.seconds = None
+        self.bytes = bytes
+        self.frames = frames
+        self.error = False
+
+    def add(self, bytes=0, frames=0):
+        self.bytes += bytes
+        self.frames += frames
+
+    def to_dict(self, origin):
+        return {
+            "name": self.name,
+            "start": round(self.started - origin, 4),
+            "seconds": round(self.seconds, 4) if self.seconds is not None else None,
+            "bytes": self.bytes,
+            "frames": self.frames,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"Span({self.name!r}, {self.seconds}s, {self.bytes} bytes, {self.frames} frames)"
+
+
+class SpanRecorder:
+    """
+    Collects the spans of one generation from any thread. Totals per span
+    name are kept exactly; individual spans only up to max_spans.
+
+    Top-level phases (names without "/") are summarised live in the server
+    panel's traffic_info, refreshed when a span starts or ends on the main thread.
+    """
+
+    max_spans = 2000
+    ui_interval = 0.25
+
+    def __init__(self, generation_id=None):
+        self.generation_id = generation_id
+        self.started = time.monotonic()
+        self.spans = []
+        self.dropped = 0
+
+        self._totals = {}
+        self._open = {}
+        self._lock = threading.Lock()
+        self._published = 0.0
+
+    # -------------------------------------------------------------------------
+    # RECORDING
+    # -------------------------------------------------------------------------
+    @contextmanager
+    def span(self, name, bytes=0, frames=0):
+        """Time the block as span `name`; add bytes/frames to the yielded Span as they become known."""
+        span = self.start(name, bytes, frames)
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            self.finish(span)
+
+    def start(self, name, bytes=0, frames=0):
+        """Open a span that finish() closes, for phases that end in a callback."""
+        span = Span(name, bytes, frames)
+        with self._lock:
+            self._open[id(span)] = span
+        self._publish(force="/" not in name)
+        return span
+
+    def finish(self, span):
+        """Close a span opened with start(). Closing it again does nothing."""
+        if span is None or span.seconds is not None:
+            return
+        span.seconds = time.monotonic() - span.started
+        self._close(span)
+
+    def record(self, name, seconds, bytes=0, frames=0):
+        """Add a span that was timed elsewhere (e.g. the probe that found the job)."""
+        span = Span(name, bytes, frames)
+        span.started -= seconds
+        span.seconds = seconds
+        self._close(span)
+
+    def _close(self, span):
+        with self._lock:
+            self._open.pop(id(span), None)
+
+            total = self._totals.get(span.name)
+            if total is None:
+                total = self._totals[span.name] = {"count": 0, "seconds": 0.0, "bytes": 0, "frames": 0, "errors": 0}
+            total["count"] += 1
+            total["seconds"] += span.seconds
+            total["bytes"] += span.bytes
+            total["frames"] += span.frames
+            total["errors"] += span.error
+
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+        self._publish(force="/" not in span.name)
+
+    # -------------------------------------------------------------------------
+    # REPORTING
+    # -------------------------------------------------------------------------
+    def totals(self):
+        with self._lock:
+            return {
+                name: dict(total, seconds=round(total["seconds"], 4))
+                for name, total in sorted(self._totals.items())
+            }
+
+    def report(self):
+        """Everything recorded so far, as sent with generation_complete."""
+        with self._lock:
+            spans = [span.to_dict(self.started) for span in self.spans]
+            dropped = self.dropped
+
+        return {
+            "generation": self.generation_id,
+            "total_seconds": round(time.monotonic() - self.started, 4),
+            "phases": self.totals(),
+            "spans": spans,
+            "dropped_spans": dropped,
+        }
+
+    def summary(self):
+        """One line per generation: finished top-level phases, then the one in progress."""
+        now = time.monotonic()
+        with self._lock:
+            phases = [(name, dict(total)) for name, total in self._totals.items() if "/" not in name]
+            running = [span for span in self._open.values() if "/" not in span.name]
+
+        parts = []
+        for name, total in phases:
+            part = f"{name} {total['seconds']:.1f}s"
+            if total["bytes"]:
+                part += f" {total['bytes'] / 1024 ** 2:.1f}MB"
+            if total["frames"]:
+                part += f" {total['frames']}fr"
+            parts.append(part)
+
+        for span in running:
+            parts.append(f"{span.name} {now - span.started:.1f}s…")
+
+        return ", ".join(parts) or "Idle"
+
+    # -------------------------------------------------------------------------
+    # UI
+    # -------------------------------------------------------------------------
+    def _publish(self, force=False):
+        # Panel properties may only be written from the main thread
+        if bpy is None or bpy.app.background or threading.current_thread() is not threading.main_thread():
+            return
+
+        now = time.monotonic()
+        if not force and now - self._published < self.ui_interval:
+            return
+        self._published = now
+
+        scene = bpy.context.scene if bpy.context else None
+        props = getattr(scene, "vse_instructor_server_props", None) if scene else None
+        if props:
+            props.traffic_info = self.summary()
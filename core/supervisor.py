@@ -0,0 +1,410 @@
+import argparse
+import os
+import pickle
+import secrets
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, wait
+from pathlib import Path
+
+from . import metrics
+from .logger import Logger
+from .http_client import shared_client
+from .parallel_render import ProcessRunner
+from .render_profiles import PRESETS
+from .job_poller import JobPoller
+
+# Longest wait for a worker report while every slot is busy
+POLL_INTERVAL = 60
+# A worker that dies sooner than this after starting counts as crash-looping
+STABLE_SECONDS = 30
+MAX_RESTART_DELAY = 60
+
+
+class WorkerSlot:
+    __slots__ = (
+        "worker_id", "process", "conn", "generation_id",
+        "started_at", "restart_delay", "restart_at",
+    )
+
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.process = None
+        self.conn = None
+        self.generation_id = None
+        self.started_at = 0.0
+        self.restart_delay = 1.0
+        self.restart_at = 0.0
+
+    @property
+    def idle(self):
+        return self.conn is not None and self.generation_id is None
+
+
+class Supervisor:
+    """
+    Runs a pool of isolated `blender -b` workers on one host (see
+    HeadlessWorker.serve). The supervisor is the only process that probes:
+    it reports the host ID and free slots, hands each claimed generation to
+    an idle worker over a local authenticated connection, and restarts
+    workers that crash. Needs no bpy, so it runs under plain Python.
+    """
+
+    server_url = "https://blender-backend.vercel.app"
+    # Render preset passed to every worker (None keeps the workers' default)
+    render_profile = None
+    # Directory for per-process Prometheus textfiles (supervisor.prom, worker_N.prom)
+    metrics_dir = None
+    # Worker logs are appended to across restarts and rotated to worker_N.log.1 past this size
+    worker_log_bytes = 10 * 1024 * 1024
+
+    def __init__(self, host_id, workers, runner=None, worker_script=None, log_dir=None):
+        self.host_id = host_id
+        self.runner = runner or ProcessRunner()
+        self.worker_script = Path(worker_script or Path(__file__).resolve().parent.parent / "worker.py")
+        self.log_dir = Path(log_dir or Path.home() / "VSE_Instructor_Workers")
+        self.log = Logger()
+        self.poller = JobPoller(self.server_url, self.probe_payload, log=self.log)
+
+        self.slots = [WorkerSlot(str(index)) for index in range(max(1, int(workers)))]
+        self.authkey = secrets.token_bytes(32)
+        self.listener = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -------------------------------------------------------------------------
+    # WORKER PROCESSES
+    # -------------------------------------------------------------------------
+    def _worker_command(self, slot):
+        host, port = self.listener.address
+        # Share the cores between workers instead of each one claiming all of them
+        threads = max(1, (os.cpu_count() or 1) // len(self.slots))
+        args = [
+            self.runner.blender, "-b", "--factory-startup", "-t", str(threads),
+            "--python", str(self.worker_script), "--",
+            "--supervisor", f"{host}:{port}",
+            "--worker-id", slot.worker_id,
+            "--machine-id", f"{self.host_id}/{slot.worker_id}",
+            "--server-url", self.server_url,
+            "--threads", str(threads),
+        ]
+        if self.render_profile:
+            args += ["--render-profile", self.render_profile]
+        # Workers never take the supervisor's port or file from the environment
+        metrics_file = Path(self.metrics_dir) / f"worker_{slot.worker_id}.prom" if self.metrics_dir else ""
+        args += ["--metrics-port", "0", "--metrics-file", str(metrics_file)]
+        return args
+
+    def _worker_log(self, slot):
+        """Log path for slot's worker, keeping the output of the run before a restart."""
+        log_path = self.log_dir / f"worker_{slot.worker_id}.log"
+        try:
+            if log_path.stat().st_size > self.worker_log_bytes:
+                os.replace(log_path, log_path.with_name(log_path.name + ".1"))
+        except OSError:
+            pass
+        return log_path
+
+    def _spawn(self, slot):
+        # Appending keeps the output that explains why the previous worker died
+        slot.process = self.runner.start(self._worker_command(slot), self._worker_log(slot), append=True)
+        slot.conn = None
+        slot.generation_id = None
+        slot.started_at = time.monotonic()
+        self.log.info(f"Started worker {slot.worker_id} (pid {slot.process.pid})")
+
+    def _accept_loop(self):
+        """Hand each connecting worker's connection to its slot once it says ready."""
+        while not self._stop.is_set():
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError as e:
+                self.log.warning(f"Rejected a worker connection: {e}")
+                continue
+            except OSError:
+                continue
+
+            try:
+                message, worker_id = conn.recv()
+            except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError) as e:
+                self.log.warning(f"Dropped a worker connection with a malformed hello: {e}")
+                conn.close()
+                continue
+
+            with self._lock:
+                slot = next((s for s in self.slots if s.worker_id == worker_id), None)
+                if message != "ready" or slot is None:
+                    conn.close()
+                    continue
+                slot.conn = conn
+
+            self.log.info(f"Worker {worker_id} ready")
+
+    def _report_failed(self, generation_id):
+        try:
+            shared_client.post_json(f"{self.server_url}/update_generation_status", {
+                "_id": generation_id,
+                "status": "FAILED",
+                "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            }, timeout=30)
+        except Exception as e:
+            self.log.error(f"Could not mark generation {generation_id} as failed: {e}")
+
+    def _reap(self, slot):
+        """Forget a dead worker, fail its generation and schedule a restart."""
+        code = slot.process.poll()
+        self.log.error(f"Worker {slot.worker_id} exited with code {code}")
+
+        if slot.conn is not None:
+            slot.conn.close()
+            slot.conn = None
+
+        if slot.generation_id:
+            self._report_failed(slot.generation_id)
+            slot.generation_id = None
+
+        # Back off if the worker keeps dying straight after starting
+        if time.monotonic() - slot.started_at < STABLE_SECONDS:
+            slot.restart_delay = min(slot.restart_delay * 2, MAX_RESTART_DELAY)
+        else:
+            slot.restart_delay = 1.0
+
+        slot.process = None
+        slot.restart_at = time.monotonic() + slot.restart_delay
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for slot in self.slots:
+            if slot.process is None:
+                if now >= slot.restart_at:
+                    self._spawn(slot)
+            elif slot.process.poll() is not None:
+                with self._lock:
+                    self._reap(slot)
+
+    # -------------------------------------------------------------------------
+    # JOBS
+    # -------------------------------------------------------------------------
+    def free_slots(self):
+        with self._lock:
+            return [slot for slot in self.slots if slot.idle]
+
+    def probe_payload(self):
+        return {
+            "machine": self.host_id,
+            "host_id": self.host_id,
+            "free_slots": len(self.free_slots()),
+            "total_slots": len(self.slots),
+        }
+
+    def dispatch(self, slot, generation):
+        """
+        Hand a claimed generation to an idle worker. If its connection is
+        broken the generation is marked FAILED (it is already claimed) and
+        the worker is stopped, so _check_workers restarts it.
+        """
+        generation_id = generation.get('_id') or "<unknown>"
+        try:
+            slot.conn.send(("job", generation))
+        except (OSError, ValueError) as e:
+            self.log.error(f"Could not hand generation {generation_id} to worker {slot.worker_id}: {e}")
+            self._report_failed(generation_id)
+            with self._lock:
+                slot.conn.close()
+                slot.conn = None
+            if slot.process is not None and slot.process.poll() is None:
+                slot.process.terminate()
+            return False
+
+        slot.generation_id = generation_id
+        self.log.info(f"Generation {generation_id} → worker {slot.worker_id}")
+        return True
+
+    def _collect(self, timeout):
+        """
+        Wait up to timeout for workers to report finished generations. Returns
+        early once a slot frees up, a worker connects or a stop is requested.
+        """
+        deadline = time.monotonic() + timeout
+        waiting = {slot.worker_id for slot in self.slots if slot.conn is None}
+
+        while not self._stop.is_set():
+            with self._lock:
+                conns = {slot.conn: slot for slot in self.slots if slot.conn is not None}
+                if any(slot.worker_id in waiting for slot in conns.values()):
+                    return
+
+            # Short slices keep signals and newly started workers responsive
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+
+            # A worker died or is due a restart
+            now = time.monotonic()
+            if any(
+                (slot.process is None and now >= slot.restart_at)
+                or (slot.process is not None and slot.process.poll() is not None)
+                for slot in self.slots
+            ):
+                return
+
+            if not conns:
+                self._stop.wait(min(remaining, 1.0))
+                continue
+
+            ready = wait(list(conns), min(remaining, 1.0))
+            if not ready:
+                continue
+
+            for conn in ready:
+                slot = conns[conn]
+                try:
+                    message, generation_id = conn.recv()
+                except (EOFError, OSError):
+                    # _check_workers restarts it once the process has exited
+                    with self._lock:
+                        if slot.conn is conn:
+                            slot.conn = None
+                    continue
+
+                if message in ("done", "failed"):
+                    if message == "done":
+                        self.log.info(f"Worker {slot.worker_id} finished generation {generation_id}")
+                    else:
+                        # The worker has already marked it FAILED
+                        self.log.warning(f"Worker {slot.worker_id} failed generation {generation_id}")
+                    with self._lock:
+                        slot.generation_id = None
+                    self.poller.job_finished()
+
+            return
+
+    def run(self):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.listener = Listener(("127.0.0.1", 0), authkey=self.authkey)
+        os.environ["VSE_INSTRUCTOR_SUPERVISOR_KEY"] = self.authkey.hex()
+
+        threading.Thread(target=self._accept_loop, name="supervisor-accept", daemon=True).start()
+        self.log.info(f"Supervisor {self.host_id} starting {len(self.slots)} worker(s)")
+
+        try:
+            while not self._stop.is_set():
+                self._check_workers()
+
+                free = self.free_slots()
+                if not free:
+                    self._collect(POLL_INTERVAL)
+                    continue
+
+                generation = self.poller.poll_once()
+                if generation:
+                    self.dispatch(free[0], generation)
+                    # More free slots: probe again straight away
+                    self._collect(0 if len(free) > 1 else POLL_INTERVAL)
+                else:
+                    self._collect(self.poller.next_delay())
+        finally:
+            self.shutdown()
+
+    # -------------------------------------------------------------------------
+    # SHUTDOWN
+    # -------------------------------------------------------------------------
+    def install_signal_handlers(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        if self._stop.is_set():
+            raise KeyboardInterrupt
+
+        self.log.info(f"Received {signal.Signals(signum).name}, stopping workers after their current jobs")
+        self._stop.set()
+
+    def shutdown(self, grace=None):
+        """Ask every worker to stop after its current job, then wait for them."""
+        self._stop.set()
+
+        for slot in self.slots:
+            if slot.conn is not None:
+                try:
+                    slot.conn.send(("stop", None))
+                except OSError:
+                    pass
+
+        try:
+            for slot in self.slots:
+                if slot.process is not None:
+                    slot.process.wait(grace)
+        except KeyboardInterrupt:
+            for slot in self.slots:
+                if slot.process is not None and slot.process.poll() is None:
+                    slot.process.terminate()
+
+        self.listener.close()
+        self.log.info(self.poller.stats.report())
+        self.log.info("Supervisor stopped")
+
+
+# -----------------------------------------------------------------------------
+# ENTRY POINT
+# -----------------------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="supervisor.py", description="Run a pool of headless render workers")
+    parser.add_argument(
+        "--host-id",
+        default=os.environ.get("VSE_INSTRUCTOR_MACHINE_ID") or socket.gethostname(),
+        help="Host name sent with each probe (default: $VSE_INSTRUCTOR_MACHINE_ID or the hostname)"
+    )
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent Blender worker processes")
+    parser.add_argument("--blender", default="blender", help="Blender executable")
+    parser.add_argument(
+        "--max-interval", type=float, default=JobPoller.max_interval,
+        help="Longest wait between idle probes when the backend has no long-poll"
+    )
+    parser.add_argument("--server-url", default=Supervisor.server_url, help="Generation backend URL")
+    parser.add_argument("--log-dir", help="Directory for per-worker logs")
+    parser.add_argument(
+        "--render-profile", choices=sorted(PRESETS),
+        help="Render preset for every worker (default: the workers' own)"
+    )
+    parser.add_argument("--log-level", default="INFO", help="DEBUG, INFO, WARNING or ERROR")
+    parser.add_argument(
+        "--metrics-port", type=int, default=metrics.METRICS_PORT,
+        help="Serve the supervisor's Prometheus metrics on 127.0.0.1:PORT (default: $VSE_INSTRUCTOR_METRICS_PORT, off)"
+    )
+    parser.add_argument(
+        "--metrics-dir",
+        help="Rewrite supervisor.prom and worker_N.prom here periodically, e.g. for node_exporter's textfile collector"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    Logger.set_level(args.log_level)
+    Supervisor.server_url = args.server_url
+    Supervisor.render_profile = args.render_profile
+    Supervisor.metrics_dir = args.metrics_dir
+    JobPoller.max_interval = args.max_interval
+
+    supervisor = Supervisor(
+        args.host_id,
+        args.workers,
+        runner=ProcessRunner(blender=args.blender),
+        log_dir=args.log_dir
+    )
+    supervisor.install_signal_handlers()
+    exporters = metrics.start_exporters(
+        args.metrics_port,
+        Path(args.metrics_dir) / "supervisor.prom" if args.metrics_dir else None,
+        log=supervisor.log
+    )
+    try:
+        supervisor.run()
+    finally:
+        metrics.stop_exporters(exporters)
+    return supervisor
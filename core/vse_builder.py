@@ -1,90 +1,128 @@
 import bpy
-from ..core.logger import Logger
-from pathlib import Path
-import urllib.request
-import json
+from .logger import Logger
 import base64
 from pathlib import Path
 from .vse_renderer import Vse_renderer
+from .media_resolver import (
+    MediaResolver, MEDIA_CACHE, MEDIA_TYPES, OCTET_STREAM,
+    HEADER_MEDIA_ID, HEADER_CHUNK_INDEX, HEADER_CHUNK_SIZE, HEADER_TOTAL_CHUNKS,
+)
+from .instruction_parser import parse_instruction
+from .http_client import shared_client
+from .chunk_uploader import ChunkUploader, ChunkUploadError, UploadProgress
+from .spans import SpanRecorder
+from . import metrics
 from datetime import datetime, timezone
-import os
-import math
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 
 
-CACHE_ROOT = Path.home() / "VSEInstructorCache"
-CACHE_ROOT.mkdir(parents=True, exist_ok=True)
+# Custom properties that tie strips back to the clip they were built from
+STRIP_INSTANCE_KEY = "vse_instance_id"
+STRIP_SIGNATURE_KEY = "vse_signature"
+STRIP_SUFFIXES = ("_VID", "_AUDONLY", "_AUD", "_IMG")
 
 class VSEBuilder(Vse_renderer):
     server_url = "https://blender-backend.vercel.app"
-
-    def __init__(self, instruction):
-        """instruction: normalized dict from parse_instruction"""
+    editor_url = "https://editor-backend-xi.vercel.app"
+
+    # Download tuning (workers, retries, cache verification) lives on MediaResolver
+    # Parallel chunk uploads for rendered media, and retries per chunk
+    upload_workers = 4
+    upload_retries = 3
+    # Whole-upload attempts once a chunk has used up its retries; each one
+    # resumes from the chunks already acknowledged
+    upload_attempts = 3
+    upload_attempt_delay = 5.0
+    # Background Blender processes for a split-frame-range render (1 renders in-process)
+    render_processes = 1
+    # Stream-copy timelines that need no compositing instead of re-encoding them
+    smart_render = True
+    # Render preset from core.render_profiles (output.render_profile overrides it)
+    render_profile = "sequencer"
+    # Threads for in-process renders; 0 uses render_profiles.allotted_threads()
+    render_threads = 0
+
+    def __init__(self, instruction, scene=None):
+        """
+        instruction: raw instruction dict; build() validates it with parse_instruction
+        scene: scene to build and render into (defaults to the context scene)
+        """
         self.log = Logger()
 
         self.log.info("Initializing VSEBuilder...")
-        self.log.info(f"Instruction received: {instruction}")
-
-        self.editor_url = 'https://editor-backend-xi.vercel.app'
+        self.log.debug("Instruction received: %s", instruction)
 
         self.instruction = instruction
         self.generation = None
-        self.sequencer = bpy.context.scene.sequence_editor
+        self.plan = None
+        self.resolving_media = False
+        self.media_paths = {}
+        # Settings of the last render (see Vse_renderer.apply_render_profile)
+        self.render_settings = None
+        # Timing of every phase of this generation, sent with generation_complete
+        self.spans = SpanRecorder()
+        self.render_span = None
+        self.resolver = MediaResolver(self.editor_url, self.log, spans=self.spans)
+        self.scene = scene or bpy.context.scene
+        self.sequencer = self.scene.sequence_editor
 
         if self.sequencer is None:
             self.log.info("No sequence editor found. Creating one...")
-            self.sequencer = bpy.context.scene.sequence_editor_create()
+            self.sequencer = self.scene.sequence_editor_create()
         else:
             self.log.info("Sequence editor found and ready.")
 
     def set_generation(self, generation):
         self.log.info(f"setting new generation {generation.get('_id')}")
         self.generation = generation
+        self.spans.generation_id = generation.get('_id')
     
-    def _fetch_chunk_from_server(self, media_id, index):
-        payload = json.dumps({
-            "media_id": media_id,
-            "index": index
-        }).encode("utf-8")
-
-        req = urllib.request.Request(
-            url=f"{self.editor_url}/read_upload",
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-
-        with urllib.request.urlopen(req) as res:
-            return json.loads(res.read().decode("utf-8"))
-
-    def _infer_extension(self, clip_ref):
-        mime = clip_ref.get("mime")
-        title = clip_ref.get("title")
-
-        MIME_MAP = {
-            "image/jpeg": ".jpg",
-            "image/png": ".png",
-            "video/mp4": ".mp4",
-            "audio/mpeg": ".mp3",
-            "audio/wav": ".wav",
-        }
-
-        if mime in MIME_MAP:
-            return MIME_MAP[mime]
-
-        if title and "." in title:
-            return Path(title).suffix
-
-        return ".bin"  # absolute fallback
+    # -------------------------------------------------------------------------
+    # CHUNK TRANSPORT
+    # -------------------------------------------------------------------------
+    def _upload_chunk(self, media_id, index, chunk_bytes, total_chunks):
+        # ChunkUploader retries whole chunks, so the client does not
+        url = f"{self.editor_url}/upload_media"
+
+        with self.spans.span("upload/chunk", bytes=len(chunk_bytes)):
+            if self.resolver.binary_transport_supported():
+                response = shared_client.request(
+                    "POST",
+                    url,
+                    body=chunk_bytes,
+                    headers={
+                        "Content-Type": OCTET_STREAM,
+                        HEADER_MEDIA_ID: media_id,
+                        HEADER_CHUNK_INDEX: str(index),
+                        HEADER_CHUNK_SIZE: str(len(chunk_bytes)),
+                        HEADER_TOTAL_CHUNKS: str(total_chunks),
+                    },
+                    timeout=30,
+                    retries=0
+                )
+                return response.json()
 
+            payload = {
+                "media_id": media_id,
+                "chunk": base64.b64encode(chunk_bytes).decode("utf-8"),
+                "index": index,
+                "size": len(chunk_bytes),
+                "total_chunks": total_chunks,
+            }
+            return shared_client.post_json(url, payload, timeout=30, retries=0)
 
     def _resolve_media(self, clip_ref):
-        self.log.info(f"Resolving media: {clip_ref}")
+        media_id = clip_ref.get("_id")
+        if media_id in self.media_paths:
+            return self.media_paths[media_id]
+
+        self.log.debug("Resolving media: %s", clip_ref)
 
         if(not self.resolving_media): self.update_server_status('RESOLVING_MEDIA')
         media_type = clip_ref.get("type")
-        media_id = clip_ref.get("_id")
 
         if media_type == "text":
             return clip_ref.get("text", "Text strip")
@@ -92,130 +130,42 @@ class VSEBuilder(Vse_renderer):
         if (media_type == 'scene'):
             return None
 
-        if media_type not in {"video", "audio", "image"}:
+        if media_type not in MEDIA_TYPES:
             self.log.error(f"Unsupported media type: {media_type}")
             return None
 
-        media_dir = CACHE_ROOT / media_id.replace(":", "_")
-        chunks_dir = media_dir / "chunks"
-        ext = self._infer_extension(clip_ref)
-        final_path = media_dir / f"final{ext}"
-
-        media_dir.mkdir(parents=True, exist_ok=True)
-        chunks_dir.mkdir(parents=True, exist_ok=True)
-
-        # ----------------------------
-        # CACHE HIT
-        # ----------------------------
-        if final_path.exists():
-            self.log.info(f"Using cached media: {final_path}")
-            return str(final_path)
-
-        self.log.info("Media not cached. Fetching from server...")
-
-        # ----------------------------
-        # DOWNLOAD CHUNKS
-        # ----------------------------
-        index = 0
-        total_chunks = None
-
-        while True:
-            part_path = chunks_dir / f"{index:05d}.part"
-
-            if part_path.exists():
-                self.log.info(f"Chunk {index} already cached")
-                index += 1
-                continue
-
-            response = self._fetch_chunk_from_server(media_id, index)
-
-            if not response.get("ok"):
-                self.log.error(f"Failed to fetch chunk {index}")
-                return None
-
-            data = response["data"]
-            base64_chunk = data["chunk"]
-            total_chunks = data["total_chunks"]
-
-            binary = base64.b64decode(base64_chunk)
-            part_path.write_bytes(binary)
-
-            self.log.info(f"Downloaded chunk {index+1}/{total_chunks}")
+        return self.resolver.resolve(clip_ref)
 
-            index += 1
-            if index >= total_chunks:
-                break
+    def _apply_cut_and_duration(self, strip, clip):
+        self.log.debug("Applying cut/duration to strip %s", strip.name)
+        self.log.debug("Initial strip frame_duration: %s", strip.frame_duration)
 
-        # ----------------------------
-        # ASSEMBLE FINAL BINARY (ONCE)
-        # ----------------------------
-        self.log.info("Assembling final binary...")
+        if clip.has_cut:
+            strip.frame_offset_start = clip.cut_start_frame
+            strip.frame_offset_end   = max(0, strip.frame_duration - clip.cut_end_frame)
 
-        with open(final_path, "wb") as outfile:
-            for part in sorted(chunks_dir.iterdir()):
-                outfile.write(part.read_bytes())
+            self.log.debug("Applied strip.frame_offset_start = %s", strip.frame_offset_start)
+            self.log.debug("Applied strip.frame_offset_end   = %s", strip.frame_offset_end)
 
-        self.log.info(f"Media assembled: {final_path}")
+        if clip.duration_frames:
+            strip.frame_final_duration = clip.duration_frames
 
-        return str(final_path)
-
- 
-    def _apply_cut_and_duration(self, strip, cut, duration_ms, fps):
-        self.log.info(f"Applying cut/duration to strip {strip.name}")
-        self.log.info(f"Initial strip frame_duration: {strip.frame_duration}")
-
-        if cut:
-            self.log.info(f"Cut data: {cut}")
-
-            cut_start = self._ms_to_frames(cut.get("start", 0), fps)
-            cut_end   = self._ms_to_frames(cut.get("end", 0), fps)
-
-            self.log.info(f"Computed cut_start(frames): {cut_start}")
-            self.log.info(f"Computed cut_end(frames): {cut_end}")
-
-            strip.frame_offset_start = cut_start
-            strip.frame_offset_end   = max(0, strip.frame_duration - cut_end)
-
-            self.log.info(f"Applied strip.frame_offset_start = {strip.frame_offset_start}")
-            self.log.info(f"Applied strip.frame_offset_end   = {strip.frame_offset_end}")
-
-        if duration_ms:
-            duration_frames = self._ms_to_frames(duration_ms, fps)
-            strip.frame_final_duration = duration_frames
-
-            self.log.info(f"Duration override: {duration_ms}ms = {duration_frames} frames")
-            self.log.info(f"Applied strip.frame_final_duration = {strip.frame_final_duration}")
-            
-    #-------------------------------------------------------------------
-    def _ms_to_frames(self, ms, fps=24):
-        frames = int((ms / 1000.0) * fps)
-        self.log.info(f"Converting ms → frames: {ms}ms @ {fps}fps = {frames}")
-        return frames
+            self.log.debug("Applied strip.frame_final_duration = %s", strip.frame_final_duration)
 
     #-----------------------------------------------------------------------
     # VIDEO + AUDIO PAIR
     # -------------------------------------------------------------------------
-    def _add_video_clip(self, clip, sequence_payload):
+    def _add_video_clip(self, clip):
         try:
-            self.log.info(f"Adding VIDEO clip: {clip}")
+            self.log.debug("Adding VIDEO clip: %s", clip)
 
-            fps = sequence_payload.get('fps')
-            clip_ref = clip.get('clip_ref')
-            filepath = self._resolve_media(clip_ref)
-            cut = clip_ref.get('cut')
-            name = clip.get('instanceId')
+            filepath = self._resolve_media(clip.clip_ref)
+            name = clip.instance_id
+            layer = clip.layer
 
-            start_ms = clip.get('start_ms', 0)
-            start_frame = self._ms_to_frames(start_ms, fps)
-            layer = clip.get('layer', 1)
-            duration_ms = clip.get('duration_ms', 0)
+            self.log.debug("Resolved file path = %s", filepath)
 
-            self.log.info(f"Resolved file path = {filepath}")
-            self.log.info(f"Start frame = {start_frame}, Layer = {layer}, FPS = {fps}")
-            self.log.info(f"Duration override = {duration_ms}ms")
-
-            cut_start_frame = self._ms_to_frames(cut.get('start', 0))
-            calculated_start_frame = start_frame - cut_start_frame
+            calculated_start_frame = clip.start_frame - clip.cut_start_frame
 
             # Create VIDEO strip
             video = self.sequencer.sequences.new_movie(
@@ -224,12 +174,11 @@ class VSEBuilder(Vse_renderer):
                 frame_start=calculated_start_frame,
                 channel=layer
             )
-            self.log.info(f"Created VIDEO strip: {video.name}")
+            self.log.debug("Created VIDEO strip: %s", video.name)
 
             # Trim logic
-            self._apply_cut_and_duration(video, cut, duration_ms, fps)
+            self._apply_cut_and_duration(video, clip)
 
-            # video.frame_start = start_frame
             # Create AUDIO strip
             audio = self.sequencer.sequences.new_sound(
                 name=f"{name}_AUD",
@@ -237,13 +186,11 @@ class VSEBuilder(Vse_renderer):
                 frame_start=calculated_start_frame,
                 channel=layer + 1
             )
-            self.log.info(f"Created AUDIO strip: {audio.name}")
+            self.log.debug("Created AUDIO strip: %s", audio.name)
 
-            self._apply_cut_and_duration(audio, cut, duration_ms, fps)
-            # audio.frame_start = start_frame
-            # strip.frame_start = start_frame
+            self._apply_cut_and_duration(audio, clip)
 
-            self.log.info(f"Added VIDEO + AUDIO for {filepath} at {start_frame}")
+            self.log.info(f"Added VIDEO + AUDIO for {filepath} at {clip.start_frame}")
             return video, audio
 
         except Exception as e:
@@ -253,27 +200,20 @@ class VSEBuilder(Vse_renderer):
     # -------------------------------------------------------------------------
     # AUDIO ONLY
     # -------------------------------------------------------------------------
-    def _add_audio_clip(self, clip, payload):
+    def _add_audio_clip(self, clip):
         try:
-            self.log.info(f"Adding AUDIO ONLY clip: {clip}")
-
-            fps = payload.get("fps")
+            self.log.debug("Adding AUDIO ONLY clip: %s", clip)
 
-            name = clip.get("instanceId")
-            clip_ref = clip.get("clip_ref")
-            filepath = self._resolve_media(clip_ref)
-
-            start_frame = self._ms_to_frames(clip.get('start_ms', 0), fps)
-            layer = clip.get('layer', 1)
+            filepath = self._resolve_media(clip.clip_ref)
 
             audio = self.sequencer.sequences.new_sound(
-                name=f"{name}_AUDONLY",
+                name=f"{clip.instance_id}_AUDONLY",
                 filepath=filepath,
-                frame_start=start_frame,
-                channel=layer
+                frame_start=clip.start_frame,
+                channel=clip.layer
             )
 
-            self.log.info(f"Created AUDIO ONLY strip {audio.name} @ frame {start_frame}")
+            self.log.info(f"Created AUDIO ONLY strip {audio.name} @ frame {clip.start_frame}")
             return audio
 
         except Exception as e:
@@ -283,33 +223,21 @@ class VSEBuilder(Vse_renderer):
     # -------------------------------------------------------------------------
     # TEXT STRIP
     # -------------------------------------------------------------------------
-    def _add_text_clip(self, clip, sequence_payload):
+    def _add_text_clip(self, clip):
         try:
-            self.log.info(f"Adding TEXT clip: {clip}")
-
-            name = clip.get('instanceId')
-            start_ms = clip.get('start_ms', 0)
-            duration_ms = clip.get('duration_ms', 5000)
-
-            start_frame = self._ms_to_frames(start_ms)
-            end_frame = self._ms_to_frames(start_ms + duration_ms)
-            layer = clip.get('layer', 1)
-
-            clip_ref = clip.get("clip_ref", {})
-            
-            text = clip_ref.get("text")
+            self.log.debug("Adding TEXT clip: %s", clip)
 
-            self.log.info(f"TEXT '{text}' from {start_frame} → {end_frame}")
+            self.log.debug("TEXT '%s' from %s → %s", clip.text, clip.start_frame, clip.end_frame)
 
             txt = self.sequencer.sequences.new_effect(
-                name=name,
+                name=clip.instance_id,
                 type="TEXT",
-                frame_start=start_frame,
-                frame_end=end_frame,
-                channel=layer
+                frame_start=clip.start_frame,
+                frame_end=clip.end_frame,
+                channel=clip.layer
             )
 
-            txt.text = text
+            txt.text = clip.text
             self.log.info(f"Created TEXT strip: {txt.name}")
 
             return txt
@@ -320,91 +248,227 @@ class VSEBuilder(Vse_renderer):
 
     # -----------------------------------------------------
 
-    def _add_image_clip(self, clip, sequence_payload):
+    def _add_image_clip(self, clip):
         try:
-            self.log.info(f"Adding IMAGE clip: {clip}")
+            self.log.debug("Adding IMAGE clip: %s", clip)
 
-            fps = sequence_payload.get("fps", 24)
-            clip_ref = clip.get("clip_ref")
-            filepath = self._resolve_media(clip_ref)
+            filepath = self._resolve_media(clip.clip_ref)
             if not filepath:
                 self.log.error("Failed to resolve image media.")
                 return None
 
-            name = clip.get("instanceId")
-            start_ms = clip.get("start_ms", 0)
-            duration_ms = clip.get("duration_ms", 5000)  # default 5s
-            start_frame = self._ms_to_frames(start_ms, fps)
-            duration_frames = self._ms_to_frames(duration_ms, fps)
-            layer = clip.get("layer", 1)
-
             image_strip = self.sequencer.sequences.new_image(
-                name=f"{name}_IMG",
+                name=f"{clip.instance_id}_IMG",
                 filepath=filepath,
-                frame_start=start_frame,
-                channel=layer
+                frame_start=clip.start_frame,
+                channel=clip.layer
             )
-            image_strip.frame_final_duration = duration_frames
+            image_strip.frame_final_duration = clip.duration_frames
 
-            self.log.info(f"Created IMAGE strip: {image_strip.name} from frame {start_frame} to {start_frame+duration_frames}")
+            self.log.info(
+                f"Created IMAGE strip: {image_strip.name} from frame {clip.start_frame} "
+                f"to {clip.start_frame + clip.duration_frames}"
+            )
             return image_strip
 
         except Exception as e:
             self.log.error(f"Failed to add IMAGE: {e}")
             return None
 
+    # -------------------------------------------------------------------------
+    # MEDIA PREFETCH
+    # -------------------------------------------------------------------------
+    def _prefetch_media(self, media, pinned=None):
+        """
+        Resolve every distinct media item (media_id -> clip_ref) up front,
+        concurrently, before any strip is created. Results land in
+        self.media_paths, which _resolve_media consults first.
+
+        pinned: media IDs to protect from eviction, when the timeline uses
+        more media than is being fetched (default: media's keys).
+        """
+        clip_refs = {
+            media_id: clip_ref for media_id, clip_ref in media.items()
+            if media_id not in self.media_paths
+        }
+
+        # This generation's media stays safe from eviction until the next build
+        MEDIA_CACHE.pin("build", media.keys() if pinned is None else pinned)
+
+        if not clip_refs:
+            return
+
+        self.log.info(f"Prefetching {len(clip_refs)} media item(s)...")
+        self.update_server_status('RESOLVING_MEDIA')
+
+        with self.spans.span("build/media"):
+            self.media_paths.update(self.resolver.prefetch(clip_refs))
+
+        self.log.info("Media prefetch complete")
+        self.log.info(MEDIA_CACHE.report())
+
     # -------------------------------------------------------------------------
     # MAIN BUILD
     # -------------------------------------------------------------------------
     def build(self):
-        self.log.info("===== BEGIN VSE BUILD =====")
+        with self.spans.span("build"):
+            self.log.info("===== BEGIN VSE BUILD =====")
 
-        seq = self.instruction.get("sequence", self.instruction)
-        fps = seq.get("fps", 24)
-        tracks = seq.get("tracks", [])
+            # Malformed instructions fail here, before any media is fetched
+            plan = parse_instruction(self.instruction, self.log)
+            self.plan = plan
 
-        self.log.info(f"Sequence FPS: {fps}")
-        self.log.info(f"Tracks found: {len(tracks)}")
+            self.log.info(f"Sequence FPS: {plan.fps}")
+            self.log.info(f"Tracks found: {len(plan.tracks)}")
 
-        if not tracks:
-            self.log.error("No tracks found. Nothing to build.")
-            return
+            if not plan.tracks:
+                self.log.error("No tracks found. Nothing to build.")
+                return
 
-        self.resolving_media = True
-        for track_index, track in enumerate(tracks):
-            self.log.info(f"=== Processing Track #{track_index} ===")
-            self.log.info(f"Track data: {track}")
+            self.resolving_media = True
+            self._prefetch_media(plan.media)
+
+            for track_index, track in enumerate(plan.tracks):
+                self.log.info(f"=== Processing Track #{track_index} ===")
+                self.log.debug("Track data: %s", track)
+
+                for clip in track.clips:
+                    self._add_clip(clip)
+
+            self.resolving_media = False
+            self.setup_timeline_from_output(plan.output)
+
+            self.log.info("===== VSE BUILD COMPLETE =====")
+
+    def _add_clip(self, clip):
+        add_clip = {
+            "video": self._add_video_clip,
+            "audio": self._add_audio_clip,
+            "text": self._add_text_clip,
+            "image": self._add_image_clip,
+        }[clip.kind]
+
+        with self.spans.span("build/strips") as span:
+            strips = add_clip(clip)
+            if strips is None:
+                span.error = True
+                return []
+
+            strips = strips if isinstance(strips, tuple) else (strips,)
+            span.add(frames=max(strip.frame_final_duration for strip in strips))
 
-            track_payload = {"track": track, "fps": fps}
+        for strip in strips:
+            strip[STRIP_INSTANCE_KEY] = clip.instance_id
+            strip[STRIP_SIGNATURE_KEY] = clip.signature()
 
-            for clip_index, clip in enumerate(track.get("clips", [])):
-                self.log.info(f"-- Clip #{clip_index}: {clip}")
+        return strips
 
-                clip_ref = clip.get("clip_ref", {})
-                mediatype = clip_ref.get("type")
-                self.log.info(f"Mediatype = {mediatype}")
+    # -------------------------------------------------------------------------
+    # INCREMENTAL APPLY
+    # -------------------------------------------------------------------------
+    def _existing_strips(self, plan_ids):
+        """
+        Top-level strips this builder made, grouped by the instanceId they
+        were built from. Strips built before tagging are claimed by their name
+        suffix only when that instanceId is in the plan; untagged strips the
+        user added by hand are never claimed.
+        """
+        by_instance = {}
+
+        for strip in self.sequencer.sequences:
+            instance_id = strip.get(STRIP_INSTANCE_KEY)
+
+            if instance_id is None:
+                for suffix in STRIP_SUFFIXES:
+                    if strip.name.endswith(suffix) and strip.name[:-len(suffix)] in plan_ids:
+                        instance_id = strip.name[:-len(suffix)]
+                        break
+
+            if instance_id is not None:
+                by_instance.setdefault(instance_id, []).append(strip)
+
+        return by_instance
+
+    def apply_incremental(self):
+        """
+        Bring the existing sequencer in line with the instruction, touching
+        only what changed: strips are keyed by instanceId and compared by
+        the clip's signature. Unchanged clips are left alone, edited text
+        strips are updated in place, other edited clips are rebuilt, and
+        clips no longer in the instruction are removed.
+
+        Media is fetched before any strip is touched; a clip whose media
+        cannot be fetched keeps its current strips.
+        """
+        self.log.info("===== BEGIN INCREMENTAL APPLY =====")
+
+        plan = parse_instruction(self.instruction, self.log)
+        self.plan = plan
+
+        existing = self._existing_strips({clip.instance_id for clip in plan.clips()})
+        created = updated = unchanged = removed = kept = 0
+
+        changed = []
+        for clip in plan.clips():
+            strips = existing.pop(clip.instance_id, None)
+            signature = clip.signature()
+
+            if strips and all(s.get(STRIP_SIGNATURE_KEY) == signature for s in strips):
+                unchanged += 1
+            else:
+                changed.append((clip, strips))
+
+        self.resolving_media = True
+        # Unchanged strips still play their media, so keep all of it pinned
+        self._prefetch_media(
+            {clip.media_id: clip.clip_ref for clip, _ in changed if clip.media_id},
+            pinned=plan.media.keys()
+        )
 
-                if mediatype == "video":
-                    self._add_video_clip(clip, track_payload)
+        # Clips that disappeared from the instruction
+        for strips in existing.values():
+            for strip in strips:
+                self.sequencer.sequences.remove(strip)
+                removed += 1
 
-                elif mediatype == "audio":
-                    self._add_audio_clip(clip, track_payload)
+        for clip, strips in changed:
+            if strips and clip.kind == "text" and len(strips) == 1 and strips[0].type == 'TEXT':
+                self._update_text_strip(strips[0], clip)
+                updated += 1
+                continue
 
-                elif mediatype == "text":
-                    self._add_text_clip(clip, track_payload)
+            if clip.media_id and not self.media_paths.get(clip.media_id):
+                self.log.error(f"Keeping clip {clip.instance_id} as it is: its media could not be fetched")
+                kept += 1
+                continue
 
-                elif mediatype == 'image':
-                    self._add_image_clip(clip, track_payload)
+            for strip in strips or []:
+                self.sequencer.sequences.remove(strip)
 
-                else:
-                    self.log.error(f"Unsupported mediatype: {mediatype}")
+            self._add_clip(clip)
+            if strips:
+                updated += 1
+            else:
+                created += 1
 
         self.resolving_media = False
-        self.setup_timeline_from_output(self.instruction.get('output', {}))
+        self.setup_timeline_from_output(plan.output)
 
-        self.log.info("===== VSE BUILD COMPLETE =====")
+        self.log.info(
+            f"Incremental apply: {created} created, {updated} updated, "
+            f"{removed} strips removed, {unchanged} unchanged, {kept} kept after media errors"
+        )
+        self.log.info("===== INCREMENTAL APPLY COMPLETE =====")
 
+    def _update_text_strip(self, strip, clip):
+        strip.text = clip.text
+        strip.channel = clip.layer
+        strip.frame_start = clip.start_frame
+        strip.frame_final_end = clip.end_frame
+        strip[STRIP_SIGNATURE_KEY] = clip.signature()
 
+
+    @staticmethod
     def iso_now():
         return (
             datetime.now(timezone.utc)
@@ -413,16 +477,8 @@ class VSEBuilder(Vse_renderer):
         )
     
     def _post_json(self, url, payload):
-        self.log.info(f"Sending request {url} with payload::{payload}")
-        req = urllib.request.Request(
-            url=url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-
-        with urllib.request.urlopen(req, timeout=30) as res:
-            return json.loads(res.read().decode("utf-8"))
+        self.log.debug("Sending request %s with payload::%s", url, payload)
+        return shared_client.post_json(url, payload, timeout=30)
 
     def update_server_status(self, status):
         if (self.generation == None):
@@ -434,41 +490,73 @@ class VSEBuilder(Vse_renderer):
             "time": self.iso_now()
         })
 
-    def upload_rendered_media(
-        self,
-        chunk_size=2 * 1024 * 1024  # 2MB
-    ):
-        scene = bpy.context.scene
-        
-        title = self.instruction.get("name", "<unk>")
-        description = self.instruction.get("description", "")
-        user = self.instruction.get("editor", "<unk>")
-        mime = 'video/mp4'
-        media_type = 'video'
+        if status in ("DONE", "FAILED"):
+            metrics.JOBS_FINISHED.labels(status.lower()).inc()
+            metrics.JOB_SECONDS.observe(time.monotonic() - self.spans.started)
 
-        filepath = Path(scene.render.filepath)
-        total_size = filepath.stat().st_size
-        total_chunks = math.ceil(total_size / chunk_size)
+    def _upload_owner(self):
+        return self.generation.get("_id") if self.generation else None
 
-        media_id = str(uuid.uuid4())
+    def _upload_file(self, filepath, chunk_size):
+        """Send every chunk of filepath. Returns its UploadProgress, or None on failure."""
+        progress = UploadProgress.load_or_create(filepath, chunk_size, owner=self._upload_owner())
 
-        with open(filepath, "rb") as f:
-            for index in range(total_chunks):
-                chunk_bytes = f.read(chunk_size)
-                encoded = base64.b64encode(chunk_bytes).decode("utf-8")
+        uploader = ChunkUploader(
+            self._upload_chunk,
+            max_workers=self.upload_workers,
+            retries=self.upload_retries,
+            log=self.log
+        )
 
-                payload = {
-                    "media_id": media_id,
-                    "chunk": encoded,
-                    "index": index,
-                    "size": len(chunk_bytes),
-                    "total_chunks": total_chunks,
-                }
+        # Chunks acknowledged before a resume are not sent again
+        pending_bytes = sum(
+            min(progress.chunk_size, progress.total_size - index * progress.chunk_size)
+            for index in progress.pending()
+        )
 
-                self._post_json(
-                    f"{self.editor_url}/upload_media",
-                    payload
-                )
+        with self.spans.span("upload", bytes=pending_bytes) as span:
+            for attempt in range(1, self.upload_attempts + 1):
+                try:
+                    uploader.upload(progress)
+                    break
+                except ChunkUploadError as e:
+                    if attempt == self.upload_attempts:
+                        span.error = True
+                        return self.log.error(f"Upload of {filepath} failed, progress kept for resume: {e}")
+
+                    self.log.warning(
+                        f"Upload of {filepath} failed (attempt {attempt}/{self.upload_attempts}), resuming: {e}"
+                    )
+                    time.sleep(self.upload_attempt_delay * attempt)
+
+        if pending_bytes and span.seconds:
+            metrics.UPLOAD_RATE.observe(pending_bytes / span.seconds)
+
+        return progress
+
+    def resume_pending_upload(self, chunk_size=2 * 1024 * 1024):
+        """
+        True when this generation's render is already on disk with an
+        interrupted upload (e.g. the worker died mid-upload); the output path
+        is then set so upload_rendered_media() resumes it without re-rendering.
+        """
+        filepath = self.output_path()
+        progress = UploadProgress.find(filepath, chunk_size, owner=self._upload_owner())
+        if progress is None:
+            return False
+
+        self.log.info(
+            f"Resuming upload of {filepath}: {len(progress.acked)}/{progress.total_chunks} chunks already sent"
+        )
+        self.scene.render.filepath = str(filepath)
+        return True
+
+    def _add_media(self, media_id, total_size, **extra):
+        title = self.instruction.get("name", "<unk>")
+        description = self.instruction.get("description", "")
+        user = self.instruction.get("editor", "<unk>")
+        mime = 'video/mp4'
+        media_type = 'video'
 
         payload = {
             "_id": media_id,
@@ -478,29 +566,123 @@ class VSEBuilder(Vse_renderer):
             "mime": mime,
             "type": media_type,
             "total_size": total_size,
+            **extra,
         }
 
-        response = self._post_json(
-            f"{self.editor_url}/add_media",
-            payload
-        )
+        with self.spans.span("upload/add_media"):
+            response = self._post_json(
+                f"{self.editor_url}/add_media",
+                payload
+            )
 
         if not response.get("ok"):
             return self.log.error("Failed to add media metadata")
 
-        media = response["data"]
+        return response["data"]
+
+    def upload_rendered_media(
+        self,
+        chunk_size=2 * 1024 * 1024  # 2MB
+    ):
+        filepath = Path(self.scene.render.filepath)
+
+        progress = self._upload_file(filepath, chunk_size)
+        if progress is None:
+            return None
+
+        media = self._add_media(progress.media_id, progress.total_size)
+        if media:
+            progress.clear()
 
         return media
 
+    # -------------------------------------------------------------------------
+    # SEGMENTED UPLOAD
+    # -------------------------------------------------------------------------
+    def upload_segment(self, filepath, chunk_size=2 * 1024 * 1024):
+        """Upload one rendered segment. Safe to call from a worker thread (no bpy access)."""
+        return self._upload_file(Path(filepath), chunk_size)
+
+    def render_and_upload_segments(self, segment_seconds):
+        """
+        Render in segments, uploading each finished segment while the next one
+        encodes, then register the segment manifest. Returns the media or None.
+        """
+        # One segment uploads at a time (its chunks are already parallel)
+        segments = []
+        with ThreadPoolExecutor(max_workers=1) as upload_pool:
+            for path, frame_start, frame_end in self.render_segments(segment_seconds):
+                segments.append((upload_pool.submit(self.upload_segment, path), frame_start, frame_end))
+
+            segments = [(future.result(), start, end) for future, start, end in segments]
+
+        if not all(progress for progress, _, _ in segments):
+            return None
 
+        return self.add_segmented_media(segments)
+
+    def add_segmented_media(self, segments):
+        """
+        Register the final media as an ordered manifest of uploaded segments.
+        segments: [(UploadProgress, frame_start, frame_end), ...] in render order.
+        The backend concatenates the segments into one file.
+        """
+        manifest = [
+            {
+                "index": index,
+                "media_id": progress.media_id,
+                "size": progress.total_size,
+                "frame_start": frame_start,
+                "frame_end": frame_end,
+            }
+            for index, (progress, frame_start, frame_end) in enumerate(segments)
+        ]
+
+        media = self._add_media(
+            str(uuid.uuid4()),
+            sum(segment["size"] for segment in manifest),
+            segments=manifest
+        )
+
+        if media:
+            for progress, _, _ in segments:
+                progress.clear()
+
+        return media
 
     def generation_complete(self, media_id):
         payload = {
             "_id": self.generation.get('_id'),
             "editor_media": media_id,
         }
+        # Lets the backend compare throughput between render profiles
+        if self.render_settings:
+            payload["render_settings"] = self.render_settings
+        payload["timings"] = self.spans.report()
+
+        self.log.info(f"[Timing] {self.spans.summary()}")
 
         self._post_json(
             f"{VSEBuilder.server_url}/generation_complete",
             payload
-        )
\ No newline at end of file
+        )
+    def finish_generation(self, media):
+        """
+        Complete the generation with its uploaded media and mark it DONE, or
+        mark it FAILED when the upload failed. Returns True on success.
+        """
+        if not media:
+            self.fail_generation(f"Upload failed for generation {self.generation.get('_id')}")
+            return False
+
+        self.generation_complete(media.get('_id'))
+        self.update_server_status("DONE")
+        return True
+
+    def fail_generation(self, reason):
+        """Log why the generation failed and mark it FAILED. Never raises."""
+        self.log.error(reason)
+        try:
+            self.update_server_status("FAILED")
+        except Exception as e:
+            self.log.error(f"Could not mark generation {self.generation.get('_id')} as failed: {e}")
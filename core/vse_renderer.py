@@ -1,4 +1,27 @@
 import bpy
+from pathlib import Path
+from . import metrics
+from .parallel_render import ParallelRenderer, ProcessRunner
+from .render_profiles import apply_profile, allotted_threads, record_render
+from .smart_render import plan_stream_copy, render_stream_copy
+
+# Scene custom properties recording an applied draft profile
+DRAFT_KEY = "vse_draft"
+FULL_QUALITY_KEY = "vse_full_quality"
+
+# Encoder settings a draft overrides, saved so clearing the draft restores them
+FULL_QUALITY_SETTINGS = ("video_bitrate", "constant_rate_factor", "ffmpeg_preset", "audio_codec")
+
+# Proxy sizes Blender can build; a proxy is only used when it matches the render percentage
+PROXY_SIZES = (25, 50, 75)
+
+DRAFT_DEFAULTS = {
+  "resolution_percentage": 50,
+  "proxies": True,
+  "bitrate_factor": 0.25,
+  "preset": "REALTIME",
+  "frame_step": 1,
+}
 
 class Vse_renderer:
   def setup_timeline_from_output(self, output_spec, default_output="//render/output.mp4"):
@@ -6,10 +29,13 @@ class Vse_renderer:
     Set timeline, resolution, FPS, and output path according to output_spec.
     output_spec: dict like your JSON "output" key
     """
-    scene = bpy.context.scene
+    scene = self.scene
     video_spec = output_spec.get("video", {})
     audio_spec = output_spec.get("audio", {})
 
+    # Undo a draft profile left from an earlier build of this scene
+    self.apply_draft_profile(None)
+
     # Timeline FPS
     fps = video_spec.get("fps", 24)
     scene.render.fps = fps
@@ -58,17 +84,166 @@ class Vse_renderer:
         f"Output: {scene.render.filepath}"
     )
 
+    if output_spec.get("draft"):
+      self.apply_draft_profile(output_spec["draft"])
+
+
+  def apply_draft_profile(self, draft):
+    """
+    Switch the scene to a fast preview render, or back to full quality when
+    draft is falsy. draft is True for DRAFT_DEFAULTS or a dict overriding any
+    of them:
+      resolution_percentage: render size (snapped to 25/50/75 when using proxies)
+      proxies: render movie strips from proxies built at that size
+      bitrate_factor: fraction of the full video bitrate
+      preset: ffmpeg encoder effort ('REALTIME', 'GOOD' or 'BEST')
+      frame_step: render every Nth frame at 1/N of the frame rate, so the
+        preview keeps real-time timing (snapped to a divisor of the fps).
+        A stepped draft has no audio track.
+    """
+    scene = self.scene
+    ffmpeg = scene.render.ffmpeg
+    movie_strips = [s for s in scene.sequence_editor.sequences_all if s.type == 'MOVIE']
+
+    if not draft:
+      if scene.get(DRAFT_KEY):
+        full = scene.get(FULL_QUALITY_KEY) or {}
+        scene.render.resolution_percentage = 100
+        scene.frame_step = 1
+        for name in FULL_QUALITY_SETTINGS:
+          if name in full:
+            setattr(ffmpeg, name, full[name])
+        scene.render.fps = full.get("fps", scene.render.fps)
+        for strip in movie_strips:
+          strip.use_proxy = False
+        scene[DRAFT_KEY] = False
+        self.log.info("Draft profile cleared, rendering at full quality")
+      return
+
+    settings = dict(DRAFT_DEFAULTS)
+    if isinstance(draft, dict):
+      settings.update(draft)
+
+    percentage = int(settings["resolution_percentage"])
+    if settings["proxies"] and movie_strips:
+      percentage = min(PROXY_SIZES, key=lambda size: abs(size - percentage))
+    scene.render.resolution_percentage = percentage
+
+    # Keep the full-quality frame rate and encoder settings so clearing the draft can restore them
+    if not scene.get(DRAFT_KEY):
+      full = {name: getattr(ffmpeg, name) for name in FULL_QUALITY_SETTINGS}
+      full["fps"] = scene.render.fps
+      scene[FULL_QUALITY_KEY] = full
+    full = scene[FULL_QUALITY_KEY]
+    full_bitrate = full["video_bitrate"]
+    ffmpeg.constant_rate_factor = 'NONE'
+    ffmpeg.video_bitrate = max(1, int(full_bitrate * float(settings["bitrate_factor"])))
+    ffmpeg.ffmpeg_preset = settings["preset"]
+
+    # Every Nth frame at fps / N keeps real-time timing. fps_base stays as it
+    # is, so N must divide the fps. The audio mixdown follows the lowered
+    # frame rate and would drift, so stepped drafts leave it out
+    full_fps = int(full["fps"])
+    requested = max(1, int(settings["frame_step"]))
+    frame_step = min(
+      (step for step in range(1, full_fps + 1) if full_fps % step == 0),
+      key=lambda step: (abs(step - requested), -step)
+    )
+    scene.frame_step = frame_step
+    scene.render.fps = full_fps // frame_step
+    ffmpeg.audio_codec = 'NONE' if frame_step > 1 else full["audio_codec"]
+
+    if settings["proxies"] and movie_strips:
+      self._build_proxies(movie_strips, percentage)
+
+    scene[DRAFT_KEY] = True
+    self.log.info(
+        f"Draft profile: {percentage}% size, "
+        f"{ffmpeg.video_bitrate} bitrate, {settings['preset']} preset, "
+        f"every {frame_step} frame(s) at {scene.render.fps}fps{' without audio' if frame_step > 1 else ''}, "
+        f"proxies {'on' if settings['proxies'] and movie_strips else 'off'}"
+    )
+
+
+  def _build_proxies(self, movie_strips, percentage):
+    """
+    Enable size-matched proxies on movie strips and build the missing ones.
+    Proxies sit beside the cached source media, so later drafts reuse them.
+    """
+    scene = self.scene
+
+    for strip in scene.sequence_editor.sequences_all:
+      strip.select = False
+
+    for strip in movie_strips:
+      strip.use_proxy = True
+      strip.proxy.use_overwrite = False
+      for size in PROXY_SIZES:
+        setattr(strip.proxy, f"build_{size}", size == percentage)
+      strip.select = True
+
+    try:
+      with bpy.context.temp_override(scene=scene):
+        bpy.ops.sequencer.rebuild_proxy()
+    except RuntimeError as e:
+      # Without proxies the draft still renders, just from the full-size sources
+      self.log.warning(f"Could not build proxies, rendering from sources: {e}")
+      for strip in movie_strips:
+        strip.use_proxy = False
+
+
+  def apply_render_profile(self):
+    """
+    Apply the render profile (engine, fixed thread count, sequencer cache)
+    from output.render_profile, else the builder's render_profile. Returns
+    the settings used, which are also kept for _record_render.
+    """
+    spec = self.instruction.get("output", {}).get("render_profile", self.render_profile)
+    self.render_settings = apply_profile(self.scene, spec, self.render_threads or allotted_threads())
+
+    self.log.info(
+        f"Render profile {self.render_settings['profile']}: {self.render_settings['engine']}, "
+        f"{self.render_settings['threads']} thread(s)"
+    )
+    return self.render_settings
+
+
+  def _frame_count(self, frame_start=None, frame_end=None):
+    scene = self.scene
+    frame_start = scene.frame_start if frame_start is None else frame_start
+    frame_end = scene.frame_end if frame_end is None else frame_end
+    return (frame_end - frame_start) // max(1, scene.frame_step) + 1
+
+
+  def _record_render(self, mode, seconds, frame_start=None, frame_end=None):
+    frames = self._frame_count(frame_start, frame_end)
+
+    record = record_render(
+      self.instruction.get('_id'), mode, self.render_settings, frames, seconds
+    )
+    self.log.info(f"Rendered {frames} frames in {record['seconds']}s ({record['frames_per_second']} fps, {mode})")
+
+    metrics.RENDER_FRAMES.inc(frames)
+    if record['frames_per_second']:
+      metrics.RENDER_FPS.observe(record['frames_per_second'])
+
+
+  def output_path(self):
+    """Where a whole-timeline render (sequence, parallel or stream copy) is written."""
+    output_dir = Path.home() / "VSE_Instructor_Renders"
+    suffix = "_draft" if self.scene.get(DRAFT_KEY) else ""
+    return output_dir / f"{self.instruction.get('_id', 'output')}{suffix}.mp4"
+
 
   def render_sequence(self, on_start=None, on_complete=None, use_animation=True):
     """
     Render the sequencer with optional hooks.
     """
-    scene = bpy.context.scene
+    scene = self.scene
 
-    from pathlib import Path
-    output_dir = Path.home() / "VSE_Instructor_Renders"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    scene.render.filepath = str(output_dir / f"{self.instruction.get('_id', 'output')}.mp4")
+    output_path = self.output_path()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    scene.render.filepath = str(output_path)
 
     # Pre-render handler
     def _start_handler(scene):
@@ -90,9 +265,184 @@ class Vse_renderer:
     bpy.app.handlers.render_post.append(_complete_handler)
 
     # Render
-    scene.render.engine = 'BLENDER_EEVEE_NEXT'  # BLENDER_WORKBENCH or 'CYCLES' depending on your project
+    self.apply_render_profile()
+    # render_complete handlers run before the operator returns; they may
+    # finish this span first so their own work is not counted as render time
+    self.render_span = self.spans.start("render", frames=self._frame_count() if use_animation else 1)
+    try:
+      if use_animation:
+        bpy.ops.render.render(animation=True, write_still=True, scene=scene.name)
+      else:
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+    finally:
+      self.spans.finish(self.render_span)
+
     if use_animation:
-        bpy.ops.render.render(animation=True, write_still=True)
-    else:
-        bpy.ops.render.render(write_still=True)
+      self._record_render("sequence", self.render_span.seconds)
+
+
+
+  def render_parallel(self, processes, runner=None):
+    """
+    Render the timeline in `processes` background Blender processes, each
+    taking one slice of the frame range, and stream-copy the slices into
+    scene.render.filepath. Blocks until the final file is written.
+    """
+    scene = self.scene
+
+    output_path = self.output_path()
+    work_dir = output_path.parent / f"{output_path.stem}_parallel"
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    settings = self.apply_render_profile()
+    scene.render.filepath = str(output_path)
+
+    # The worker processes render from a snapshot of the built timeline
+    blend_path = work_dir / "timeline.blend"
+    bpy.ops.wm.save_as_mainfile(filepath=str(blend_path), copy=True)
+
+    renderer = ParallelRenderer(
+      runner or ProcessRunner(blender=bpy.app.binary_path),
+      processes=processes,
+      cores=settings["threads"],
+      log=self.log
+    )
+    with self.spans.span("render", frames=self._frame_count()) as span:
+      renderer.render(blend_path, scene.name, scene.frame_start, scene.frame_end, output_path, work_dir)
+    self._record_render(f"parallel x{renderer.processes}", span.seconds)
+    return output_path
+
+
+  def smart_render_plan(self, runner=None):
+    """
+    Cuts for a stream-copy render, or None when the timeline needs a real
+    render. Copying is possible when the unmuted strips are movies (with
+    their own, untouched sound) laid end to end from frame_start, with no
+    transform, effect or text, and every source already matches the output
+    codec, size and frame rate.
+    """
+    scene = self.scene
+    reason = None
+
+    movies = []
+    sounds = []
+    for strip in scene.sequence_editor.sequences_all:
+      if strip.mute:
+        continue
+      if strip.type == 'MOVIE':
+        movies.append(strip)
+      elif strip.type == 'SOUND':
+        sounds.append(strip)
+      else:
+        reason = f"{strip.type.lower()} strip {strip.name} needs compositing"
+        break
+
+    if reason is None and scene.get(DRAFT_KEY):
+      reason = "draft profile is active"
+    if reason is None and not movies:
+      reason = "no movie strips"
+
+    if reason is None:
+      movies.sort(key=lambda s: s.frame_final_start)
+      reason = self._check_copyable(movies, sounds)
+
+    if reason:
+      self.log.info(f"Smart render not possible ({reason}), rendering normally")
+      return None
+
+    fps = scene.render.fps / scene.render.fps_base
+    segments = [
+      (bpy.path.abspath(s.filepath), int(s.frame_offset_start), s.frame_final_duration)
+      for s in movies
+    ]
+
+    cuts, reason = plan_stream_copy(segments, fps, self.instruction.get("output", {}), runner)
+    if reason:
+      self.log.info(f"Smart render not possible ({reason}), rendering normally")
+      return None
+
+    self.log.info(f"Smart render: stream-copying {len(cuts)} cut(s)")
+    return cuts
+
+
+  def _check_copyable(self, movies, sounds):
+    scene = self.scene
+
+    position = scene.frame_start
+    for strip in movies:
+      if strip.frame_final_start != position:
+        return f"gap or overlap at frame {position}"
+      position = strip.frame_final_end
+
+      t = strip.transform
+      if (t.offset_x, t.offset_y, t.rotation, t.scale_x, t.scale_y) != (0, 0, 0, 1, 1):
+        return f"{strip.name} is transformed"
+      c = strip.crop
+      if (c.min_x, c.max_x, c.min_y, c.max_y) != (0, 0, 0, 0):
+        return f"{strip.name} is cropped"
+      if strip.modifiers or strip.blend_alpha != 1.0 or strip.use_flip_x or strip.use_flip_y \
+          or strip.use_reverse_frames or strip.color_saturation != 1.0 or strip.color_multiply != 1.0:
+        return f"{strip.name} has effects applied"
+
+    if position < scene.frame_end:
+      return f"gap at frame {position}"
+
+    # Every sound must be its movie's own track, unchanged
+    spans = {(bpy.path.abspath(s.filepath), s.frame_final_start, s.frame_final_end) for s in movies}
+    for strip in sounds:
+      span = (bpy.path.abspath(strip.sound.filepath), strip.frame_final_start, strip.frame_final_end)
+      if span not in spans:
+        return f"sound strip {strip.name} is not a movie's own audio"
+      if strip.volume != 1.0 or strip.pan != 0.0:
+        return f"sound strip {strip.name} is mixed"
+
+    return None
+
+
+  def render_stream_copy(self, cuts, runner=None):
+    """Write the cuts to the output path without re-encoding. Raises SmartRenderError."""
+    scene = self.scene
+
+    output_path = self.output_path()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    scene.render.filepath = str(output_path)
+
+    with self.spans.span("render", frames=self._frame_count()) as span:
+      output = render_stream_copy(cuts, output_path, runner)
+      span.add(bytes=output.stat().st_size)
+    return output
+
+
+  def render_segments(self, segment_seconds):
+    """
+    Render the timeline as consecutive, independently playable segments of
+    about segment_seconds each. Yields (path, frame_start, frame_end) as soon
+    as each segment is written, so the caller can upload it while the next
+    one encodes. The scene's frame range is restored afterwards.
+    """
+    scene = self.scene
+    frame_start, frame_end = scene.frame_start, scene.frame_end
+    segment_frames = max(1, int(segment_seconds * scene.render.fps))
+
+    output_dir = Path.home() / "VSE_Instructor_Renders" / f"{self.instruction.get('_id', 'output')}_segments"
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    self.apply_render_profile()
+
+    try:
+      for index, start in enumerate(range(frame_start, frame_end + 1, segment_frames)):
+        end = min(start + segment_frames - 1, frame_end)
+
+        scene.frame_start = start
+        scene.frame_end = end
+        scene.render.filepath = str(output_dir / f"segment_{index:05d}.mp4")
+
+        self.log.info(f"Rendering segment {index}: frames {start} → {end}")
+        with self.spans.span("render", frames=self._frame_count(start, end)) as span:
+          bpy.ops.render.render(animation=True, write_still=True, scene=scene.name)
+        self._record_render("segment", span.seconds, start, end)
 
+        yield Path(scene.render.filepath), start, end
+    finally:
+      scene.frame_start = frame_start
+      scene.frame_end = frame_end
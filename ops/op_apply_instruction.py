@@ -4,6 +4,12 @@ class APPLY_INSTRUCTION_OT_Operator(bpy.types.Operator):
     bl_idname = "vse_instructor.apply_instruction"
     bl_label = "Build Sequence"
 
+    incremental: bpy.props.BoolProperty(
+        name="Incremental",
+        description="Only create, update or remove strips whose clips changed",
+        default=True
+    )
+
     def execute(self, context):
         instruction = bpy.app.driver_namespace['vse_instruction']
 
@@ -12,8 +18,17 @@ class APPLY_INSTRUCTION_OT_Operator(bpy.types.Operator):
             return {'CANCELLED'}
 
         from ..core.vse_builder import VSEBuilder
+        from ..core.instruction_parser import InstructionError
         builder = VSEBuilder(instruction)
-        builder.build()
+
+        try:
+            if self.incremental:
+                builder.apply_incremental()
+            else:
+                builder.build()
+        except InstructionError as e:
+            self.report({'ERROR'}, f"Invalid instruction: {e}")
+            return {'CANCELLED'}
 
         self.report({'INFO'}, "Sequence built successfully")
         return {'FINISHED'}
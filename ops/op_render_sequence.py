@@ -4,6 +4,28 @@ class RENDER_SEQUENCE_OT_Operator(bpy.types.Operator):
     bl_idname = "vse_instructor.render_sequence"
     bl_label = "Render Sequence"
 
+    draft: bpy.props.BoolProperty(
+        name="Draft",
+        description="Fast preview: reduced size, proxies, lower bitrate",
+        default=False
+    )
+
+    draft_percentage: bpy.props.IntProperty(
+        name="Draft Size",
+        description="Resolution percentage for draft renders",
+        default=50,
+        min=10,
+        max=100
+    )
+
+    draft_frame_step: bpy.props.IntProperty(
+        name="Frame Step",
+        description="Render every Nth frame at 1/N of the frame rate in draft renders (without audio)",
+        default=1,
+        min=1,
+        max=10
+    )
+
     def execute(self, context):
         from ..core.vse_builder import VSEBuilder  # your builder module
 
@@ -15,6 +37,11 @@ class RENDER_SEQUENCE_OT_Operator(bpy.types.Operator):
         # output_spec = builder.instruction.get("output", {})
         # builder.setup_timeline_from_output(output_spec)
 
+        builder.apply_draft_profile({
+            "resolution_percentage": self.draft_percentage,
+            "frame_step": self.draft_frame_step,
+        } if self.draft else None)
+
         # Render with hooks
         builder.render_sequence(
             on_start=lambda s: print("Render started"),
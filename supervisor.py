@@ -0,0 +1,19 @@
+"""
+Worker supervisor.
+
+    python supervisor.py --workers 4 [--host-id NAME] [--blender /path/to/blender]
+
+Runs a pool of headless Blender workers (worker.py) on this host, probes
+for generations on their behalf and restarts any worker that crashes.
+Plain Python: Blender is only started for the workers.
+"""
+import os
+import sys
+
+# core/ only uses relative imports, so it can be loaded as a top-level package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.supervisor import main  # noqa: E402
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
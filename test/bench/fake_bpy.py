@@ -0,0 +1,285 @@
+"""
+Minimal stand-in for Blender's bpy, enough for VSEBuilder, the renderer
+and poll_server to run on a plain Python install. Strips are plain objects
+and every creation is counted in CALLS; rendering writes a file of
+RENDER_OUTPUT_SIZE bytes to scene.render.filepath and fires the render
+handlers.
+
+install() registers this module as `bpy`; call it before importing core.
+"""
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+# Frames in every movie/sound a strip is created from
+MEDIA_FRAMES = 24 * 60
+RENDER_OUTPUT_SIZE = 4 * 1024 * 1024
+
+CALLS = Counter()
+
+
+def install():
+    sys.modules["bpy"] = sys.modules[__name__]
+
+
+def reset():
+    CALLS.clear()
+    data.scenes.clear()
+    context.scene = data.scenes.new("Scene")
+    for handlers in (app.handlers.render_pre, app.handlers.render_post, app.handlers.render_complete):
+        handlers.clear()
+    app.timers.pending.clear()
+
+
+# -----------------------------------------------------------------------------
+# STRIPS
+# -----------------------------------------------------------------------------
+class Strip:
+    def __init__(self, name, strip_type, channel, frame_start, frame_duration, filepath=None):
+        self.name = name
+        self.type = strip_type
+        self.channel = channel
+        self.frame_start = frame_start
+        self.frame_duration = frame_duration
+        self.frame_offset_start = 0
+        self.frame_offset_end = 0
+        self.filepath = filepath
+        self.mute = False
+        self.select = False
+        self.use_proxy = False
+        self.proxy = SimpleNamespace(use_overwrite=False, build_25=False, build_50=False, build_75=False)
+        self.text = ""
+        self._props = {}
+
+    @property
+    def frame_final_start(self):
+        return self.frame_start + self.frame_offset_start
+
+    @property
+    def frame_final_duration(self):
+        return self.frame_duration - self.frame_offset_start - self.frame_offset_end
+
+    @frame_final_duration.setter
+    def frame_final_duration(self, value):
+        self.frame_offset_end = self.frame_duration - self.frame_offset_start - value
+
+    @property
+    def frame_final_end(self):
+        return self.frame_final_start + self.frame_final_duration
+
+    @frame_final_end.setter
+    def frame_final_end(self, value):
+        self.frame_final_duration = value - self.frame_final_start
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        self._props[key] = value
+
+    def get(self, key, default=None):
+        return self._props.get(key, default)
+
+
+class Sequences(list):
+    def _add(self, name, strip_type, channel, frame_start, frame_duration, filepath=None):
+        if filepath is not None and not os.path.exists(filepath):
+            raise RuntimeError(f"File '{filepath}' not found")
+
+        names = {strip.name for strip in self}
+        unique, n = name, 0
+        while unique in names:
+            n += 1
+            unique = f"{name}.{n:03d}"
+
+        strip = Strip(unique, strip_type, channel, frame_start, frame_duration, filepath)
+        self.append(strip)
+        CALLS[f"new_{strip_type.lower()}"] += 1
+        return strip
+
+    def new_movie(self, name, filepath, channel, frame_start, **kwargs):
+        return self._add(name, 'MOVIE', channel, frame_start, MEDIA_FRAMES, filepath)
+
+    def new_sound(self, name, filepath, channel, frame_start, **kwargs):
+        return self._add(name, 'SOUND', channel, frame_start, MEDIA_FRAMES, filepath)
+
+    def new_image(self, name, filepath, channel, frame_start, **kwargs):
+        return self._add(name, 'IMAGE', channel, frame_start, 1, filepath)
+
+    def new_effect(self, name, type, channel, frame_start, frame_end=None, **kwargs):
+        return self._add(name, type, channel, frame_start, (frame_end or frame_start + 1) - frame_start)
+
+    def remove(self, strip):
+        super().remove(strip)
+        CALLS["remove_strip"] += 1
+
+
+class SequenceEditor:
+    def __init__(self):
+        self.sequences = Sequences()
+        self.use_cache_raw = True
+        self.use_cache_preprocessed = False
+        self.use_cache_composite = False
+        self.use_cache_final = True
+        self.use_prefetch = False
+
+    @property
+    def sequences_all(self):
+        return self.sequences
+
+
+# -----------------------------------------------------------------------------
+# SCENES
+# -----------------------------------------------------------------------------
+class Scene:
+    def __init__(self, name):
+        self.name = name
+        self.sequence_editor = None
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_step = 1
+        self.render = SimpleNamespace(
+            engine='BLENDER_EEVEE_NEXT', fps=24, fps_base=1.0,
+            resolution_x=1920, resolution_y=1080, resolution_percentage=100,
+            filepath="//render/output.mp4", use_sequencer=True, use_compositing=True,
+            threads_mode='AUTO', threads=1,
+            image_settings=SimpleNamespace(file_format='PNG'),
+            ffmpeg=SimpleNamespace(
+                format='MPEG4', codec='H264', video_bitrate=6000, audio_codec='NONE',
+                audio_bitrate=192, audio_channels='STEREO', ffmpeg_preset='GOOD',
+                constant_rate_factor='MEDIUM',
+            ),
+        )
+        self._props = {}
+
+    def sequence_editor_create(self):
+        if self.sequence_editor is None:
+            self.sequence_editor = SequenceEditor()
+        return self.sequence_editor
+
+    def sequence_editor_clear(self):
+        self.sequence_editor = None
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        self._props[key] = value
+
+    def get(self, key, default=None):
+        return self._props.get(key, default)
+
+
+class Scenes(list):
+    def new(self, name):
+        scene = Scene(name)
+        self.append(scene)
+        CALLS["new_scene"] += 1
+        return scene
+
+    def remove(self, scene):
+        super().remove(scene)
+        CALLS["remove_scene"] += 1
+
+    def get(self, name, default=None):
+        return next((scene for scene in self if scene.name == name), default)
+
+
+data = SimpleNamespace(scenes=Scenes())
+
+
+# -----------------------------------------------------------------------------
+# APP, CONTEXT, OPS
+# -----------------------------------------------------------------------------
+class Timers:
+    def __init__(self):
+        self.pending = []
+
+    def register(self, function, first_interval=0, persistent=False):
+        self.pending.append((function, first_interval))
+
+    def is_registered(self, function):
+        return any(f is function for f, _ in self.pending)
+
+    def unregister(self, function):
+        self.pending = [(f, i) for f, i in self.pending if f is not function]
+
+    def run(self, skip=()):
+        """Run every registered timer once, except those in skip. Returns how many ran."""
+        due, self.pending = self.pending, []
+        ran = 0
+        for function, interval in due:
+            if function in skip:
+                self.pending.append((function, interval))
+                continue
+            function()
+            ran += 1
+        return ran
+
+
+app = SimpleNamespace(
+    background=True,
+    binary_path="blender",
+    version=(4, 5, 0),
+    timers=Timers(),
+    handlers=SimpleNamespace(render_pre=[], render_post=[], render_complete=[]),
+)
+
+
+class _Context(SimpleNamespace):
+    def temp_override(self, **kwargs):
+        return _NullContext()
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+context = _Context(
+    scene=None,
+    preferences=SimpleNamespace(system=SimpleNamespace(memory_cache_limit=4096)),
+)
+
+
+def _render(animation=False, write_still=False, scene=None):
+    target = data.scenes.get(scene) if scene else context.scene
+    CALLS["render"] += 1
+
+    for handler in list(app.handlers.render_pre):
+        handler(target)
+
+    output = Path(target.render.filepath)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        f.truncate(RENDER_OUTPUT_SIZE)
+
+    for handler in list(app.handlers.render_post):
+        handler(target)
+    for handler in list(app.handlers.render_complete):
+        handler(target)
+
+    return {'FINISHED'}
+
+
+def _counted(name):
+    def op(*args, **kwargs):
+        CALLS[name] += 1
+        return {'FINISHED'}
+    return op
+
+
+ops = SimpleNamespace(
+    render=SimpleNamespace(render=_render),
+    sequencer=SimpleNamespace(rebuild_proxy=_counted("rebuild_proxy")),
+    wm=SimpleNamespace(save_as_mainfile=_counted("save_as_mainfile")),
+)
+
+path = SimpleNamespace(abspath=lambda p: os.path.abspath(p[2:] if p.startswith("//") else p))
+
+reset()
@@ -0,0 +1,379 @@
+"""
+Local HTTP stand-in for both backends (generation server and editor media
+server) with configurable per-request latency and a shared bandwidth cap.
+
+Endpoints: GET /capabilities, POST /read_upload, /upload_media, /add_media,
+/probe_new_generation, /update_generation_status, /generation_complete.
+Anything else is a 404, which e.g. turns media lookahead off.
+
+Run it in its own process (BackendProcess, or `python mock_backend.py`) so
+its buffers and threads stay out of the benchmark's memory and CPU
+figures; fixtures and counters are then reached through /_bench/*
+endpoints, which are not counted.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.chunk_downloader import BandwidthLimiter  # noqa: E402
+
+OCTET_STREAM = "application/octet-stream"
+CONTROL_PREFIX = "/_bench/"
+
+
+def media_chunk(media_id, index, length):
+    """Deterministic content for one chunk of a synthetic media item."""
+    block = hashlib.sha256(f"{media_id}:{index}".encode("utf-8")).digest()
+    return (block * (length // len(block) + 1))[:length]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, every
+    # small response would wait for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    # -------------------------------------------------------------------------
+    # PLUMBING
+    # -------------------------------------------------------------------------
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        self.server.backend._transfer(len(body), 0)
+        return body
+
+    def _send(self, status, body, content_type="application/json", headers=None, count=True):
+        if count:
+            self.server.backend._transfer(0, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200, count=True):
+        self._send(status, json.dumps(payload).encode("utf-8"), count=count)
+
+    def do_GET(self):
+        backend = self.server.backend
+        if self.path == CONTROL_PREFIX + "stats":
+            return self._send_json(backend.stats(), count=False)
+
+        backend._begin(self.path)
+        if self.path == "/capabilities":
+            return self._send_json({"ok": True, "data": backend.capabilities()})
+        self._send_json({"ok": False, "message": "Not found"}, 404)
+
+    def do_POST(self):
+        if self.path.startswith(CONTROL_PREFIX):
+            return self._control()
+
+        self.server.backend._begin(self.path)
+        body = self._read_body()
+
+        route = {
+            "/read_upload": self._read_upload,
+            "/upload_media": self._upload_media,
+            "/add_media": self._add_media,
+            "/probe_new_generation": self._probe,
+            "/update_generation_status": self._update_status,
+            "/generation_complete": self._generation_complete,
+        }.get(self.path)
+
+        if route is None:
+            return self._send_json({"ok": False, "message": "Not found"}, 404)
+        route(body)
+
+    def _control(self):
+        backend = self.server.backend
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"null")
+        command = self.path[len(CONTROL_PREFIX):]
+
+        if command == "reset":
+            backend.reset_stats()
+        elif command == "media":
+            for media_id, size in payload.items():
+                backend.add_media(media_id, size)
+        elif command == "generations":
+            for generation in payload:
+                backend.queue_generation(generation)
+        else:
+            return self._send_json({"ok": False}, 404, count=False)
+
+        self._send_json({"ok": True}, count=False)
+
+    # -------------------------------------------------------------------------
+    # ROUTES
+    # -------------------------------------------------------------------------
+    def _read_upload(self, body):
+        backend = self.server.backend
+        payload = json.loads(body)
+        media_id, index = payload["media_id"], payload["index"]
+
+        size = backend.media.get(media_id)
+        if size is None:
+            return self._send_json({"ok": False, "message": f"Unknown media {media_id}"}, 404)
+
+        total_chunks = max(1, -(-size // backend.chunk_size))
+        if not 0 <= index < total_chunks:
+            return self._send_json({"ok": False, "message": f"No chunk {index}"})
+
+        length = min(backend.chunk_size, size - index * backend.chunk_size)
+        chunk = media_chunk(media_id, index, length)
+
+        if backend.binary and self.headers.get("Accept", "").startswith(OCTET_STREAM):
+            return self._send(200, chunk, OCTET_STREAM, {"X-Total-Chunks": str(total_chunks)})
+
+        self._send_json({
+            "ok": True,
+            "data": {"chunk": base64.b64encode(chunk).decode("ascii"), "total_chunks": total_chunks},
+        })
+
+    def _upload_media(self, body):
+        if self.headers.get("Content-Type", "").startswith(OCTET_STREAM):
+            media_id = self.headers["X-Media-Id"]
+            size = len(body)
+        else:
+            payload = json.loads(body)
+            media_id = payload["media_id"]
+            size = len(base64.b64decode(payload["chunk"]))
+
+        self.server.backend._record("uploaded", media_id, size)
+        self._send_json({"ok": True})
+
+    def _add_media(self, body):
+        payload = json.loads(body)
+        self.server.backend._record("added", payload["_id"], payload)
+        self._send_json({"ok": True, "data": payload})
+
+    def _probe(self, body):
+        generation = self.server.backend._next_generation()
+        if generation is None:
+            return self._send_json({"ok": False, "message": "No pending generation"})
+        self._send_json({"ok": True, "data": generation})
+
+    def _update_status(self, body):
+        payload = json.loads(body)
+        self.server.backend._record("statuses", payload["_id"], payload["status"])
+        self._send_json({"ok": True})
+
+    def _generation_complete(self, body):
+        payload = json.loads(body)
+        self.server.backend._record("completed", payload["_id"], payload)
+        self._send_json({"ok": True})
+
+
+class MockBackend:
+    """
+    latency: seconds added to every request
+    bandwidth: bytes per second shared by all request and response bodies (None = unlimited)
+    chunk_size: size of the chunks /read_upload serves
+    binary: advertise and serve raw octet-stream chunks
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, chunk_size=256 * 1024, binary=True):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.binary = binary
+
+        self.media = {}
+        self.generations = []
+
+        self._lock = threading.Lock()
+        self._limiter = BandwidthLimiter(bandwidth, burst=chunk_size) if bandwidth else None
+        self._server = None
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.backend = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # -------------------------------------------------------------------------
+    # FIXTURES
+    # -------------------------------------------------------------------------
+    def capabilities(self):
+        return {"chunk_transport": ["binary", "json"] if self.binary else ["json"], "probe_long_poll": 0}
+
+    def add_media(self, media_id, size):
+        self.media[media_id] = size
+
+    def queue_generation(self, generation):
+        with self._lock:
+            self.generations.append(generation)
+
+    def _next_generation(self):
+        with self._lock:
+            return self.generations.pop(0) if self.generations else None
+
+    # -------------------------------------------------------------------------
+    # ACCOUNTING
+    # -------------------------------------------------------------------------
+    def reset_stats(self):
+        with self._lock:
+            self.requests = Counter()
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.uploaded = {}
+            self.added = {}
+            self.statuses = {}
+            self.completed = {}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+            }
+
+    def _begin(self, path):
+        with self._lock:
+            self.requests[path] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _transfer(self, nbytes_in, nbytes_out):
+        with self._lock:
+            self.bytes_in += nbytes_in
+            self.bytes_out += nbytes_out
+        if self._limiter and (nbytes_in or nbytes_out):
+            self._limiter.consume(nbytes_in + nbytes_out)
+
+    def _record(self, kind, key, value):
+        with self._lock:
+            records = getattr(self, kind)
+            if kind == "uploaded":
+                records[key] = records.get(key, 0) + value
+            elif kind == "statuses":
+                records.setdefault(key, []).append(value)
+            else:
+                records[key] = value
+
+
+class BackendProcess:
+    """
+    MockBackend running in a child process, with the same fixture and
+    counter methods.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, chunk_size=256 * 1024, binary=True):
+        args = [
+            sys.executable, str(Path(__file__).resolve()),
+            "--latency", str(latency),
+            "--chunk-size", str(chunk_size),
+        ]
+        if bandwidth:
+            args += ["--bandwidth", str(bandwidth)]
+        if not binary:
+            args.append("--json-only")
+
+        self._process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        self.url = self._process.stdout.readline().strip()
+        if not self.url:
+            self._process.kill()
+            raise RuntimeError("Mock backend failed to start")
+
+    def _call(self, command, payload=None):
+        if payload is None and command == "stats":
+            request = urllib.request.Request(self.url + CONTROL_PREFIX + command)
+        else:
+            request = urllib.request.Request(
+                self.url + CONTROL_PREFIX + command,
+                data=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+
+    def add_media(self, media_id, size):
+        self._call("media", {media_id: size})
+
+    def add_media_items(self, sizes):
+        self._call("media", sizes)
+
+    def queue_generation(self, generation):
+        self._call("generations", [generation])
+
+    def reset_stats(self):
+        self._call("reset", {})
+
+    def stats(self):
+        return self._call("stats")
+
+    def stop(self):
+        if self._process.poll() is None:
+            # Closing stdin tells the child to exit
+            self._process.stdin.close()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock generation/editor backend for benchmarks")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--bandwidth", type=float, help="Bytes per second shared by all transfers")
+    parser.add_argument("--chunk-size", type=int, default=256 * 1024, help="Chunk size /read_upload serves")
+    parser.add_argument("--json-only", action="store_true", help="Do not offer binary chunk transport")
+    args = parser.parse_args(argv)
+
+    backend = MockBackend(args.latency, args.bandwidth, args.chunk_size, binary=not args.json_only).start()
+    print(backend.url, flush=True)
+
+    # Serve until the parent closes stdin (or Ctrl-C when run by hand)
+    try:
+        sys.stdin.read()
+    except KeyboardInterrupt:
+        pass
+    backend.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Offline benchmarks for the build, media download, upload and job pickup
+paths. Needs neither Blender nor network: bpy is the fake_bpy stand-in and
+both backends are a local mock_backend process.
+
+    python test/bench/run_bench.py                   # run, compare with both baselines
+    python test/bench/run_bench.py --save-baseline   # store this machine's timings (baseline.local.json)
+    python test/bench/run_bench.py --save-counts     # store the request counts (baseline.json)
+    python test/bench/run_bench.py --latency 0.05 --bandwidth 5e6 --tracks 8 --clips 50
+
+Each scenario reports wall time, bytes per second through the mock,
+request counts and peak Python memory (tracemalloc). Results are compared
+with two baselines, each only when recorded with the same parameters:
+
+- baseline.json (committed) holds what does not depend on the machine:
+  request counts per path, bytes moved and strips created. A scenario
+  regresses when it makes more requests or creates more strips at all, or
+  moves more bytes by more than --tolerance.
+- baseline.local.json (git-ignored) holds wall time, throughput and peak
+  memory recorded on this machine. A scenario regresses when it is slower,
+  uses more memory or moves less data per second by more than --tolerance.
+
+Exits with status 1 on any regression.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parents[1]))
+sys.path.insert(0, str(BENCH_DIR))
+
+import fake_bpy  # noqa: E402
+from mock_backend import BackendProcess  # noqa: E402
+from synthetic import make_generation, make_instruction  # noqa: E402
+
+# Machine-independent counts, committed
+COUNTS_PATH = BENCH_DIR / "baseline.json"
+# Timings from this machine only, git-ignored
+BASELINE_PATH = BENCH_DIR / "baseline.local.json"
+
+COUNT_KEYS = ("requests", "requests_by_path", "bytes", "strips")
+
+# Media sizes served by the mock, by kind
+MEDIA_SIZES = {"video": 2 * 1024 * 1024, "audio": 512 * 1024, "image": 128 * 1024}
+
+
+# -----------------------------------------------------------------------------
+# MEASUREMENT
+# -----------------------------------------------------------------------------
+def measure_once(backend, run):
+    """Run run() once and return its metrics."""
+    backend.reset_stats()
+    fake_bpy.CALLS.clear()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        run()
+    finally:
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stats = backend.stats()
+    transferred = stats["bytes_in"] + stats["bytes_out"]
+    return {
+        "seconds": round(seconds, 4),
+        "bytes": transferred,
+        "bytes_per_second": round(transferred / seconds) if seconds > 0 else 0,
+        "requests": sum(stats["requests"].values()),
+        "requests_by_path": stats["requests"],
+        "peak_memory": peak,
+        "strips": sum(n for call, n in fake_bpy.CALLS.items() if call.startswith("new_") and call != "new_scene"),
+    }
+
+
+def reset_process_state():
+    """
+    Forget what the process learned about the backend once per session
+    (chunk transports, lookahead support), so every round makes the same
+    requests whichever scenario ran first.
+    """
+    from core import poll_server
+    from core.media_resolver import MediaResolver
+
+    with MediaResolver._capabilities_lock:
+        MediaResolver._capabilities.clear()
+    poll_server.LOOKAHEAD.supported = True
+
+
+def measure(backend, prepare, rounds):
+    """
+    Best of `rounds` runs. prepare(round) sets up untimed fixtures and
+    returns the function to time; the fastest round is reported, with the
+    highest request count and peak memory seen in any round.
+    """
+    results = []
+    for round_index in range(rounds):
+        fake_bpy.reset()
+        reset_process_state()
+        results.append(measure_once(backend, prepare(round_index)))
+
+    best = dict(min(results, key=lambda r: r["seconds"]))
+    best["requests"] = max(r["requests"] for r in results)
+    best["peak_memory"] = max(r["peak_memory"] for r in results)
+    return best
+
+
+# -----------------------------------------------------------------------------
+# SCENARIOS
+# -----------------------------------------------------------------------------
+def register_media(backend, media):
+    backend.add_media_items({media_id: MEDIA_SIZES[kind] for media_id, kind in media.items()})
+
+
+def scenario_build(backend, args, warm):
+    """VSEBuilder.build of a tracks x clips timeline; cold downloads every media item, warm hits the cache."""
+    from core.generation_scene import create_generation_scene, teardown_generation_scene
+    from core.vse_builder import VSEBuilder
+
+    def prepare(round_index):
+        namespace = "build_warm" if warm else f"build_cold{round_index}"
+        instruction, media = make_instruction(args.tracks, args.clips, args.media_pool, namespace=namespace)
+        register_media(backend, media)
+
+        def run():
+            scene = create_generation_scene("bench_build")
+            VSEBuilder(instruction, scene=scene).build()
+            teardown_generation_scene(scene)
+
+        if warm:
+            run()
+        return run
+
+    return measure(backend, prepare, args.rounds)
+
+
+def scenario_resolve(backend, args):
+    """_resolve_media for every distinct media item, one at a time, from an empty cache."""
+    from core.vse_builder import VSEBuilder
+
+    def prepare(round_index):
+        _, media = make_instruction(args.tracks, args.clips, args.media_pool, namespace=f"resolve{round_index}")
+        register_media(backend, media)
+        clip_refs = [{"_id": media_id, "type": kind} for media_id, kind in media.items()]
+
+        builder = VSEBuilder({})
+        builder.resolving_media = True
+
+        def run():
+            for clip_ref in clip_refs:
+                if builder._resolve_media(clip_ref) is None:
+                    raise RuntimeError(f"Could not resolve {clip_ref['_id']}")
+
+        return run
+
+    return measure(backend, prepare, args.rounds)
+
+
+def scenario_upload(backend, args):
+    """upload_rendered_media of an args.upload_mb rendered file, then /add_media."""
+    from core.vse_builder import VSEBuilder
+
+    def prepare(round_index):
+        builder = VSEBuilder({"name": "bench upload"})
+        output = Path(tempfile.mkdtemp(prefix="upload_", dir=os.environ["HOME"])) / "render.mp4"
+        with open(output, "wb") as f:
+            f.write(os.urandom(int(args.upload_mb * 1024 * 1024)))
+        builder.scene.render.filepath = str(output)
+
+        def run():
+            if builder.upload_rendered_media() is None:
+                raise RuntimeError("Upload failed")
+
+        return run
+
+    return measure(backend, prepare, args.rounds)
+
+
+def scenario_poll(backend, args):
+    """
+    poll_backend_for_render end to end for args.generations queued jobs
+    (probe, build, stand-in render, upload, completion), then one empty probe.
+    """
+    from core import poll_server
+
+    def prepare(round_index):
+        generations = []
+        for index in range(args.generations):
+            instruction, media = make_instruction(
+                max(1, args.tracks // 2), max(1, args.clips // 4), args.media_pool,
+                namespace=f"poll{round_index}_{index}"
+            )
+            register_media(backend, media)
+            generation = make_generation(instruction, round_index * args.generations + index)
+            backend.queue_generation(generation)
+            generations.append(generation)
+
+        def run():
+            for _ in range(len(generations) + 1):
+                poll_server.poll_backend_for_render()
+                # Deferred scene teardown; the re-armed poll timer is driven here instead
+                fake_bpy.app.timers.run(skip=(poll_server.poll_backend_for_render,))
+                fake_bpy.app.timers.pending.clear()
+
+            if poll_server.IS_RENDERING:
+                raise RuntimeError("Render job did not finish")
+            poll_server.LOOKAHEAD.stop()
+
+        return run
+
+    return measure(backend, prepare, args.rounds)
+
+
+# -----------------------------------------------------------------------------
+# BASELINE
+# -----------------------------------------------------------------------------
+def compare_counts(results, baseline, tolerance):
+    """Regression messages for the request, byte and strip counts against baseline.json."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["requests"] > previous["requests"]:
+            regressions.append(f"{name}: {current['requests']} requests vs {previous['requests']}")
+            for path, count in sorted(current["requests_by_path"].items()):
+                before = previous["requests_by_path"].get(path, 0)
+                if count > before:
+                    regressions.append(f"{name}: {path} {count} vs {before}")
+        if current["strips"] > previous["strips"]:
+            regressions.append(f"{name}: {current['strips']} strips vs {previous['strips']}")
+        if current["bytes"] > previous["bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: {current['bytes'] / 1e6:.1f} MB moved vs {previous['bytes'] / 1e6:.1f} MB")
+
+    return regressions
+
+
+def compare_timings(results, baseline, tolerance):
+    """Regression messages for wall time, peak memory and throughput against this machine's baseline."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        if current["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {current['seconds']:.3f}s vs {previous['seconds']:.3f}s")
+        if current["peak_memory"] > previous["peak_memory"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak memory {current['peak_memory'] / 1e6:.1f} MB vs {previous['peak_memory'] / 1e6:.1f} MB"
+            )
+        if previous["bytes_per_second"] and current["bytes_per_second"] < previous["bytes_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {current['bytes_per_second'] / 1e6:.1f} MB/s vs {previous['bytes_per_second'] / 1e6:.1f} MB/s"
+            )
+
+    return regressions
+
+
+def load_baseline(path, params):
+    """A baseline's results, or None (with a note) if it is missing or used other parameters."""
+    if not path.exists():
+        print(f"No {path.name} to compare with")
+        return None
+
+    baseline = json.loads(path.read_text())
+    if baseline.get("params") != params:
+        print(f"{path.name} was recorded with different parameters, not comparing")
+        return None
+
+    return baseline["results"]
+
+
+def report(results):
+    lines = [f"{'scenario':<12} {'seconds':>9} {'MB/s':>8} {'requests':>9} {'peak MB':>8} {'strips':>7}"]
+    for name, r in results.items():
+        lines.append(
+            f"{name:<12} {r['seconds']:>9.3f} {r['bytes_per_second'] / 1e6:>8.1f} "
+            f"{r['requests']:>9} {r['peak_memory'] / 1e6:>8.1f} {r['strips']:>7}"
+        )
+    return "\n".join(lines)
+
+
+# -----------------------------------------------------------------------------
+# ENTRY POINT
+# -----------------------------------------------------------------------------
+SCENARIOS = ("build_cold", "build_warm", "resolve", "upload", "poll")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Offline VSE Instructor benchmarks")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--tracks", type=int, default=8, help="Tracks in the synthetic instruction")
+    parser.add_argument("--clips", type=int, default=40, help="Clips per track")
+    parser.add_argument("--media-pool", type=int, default=6, help="Distinct media items per track kind")
+    parser.add_argument("--upload-mb", type=float, default=64, help="Size of the uploaded render")
+    parser.add_argument("--generations", type=int, default=3, help="Jobs queued for the poll scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock backend seconds per request")
+    parser.add_argument("--bandwidth", type=float, help="Mock backend bytes per second (default: unlimited)")
+    parser.add_argument("--chunk-size", type=int, default=256 * 1024, help="Mock /read_upload chunk size")
+    parser.add_argument("--json-only", action="store_true", help="Mock offers only JSON/base64 chunks")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per scenario; the fastest is reported")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown before flagging (wall times are noisy)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="This machine's timing baseline")
+    parser.add_argument("--counts", type=Path, default=COUNTS_PATH, help="Committed request/byte/strip count baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these timings as this machine's baseline")
+    parser.add_argument("--save-counts", action="store_true", help="Store these request, byte and strip counts")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def params_of(args):
+    keys = ("rounds", "tracks", "clips", "media_pool", "upload_mb", "generations", "latency", "bandwidth", "chunk_size", "json_only")
+    return {key: getattr(args, key) for key in keys}
+
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    scenarios = args.scenarios or SCENARIOS
+
+    # Cache, render log and upload progress all live under $HOME
+    home = tempfile.TemporaryDirectory(prefix="vse_bench_")
+    os.environ["HOME"] = home.name
+
+    fake_bpy.install()
+    from core.logger import Logger
+    from core.vse_builder import VSEBuilder
+    from core import poll_server
+
+    Logger.set_level("ERROR")
+
+    with BackendProcess(args.latency, args.bandwidth, args.chunk_size, binary=not args.json_only) as backend:
+        VSEBuilder.server_url = VSEBuilder.editor_url = backend.url
+        # The stand-in has no ffprobe to plan a stream copy with
+        VSEBuilder.smart_render = False
+        poll_server.POLLER.server_url = poll_server.LOOKAHEAD.server_url = backend.url
+
+        runners = {
+            "build_cold": lambda: scenario_build(backend, args, warm=False),
+            "build_warm": lambda: scenario_build(backend, args, warm=True),
+            "resolve": lambda: scenario_resolve(backend, args),
+            "upload": lambda: scenario_upload(backend, args),
+            "poll": lambda: scenario_poll(backend, args),
+        }
+
+        results = {}
+        for name in scenarios:
+            results[name] = runners[name]()
+
+    home.cleanup()
+    print(report(results))
+
+    document = {"params": params_of(args), "results": results}
+    if args.json:
+        args.json.write_text(json.dumps(document, indent=2) + "\n")
+
+    if args.save_counts:
+        counts = {name: {key: r[key] for key in COUNT_KEYS} for name, r in results.items()}
+        args.counts.write_text(json.dumps({"params": document["params"], "results": counts}, indent=2) + "\n")
+        print(f"Counts saved to {args.counts}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Timing baseline saved to {args.baseline}")
+    if args.save_counts or args.save_baseline:
+        return 0
+
+    regressions = []
+    counts = load_baseline(args.counts, document["params"])
+    if counts is not None:
+        regressions += compare_counts(results, counts, args.tolerance)
+    baseline = load_baseline(args.baseline, document["params"])
+    if baseline is None:
+        print("Run with --save-baseline to compare timings on this machine")
+    else:
+        regressions += compare_timings(results, baseline, args.tolerance)
+
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions and (counts is not None or baseline is not None):
+        print(f"No regressions (tolerance {args.tolerance:.0%})")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Synthetic instructions: N tracks x M clips laid end to end, cycling through
+video, audio, image and text tracks. Media items are drawn from a pool so
+that larger timelines reuse media the way real edits do.
+"""
+from datetime import datetime, timezone
+
+TRACK_KINDS = ("video", "audio", "image", "text")
+MIME = {"video": "video/mp4", "audio": "audio/mpeg", "image": "image/png"}
+EXTENSIONS = {"video": "mp4", "audio": "mp3", "image": "png"}
+
+
+def make_instruction(
+    tracks, clips, media_pool=8, clip_ms=2000, fps=24, kinds=TRACK_KINDS, output=None, namespace="bench"
+):
+    """
+    Returns (instruction, media) where media maps each media _id the
+    instruction uses to its kind. media_pool is the number of distinct media
+    items per track kind; namespace prefixes every media _id, so instructions
+    with different namespaces share no cached media.
+    """
+    raw_tracks = []
+    media = {}
+
+    for t in range(tracks):
+        kind = kinds[t % len(kinds)]
+        # Video clips also take the channel above for their audio
+        layer = min(1 + 2 * t, 127)
+
+        raw_clips = []
+        for c in range(clips):
+            clip_ref = {"type": kind}
+            if kind == "text":
+                clip_ref["text"] = f"Caption {t}.{c}"
+            else:
+                media_id = f"{namespace}_{kind}_{(t * clips + c) % media_pool:04d}"
+                clip_ref.update({
+                    "_id": media_id,
+                    "mime": MIME[kind],
+                    "title": f"{media_id}.{EXTENSIONS[kind]}",
+                })
+                if kind == "video" and c % 2:
+                    clip_ref["cut"] = {"start": 500, "end": clip_ms + 500}
+                media[media_id] = kind
+
+            raw_clips.append({
+                "instanceId": f"t{t}_c{c}",
+                "clip_ref": clip_ref,
+                "start_ms": c * clip_ms,
+                "duration_ms": clip_ms,
+                "layer": layer,
+            })
+
+        raw_tracks.append({"id": f"track_{t}", "type": kind, "clips": raw_clips})
+
+    instruction = {
+        "name": f"bench {tracks}x{clips}",
+        "editor": "bench",
+        "sequence": {"fps": fps, "tracks": raw_tracks},
+        "output": dict(output or {}),
+    }
+    return instruction, media
+
+
+def make_generation(instruction, index):
+    return {
+        "_id": f"bench_generation_{index:05d}",
+        "config": instruction,
+        "queued_at": datetime.now(timezone.utc).isoformat(),
+    }
@@ -0,0 +1,244 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core import media_resolver
+from core.cache_manifest import CacheManifest
+from core.chunk_downloader import ChunkDownloader, ChunkDownloadError, PartsSink, StreamSink
+from core.logger import Logger
+from core.media_cache import MediaCache
+from core.media_resolver import MediaResolver
+
+CHUNK_SIZE = 1000
+MEDIA_ID = "media1"
+
+
+class FakeServer:
+    """
+    Serves data in CHUNK_SIZE chunks as a fetch_chunk callable. Indices in
+    failing raise on every attempt; fetched lists every chunk served.
+    """
+
+    def __init__(self, data, chunk_size=CHUNK_SIZE):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.total_chunks = -(-len(data) // chunk_size)
+        self.failing = set()
+        self.fetched = []
+        self._lock = threading.Lock()
+
+    def __call__(self, media_id, index):
+        if index in self.failing:
+            raise OSError(f"chunk {index} unavailable")
+        with self._lock:
+            self.fetched.append(index)
+        start = index * self.chunk_size
+        return self.data[start:start + self.chunk_size], self.total_chunks
+
+
+@pytest.fixture
+def data():
+    # Not a multiple of the chunk size, so the last chunk is short
+    return os.urandom(7 * CHUNK_SIZE + 321)
+
+
+@pytest.fixture
+def server(data):
+    return FakeServer(data)
+
+
+def downloader(server):
+    return ChunkDownloader(server, max_workers=3, retries=0)
+
+
+def fail_at(sink, server, index):
+    """
+    Download into sink with chunk index failing. Returns the chunks stored
+    before the failure; which ones depends on how far the other workers got
+    before the rest were cancelled.
+    """
+    server.failing = {index}
+    with pytest.raises(ChunkDownloadError):
+        downloader(server).download(MEDIA_ID, sink)
+    sink.discard()
+
+    stored = set(server.fetched)
+    server.failing = set()
+    server.fetched = []
+    return stored
+
+
+def missing(server, stored):
+    return sorted(set(range(server.total_chunks)) - stored)
+
+
+# -----------------------------------------------------------------------------
+# StreamSink
+# -----------------------------------------------------------------------------
+def test_stream_download_publishes_the_whole_file(tmp_path, server, data):
+    final_path = tmp_path / "final.mp4"
+    manifest = CacheManifest(tmp_path, MEDIA_ID)
+    sink = StreamSink(final_path, manifest)
+
+    assert downloader(server).download(MEDIA_ID, sink) == 8
+    sink.publish()
+
+    assert final_path.read_bytes() == data
+    assert not sink.partial_path.exists()
+    assert CacheManifest.load(tmp_path).verify_final_quick(final_path)
+
+
+def test_stream_resume_continues_from_the_failed_chunk(tmp_path, server, data):
+    final_path = tmp_path / "final.mp4"
+    sink = StreamSink(final_path, CacheManifest(tmp_path, MEDIA_ID))
+    stored = fail_at(sink, server, 5)
+    assert sink.partial_path.exists()
+
+    sink = StreamSink(final_path, CacheManifest.load(tmp_path, MEDIA_ID))
+
+    assert sink.resume() == len(stored)
+    downloader(server).download(MEDIA_ID, sink)
+    sink.publish()
+
+    assert 5 in server.fetched
+    assert sorted(server.fetched) == missing(server, stored)
+    assert final_path.read_bytes() == data
+
+
+def test_truncated_partial_refetches_the_lost_chunks(tmp_path, server, data):
+    final_path = tmp_path / "final.mp4"
+    sink = StreamSink(final_path, CacheManifest(tmp_path, MEDIA_ID))
+    stored = fail_at(sink, server, 7)
+
+    # Lose the end of the file part-way through chunk 3
+    with open(sink.partial_path, "r+b") as f:
+        f.truncate(3 * CHUNK_SIZE + 10)
+    stored = {index for index in stored if index < 3}
+
+    sink = StreamSink(final_path, CacheManifest.load(tmp_path, MEDIA_ID))
+
+    assert sink.resume() == len(stored)
+    downloader(server).download(MEDIA_ID, sink)
+    sink.publish()
+
+    assert sorted(server.fetched) == missing(server, stored)
+    assert final_path.read_bytes() == data
+
+
+def test_chunk_of_the_wrong_size_is_rejected(tmp_path):
+    server = FakeServer(os.urandom(3 * CHUNK_SIZE))
+    original = FakeServer.__call__
+
+    def uneven(media_id, index):
+        binary, total = original(server, media_id, index)
+        return (binary[:-1] if index == 1 else binary), total
+
+    sink = StreamSink(tmp_path / "final.mp4", CacheManifest(tmp_path, MEDIA_ID))
+    with pytest.raises(ChunkDownloadError, match="Chunk 1 is 999 bytes"):
+        ChunkDownloader(uneven, max_workers=1, retries=0).download(MEDIA_ID, sink)
+
+
+# -----------------------------------------------------------------------------
+# PartsSink
+# -----------------------------------------------------------------------------
+def test_parts_resume_refetches_missing_and_corrupt_parts(tmp_path, server, data):
+    chunks_dir = tmp_path / "chunks"
+    chunks_dir.mkdir()
+    sink = PartsSink(chunks_dir, CacheManifest(tmp_path, MEDIA_ID))
+    stored = fail_at(sink, server, 4)
+
+    # Damage a part that was stored intact; chunk 0 is always fetched first
+    sink.part_path(0).write_bytes(b"x" * CHUNK_SIZE)
+    stored.discard(0)
+
+    sink = PartsSink(chunks_dir, CacheManifest.load(tmp_path, MEDIA_ID))
+
+    assert sink.resume() == len(stored)
+    downloader(server).download(MEDIA_ID, sink)
+    sink.publish(tmp_path / "final.mp4")
+
+    assert {0, 4} <= set(server.fetched)
+    assert sorted(server.fetched) == missing(server, stored)
+    assert (tmp_path / "final.mp4").read_bytes() == data
+    assert not chunks_dir.exists()
+
+
+# -----------------------------------------------------------------------------
+# MediaResolver
+# -----------------------------------------------------------------------------
+@pytest.fixture
+def resolver(tmp_path, monkeypatch, server):
+    cache = MediaCache(tmp_path / "cache")
+    monkeypatch.setattr(media_resolver, "MEDIA_CACHE", cache)
+    monkeypatch.setattr(MediaResolver, "download_retries", 0)
+
+    resolver = MediaResolver("http://editor", Logger())
+    resolver._fetch_chunk = server
+    resolver.cache = cache
+    return resolver
+
+
+CLIP_REF = {"_id": MEDIA_ID, "mime": "video/mp4"}
+
+
+def test_full_verify_refetches_only_the_corrupt_chunk(resolver, server, data, monkeypatch):
+    path = Path(resolver.resolve(CLIP_REF))
+
+    with open(path, "r+b") as f:
+        f.seek(2 * CHUNK_SIZE + 5)
+        f.write(b"\0" * 3)
+
+    # Quick mode only checks the size, so the damage goes unnoticed
+    server.fetched = []
+    assert resolver.resolve(CLIP_REF) == str(path)
+    assert server.fetched == []
+
+    monkeypatch.setattr(MediaResolver, "cache_verify", "full")
+    assert resolver.resolve(CLIP_REF) == str(path)
+
+    assert server.fetched == [2]
+    assert path.read_bytes() == data
+
+
+def test_failed_download_resumes_on_the_next_resolve(resolver, server, data):
+    server.failing = {6}
+    assert resolver.resolve(CLIP_REF) is None
+
+    stored = set(server.fetched)
+    server.failing = set()
+    server.fetched = []
+    path = resolver.resolve(CLIP_REF)
+
+    assert 6 in server.fetched
+    assert sorted(server.fetched) == missing(server, stored)
+    assert Path(path).read_bytes() == data
+
+
+def test_legacy_file_without_manifest_is_adopted(resolver, server, data):
+    media_dir = resolver.cache.entry_dir(MEDIA_ID)
+    media_dir.mkdir(parents=True)
+    (media_dir / "final.mp4").write_bytes(data)
+
+    path = resolver.resolve(CLIP_REF)
+
+    # Only chunk 0 is fetched, to check the file against the server
+    assert server.fetched == [0]
+    assert Path(path).read_bytes() == data
+    assert CacheManifest.load(media_dir).total_chunks == server.total_chunks
+
+
+def test_legacy_file_that_does_not_match_is_downloaded_again(resolver, server, data):
+    media_dir = resolver.cache.entry_dir(MEDIA_ID)
+    media_dir.mkdir(parents=True)
+    (media_dir / "final.mp4").write_bytes(b"stale" * 100)
+
+    path = resolver.resolve(CLIP_REF)
+
+    assert sorted(server.fetched) == [0] + list(range(server.total_chunks))
+    assert Path(path).read_bytes() == data
@@ -0,0 +1,182 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.chunk_uploader import ChunkUploader, ChunkUploadError, UploadProgress
+
+CHUNK_SIZE = 1000
+OWNER = "gen1"
+
+
+class FakeClient:
+    """
+    Stands in for the backend as an upload_chunk callable. Indices in
+    failing raise on every attempt, indices in refused get {"ok": False};
+    received maps media_id to {index: chunk_bytes}.
+    """
+
+    def __init__(self):
+        self.failing = set()
+        self.refused = set()
+        self.received = {}
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, media_id, index, chunk_bytes, total_chunks):
+        if index in self.failing:
+            raise OSError(f"chunk {index} lost")
+        if index in self.refused:
+            return {"ok": False, "message": "bad chunk"}
+        with self._lock:
+            self.sent.append(index)
+            self.received.setdefault(media_id, {})[index] = chunk_bytes
+        return {"ok": True}
+
+    def assembled(self, media_id):
+        chunks = self.received[media_id]
+        return b"".join(chunks[index] for index in sorted(chunks))
+
+
+@pytest.fixture
+def render(tmp_path):
+    path = tmp_path / "render.mp4"
+    path.write_bytes(os.urandom(4 * CHUNK_SIZE + 17))
+    return path
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+def uploader(client):
+    return ChunkUploader(client, max_workers=3, retries=0, backoff=0)
+
+
+def interrupt(render, client, index):
+    """Upload render with chunk index failing. Returns the progress and the chunks acknowledged."""
+    progress = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+    client.failing = {index}
+    with pytest.raises(ChunkUploadError):
+        uploader(client).upload(progress)
+
+    acked = set(client.sent)
+    client.failing = set()
+    client.sent = []
+    return progress, acked
+
+
+# -----------------------------------------------------------------------------
+# ChunkUploader
+# -----------------------------------------------------------------------------
+def test_upload_sends_every_chunk_and_records_them(render, client):
+    progress = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+
+    uploader(client).upload(progress)
+
+    assert progress.total_chunks == 5
+    assert progress.pending() == []
+    assert client.assembled(progress.media_id) == render.read_bytes()
+
+
+def test_resumed_upload_skips_acknowledged_chunks(render, client):
+    progress, acked = interrupt(render, client, 3)
+
+    resumed = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+    assert resumed.media_id == progress.media_id
+    assert resumed.acked == acked
+
+    uploader(client).upload(resumed)
+
+    assert 3 in client.sent
+    assert sorted(client.sent) == sorted(set(range(5)) - acked)
+    assert client.assembled(progress.media_id) == render.read_bytes()
+
+
+def test_refused_chunk_is_not_acknowledged(render, client):
+    progress = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+    client.refused = {2}
+
+    with pytest.raises(ChunkUploadError, match="Server refused chunk 2"):
+        uploader(client).upload(progress)
+
+    assert 2 not in progress.acked
+
+
+# -----------------------------------------------------------------------------
+# UploadProgress matching
+# -----------------------------------------------------------------------------
+def test_progress_is_saved_beside_the_file(render, client):
+    progress, _ = interrupt(render, client, 1)
+
+    assert progress.path == render.with_name("render.mp4.upload.json")
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER).media_id == progress.media_id
+
+
+def test_progress_of_another_owner_is_not_used(render, client):
+    progress, _ = interrupt(render, client, 1)
+
+    assert UploadProgress.find(render, CHUNK_SIZE, owner="gen2") is None
+
+    other = UploadProgress.load_or_create(render, CHUNK_SIZE, owner="gen2")
+    assert other.media_id != progress.media_id
+    assert other.acked == set()
+
+
+def test_progress_is_stale_once_the_file_changes_size(render, client):
+    progress, _ = interrupt(render, client, 1)
+
+    with open(render, "ab") as f:
+        f.write(b"more")
+
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER) is None
+    fresh = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+    assert fresh.media_id != progress.media_id
+    assert fresh.pending() == list(range(5))
+
+
+def test_progress_is_stale_once_the_file_is_rewritten(render, client):
+    progress, _ = interrupt(render, client, 1)
+
+    # Same size, rendered again later
+    stat = render.stat()
+    os.utime(render, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER) is None
+    fresh = UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER)
+    assert fresh.media_id != progress.media_id
+
+    # The stale progress was replaced
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER).media_id == fresh.media_id
+
+
+def test_progress_for_another_chunk_size_is_not_used(render, client):
+    interrupt(render, client, 1)
+
+    assert UploadProgress.find(render, CHUNK_SIZE * 2, owner=OWNER) is None
+
+
+def test_unreadable_progress_is_discarded(render):
+    render.with_name("render.mp4.upload.json").write_text("{not json")
+
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER) is None
+    assert UploadProgress.load_or_create(render, CHUNK_SIZE, owner=OWNER).acked == set()
+
+
+def test_find_without_a_rendered_file_returns_none(tmp_path):
+    assert UploadProgress.find(tmp_path / "missing.mp4", CHUNK_SIZE, owner=OWNER) is None
+
+
+def test_clear_removes_the_progress(render, client):
+    progress, _ = interrupt(render, client, 1)
+
+    progress.clear()
+
+    assert not progress.path.exists()
+    assert UploadProgress.find(render, CHUNK_SIZE, owner=OWNER) is None
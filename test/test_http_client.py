@@ -0,0 +1,160 @@
+import gzip
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.http_client import HttpClient, HttpError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        with server.lock:
+            server.requests.append(self.path)
+            server.ports.add(self.client_address[1])
+            failures = server.failures.get(self.path, 0)
+            if failures:
+                server.failures[self.path] = failures - 1
+
+        if failures:
+            return self._send(503, b"busy")
+        if self.path == "/json":
+            return self._send(200, json.dumps({"ok": True, "echo": json.loads(body or b"null")}).encode())
+        if self.path == "/gzip":
+            payload = b"compressed " * 100
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                return self._send(200, gzip.compress(payload), {"Content-Encoding": "gzip"})
+            return self._send(200, payload)
+        if self.path == "/close":
+            self.close_connection = True
+            return self._send(200, b"bye", {"Connection": "close"})
+        return self._send(404, b"missing")
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.ports = set()
+    server.failures = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client():
+    client = HttpClient(timeout=5, retries=3, backoff=0)
+    yield client
+    client.close()
+
+
+def test_keep_alive_reuses_one_connection(server, client):
+    for _ in range(5):
+        assert client.request("GET", f"{server.url}/json").status == 200
+
+    assert len(server.requests) == 5
+    assert len(server.ports) == 1
+
+
+def test_connection_close_opens_a_new_connection(server, client):
+    client.request("GET", f"{server.url}/close")
+    client.request("GET", f"{server.url}/close")
+
+    assert len(server.ports) == 2
+
+
+def test_stale_pooled_connection_is_replaced_without_spending_a_retry(server, client):
+    client.request("GET", f"{server.url}/json")
+
+    # Drop the server side of the pooled connection
+    conn = client._pool(("http", "127.0.0.1", server.server_address[1])).queue[0]
+    conn.sock.close()
+    conn.sock = None
+
+    assert client.request("GET", f"{server.url}/json", retries=0).status == 200
+
+
+def test_gzip_body_is_decoded(server, client):
+    response = client.request("GET", f"{server.url}/gzip")
+
+    assert response.header("Content-Encoding") == "gzip"
+    assert response.body == b"compressed " * 100
+
+
+def test_post_json_round_trip(server, client):
+    assert client.post_json(f"{server.url}/json", {"a": 1}) == {"ok": True, "echo": {"a": 1}}
+
+
+def test_retryable_status_is_retried_with_backoff(server, client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("core.http_client.time.sleep", sleeps.append)
+    client.backoff = 0.5
+    server.failures["/json"] = 2
+
+    assert client.request("GET", f"{server.url}/json").status == 200
+
+    assert server.requests == ["/json"] * 3
+    # Exponential base delay plus up to as much again in jitter
+    assert 0.5 <= sleeps[0] <= 1.0
+    assert 1.0 <= sleeps[1] <= 2.0
+
+
+def test_retries_exhausted_raises_last_status(server, client):
+    server.failures["/json"] = 10
+
+    with pytest.raises(HttpError) as excinfo:
+        client.request("GET", f"{server.url}/json", retries=2)
+
+    assert excinfo.value.status == 503
+    assert len(server.requests) == 3
+
+
+def test_client_error_is_not_retried(server, client):
+    with pytest.raises(HttpError) as excinfo:
+        client.request("GET", f"{server.url}/nothing")
+
+    assert excinfo.value.status == 404
+    assert len(server.requests) == 1
+
+
+def test_connection_refused_is_retried_then_raised(client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("core.http_client.time.sleep", sleeps.append)
+
+    with pytest.raises(OSError):
+        client.request("GET", "http://127.0.0.1:9/json", retries=2)
+
+    assert len(sleeps) == 2
@@ -0,0 +1,144 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.instruction_parser import DEFAULT_TEXT_MS, InstructionError, parse_instruction
+
+
+class RecordingLog:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, msg, *args):
+        self.warnings.append(msg % args if args else msg)
+
+
+def video(media_id="m1", start_ms=0, duration_ms=None, **fields):
+    clip = {"clip_ref": {"type": "video", "_id": media_id}, "start_ms": start_ms}
+    if duration_ms is not None:
+        clip["duration_ms"] = duration_ms
+    clip.update(fields)
+    return clip
+
+
+def instruction(*clips, fps=24):
+    return {"sequence": {"fps": fps, "tracks": [{"id": "t1", "type": "video", "clips": list(clips)}]}}
+
+
+# -----------------------------------------------------------------------------
+# Frame conversion
+# -----------------------------------------------------------------------------
+def test_ms_values_become_frames_at_the_sequence_fps():
+    clip = video(start_ms=1500, duration_ms=2000)
+    clip["clip_ref"]["cut"] = {"start": 500, "end": 2500}
+
+    plan = next(parse_instruction(instruction(clip, fps=30)).clips())
+
+    assert plan.start_frame == 45
+    assert plan.duration_frames == 60
+    assert plan.has_cut
+    assert (plan.cut_start_frame, plan.cut_end_frame) == (15, 75)
+
+
+def test_frames_are_truncated_not_rounded():
+    plan = next(parse_instruction(instruction(video(start_ms=999), fps=24)).clips())
+
+    # 999ms is 23.976 frames
+    assert plan.start_frame == 23
+
+
+def test_clip_without_duration_keeps_the_media_length():
+    plan = next(parse_instruction(instruction(video())).clips())
+
+    assert plan.duration_frames is None
+    assert not plan.has_cut
+
+
+def test_text_clip_defaults_its_duration_and_sets_end_frame():
+    text = {"clip_ref": {"type": "text", "text": "Hello"}, "start_ms": 1000}
+
+    plan = next(parse_instruction(instruction(text, fps=10)).clips())
+
+    assert plan.text == "Hello"
+    assert plan.start_frame == 10
+    assert plan.end_frame == (1000 + DEFAULT_TEXT_MS) // 100
+
+
+def test_json_string_is_accepted_and_media_is_collected_in_first_use_order():
+    plan = parse_instruction(json.dumps(instruction(video("b"), video("a"), video("b"))))
+
+    assert list(plan.media) == ["b", "a"]
+    assert plan.fps == 24
+
+
+# -----------------------------------------------------------------------------
+# Validation
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("bad, message", [
+    ("{not json", "not valid JSON"),
+    ([], "must be an object"),
+    ({"sequence": {"fps": 0}}, "fps must be a positive number"),
+    ({"sequence": {"fps": True}}, "fps must be a positive number"),
+    ({"sequence": {"tracks": {}}}, "tracks must be a list"),
+    (instruction(video(start_ms=-1)), r"start_ms must not be negative"),
+    (instruction(video(start_ms="0")), r"start_ms must be a number"),
+    (instruction(video(layer=128)), r"layer must be between 1 and 127"),
+    (instruction({"clip_ref": "m1"}), r"clip_ref must be an object"),
+    (instruction({"clip_ref": {"type": "video"}}), r"_id is required for video clips"),
+])
+def test_malformed_instruction_is_rejected(bad, message):
+    with pytest.raises(InstructionError, match=message):
+        parse_instruction(bad)
+
+
+def test_duplicate_instance_ids_are_rejected():
+    clips = [video("a", instanceId="x"), video("b", instanceId="x")]
+
+    with pytest.raises(InstructionError, match=r"instanceId 'x' is already used by tracks\[0\].clips\[0\]"):
+        parse_instruction(instruction(*clips))
+
+
+def test_unsupported_and_refless_clips_are_skipped_with_a_warning():
+    log = RecordingLog()
+    clips = [video("a"), {"clip_ref": {"type": "shape"}}, {"start_ms": 0}]
+
+    plan = parse_instruction(instruction(*clips), log=log)
+
+    assert [clip.media_id for clip in plan.clips()] == ["a"]
+    assert plan.skipped == [("tracks[0].clips[1]", "shape"), ("tracks[0].clips[2]", None)]
+    assert len(log.warnings) == 2
+
+
+# -----------------------------------------------------------------------------
+# signature()
+# -----------------------------------------------------------------------------
+def signatures(*clips):
+    return [clip.signature() for clip in parse_instruction(instruction(*clips)).clips()]
+
+
+def test_signature_is_stable_across_parses():
+    assert signatures(video(start_ms=1000)) == signatures(video(start_ms=1000))
+
+
+def test_signature_ignores_the_instance_id():
+    assert signatures(video(instanceId="a")) == signatures(video(instanceId="b"))
+
+
+@pytest.mark.parametrize("changed", [
+    video("m2"),
+    video(start_ms=1000),
+    video(duration_ms=3000),
+    video(layer=2),
+])
+def test_signature_changes_with_anything_that_shapes_the_strips(changed):
+    assert signatures(video()) != signatures(changed)
+
+
+def test_signature_ignores_changes_below_a_frame():
+    # 10ms and 20ms are both frame 0 at 24fps
+    assert signatures(video(start_ms=10)) == signatures(video(start_ms=20))
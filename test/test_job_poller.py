@@ -0,0 +1,243 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.job_poller import JobPoller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeClient:
+    """
+    Stands in for HttpClient. capabilities is the /capabilities body (an
+    exception to raise instead). Each probe advances the clock by
+    probe_seconds, then pops the next entry of probes and returns it, or
+    raises it if it is an exception.
+    """
+
+    def __init__(self, clock, capabilities=None, probes=(), probe_seconds=0.0):
+        self.clock = clock
+        self.capabilities = capabilities if capabilities is not None else {"data": {}}
+        self.probes = list(probes)
+        self.probe_seconds = probe_seconds
+        self.capability_requests = 0
+        self.payloads = []
+
+    def request(self, method, url, **kwargs):
+        self.capability_requests += 1
+        if isinstance(self.capabilities, Exception):
+            raise self.capabilities
+        return FakeResponse(self.capabilities)
+
+    def post_json(self, url, payload, **kwargs):
+        self.payloads.append(payload)
+        self.clock.now += self.probe_seconds
+        result = self.probes.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+EMPTY = {"ok": True, "data": None}
+
+
+def job(generation_id="g1"):
+    return {"ok": True, "data": {"_id": generation_id}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("core.job_poller.time.monotonic", clock)
+    # No jitter: next_delay() is the interval itself
+    monkeypatch.setattr("core.job_poller.random.uniform", lambda low, high: 1.0)
+    return clock
+
+
+def poller(client, long_poll=True):
+    return JobPoller("http://backend", {"machine": "m"}, client=client, long_poll=long_poll)
+
+
+# -----------------------------------------------------------------------------
+# Long-poll vs adaptive polling
+# -----------------------------------------------------------------------------
+def test_long_poll_is_capped_and_sent_with_each_probe(clock):
+    client = FakeClient(clock, {"data": {"probe_long_poll": 300}}, [EMPTY, EMPTY], probe_seconds=25)
+    p = poller(client)
+
+    p.poll_once()
+    p.poll_once()
+
+    assert client.capability_requests == 1
+    assert [payload["wait"] for payload in client.payloads] == [JobPoller.long_poll_seconds] * 2
+    # The backend held the probe, so the next one goes straight out
+    assert p.next_delay() == 0
+
+
+def test_long_poll_answered_early_backs_off_like_short_polling(clock):
+    client = FakeClient(clock, {"data": {"probe_long_poll": 20}}, [EMPTY], probe_seconds=1)
+    p = poller(client)
+
+    p.poll_once()
+
+    assert p.next_delay() == JobPoller.min_interval
+
+
+def test_backend_without_long_poll_falls_back_to_short_polling(clock):
+    client = FakeClient(clock, {"data": {}}, [EMPTY])
+    p = poller(client)
+
+    p.poll_once()
+
+    assert "wait" not in client.payloads[0]
+    assert p.next_delay() == JobPoller.min_interval
+
+
+def test_capabilities_error_falls_back_to_short_polling(clock):
+    client = FakeClient(clock, OSError("refused"), [EMPTY, EMPTY])
+    p = poller(client)
+
+    p.poll_once()
+    p.poll_once()
+
+    # Asked once, then cached
+    assert client.capability_requests == 1
+    assert all("wait" not in payload for payload in client.payloads)
+
+
+def test_long_poll_disabled_never_asks_for_capabilities(clock):
+    client = FakeClient(clock, {"data": {"probe_long_poll": 20}}, [EMPTY])
+    p = poller(client, long_poll=False)
+
+    p.poll_once()
+
+    assert client.capability_requests == 0
+    assert "wait" not in client.payloads[0]
+
+
+# -----------------------------------------------------------------------------
+# Backoff
+# -----------------------------------------------------------------------------
+def test_idle_backoff_grows_to_max_interval(clock):
+    client = FakeClient(clock, probes=[EMPTY] * 6)
+    p = poller(client, long_poll=False)
+
+    delays = []
+    for _ in range(6):
+        p.poll_once()
+        delays.append(p.next_delay())
+
+    assert delays == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+
+
+def test_errors_back_off_to_error_max_interval(clock):
+    client = FakeClient(clock, probes=[OSError("down")] * 6)
+    p = poller(client, long_poll=False)
+
+    delays = []
+    for _ in range(6):
+        assert p.poll_once() is None
+        delays.append(p.next_delay())
+
+    assert delays == [10.0, 20.0, 40.0, 80.0, 120.0, 120.0]
+    assert p.stats.errors == 6
+
+
+def test_job_resets_the_interval_and_job_finished_keeps_it_fast(clock):
+    client = FakeClient(clock, probes=[EMPTY, EMPTY, job(), EMPTY])
+    p = poller(client, long_poll=False)
+
+    p.poll_once()
+    p.poll_once()
+    assert p.next_delay() == 10.0
+
+    assert p.poll_once() == {"_id": "g1"}
+    assert p.next_delay() == JobPoller.fast_interval
+
+    p.job_finished()
+    assert p.next_delay() == JobPoller.fast_interval
+
+    # Idle again: back off from the shortest idle interval
+    p.poll_once()
+    assert p.next_delay() == JobPoller.min_interval
+
+
+def test_next_delay_is_jittered_within_bounds(clock, monkeypatch):
+    calls = []
+    monkeypatch.setattr("core.job_poller.random.uniform", lambda low, high: calls.append((low, high)) or high)
+    p = poller(FakeClient(clock), long_poll=False)
+
+    assert p.next_delay() == JobPoller.fast_interval * (1 + JobPoller.jitter)
+    assert calls == [(1 - JobPoller.jitter, 1 + JobPoller.jitter)]
+
+
+# -----------------------------------------------------------------------------
+# Stats and acquire
+# -----------------------------------------------------------------------------
+def test_wait_is_measured_from_when_looking_started(clock):
+    client = FakeClient(clock, probes=[EMPTY, job()], probe_seconds=2)
+    p = poller(client, long_poll=False)
+
+    p.poll_once()
+    clock.now += 5
+    p.poll_once()
+
+    assert p.stats.wait == [9.0]
+    assert p.last_probe_seconds == 2
+    assert p.stats.summary()["empty"] == 1
+
+
+def test_callable_payload_is_evaluated_per_probe(clock):
+    slots = iter([2, 1])
+    client = FakeClient(clock, probes=[EMPTY, EMPTY])
+    p = JobPoller("http://backend", lambda: {"free_slots": next(slots)}, client=client, long_poll=False)
+
+    p.poll_once()
+    p.poll_once()
+
+    assert [payload["free_slots"] for payload in client.payloads] == [2, 1]
+
+
+def test_acquire_waits_between_probes_until_a_job_arrives(clock):
+    client = FakeClient(clock, probes=[EMPTY, EMPTY, job("g2")])
+    p = poller(client, long_poll=False)
+
+    class Stop(threading.Event):
+        def __init__(self):
+            super().__init__()
+            self.waits = []
+
+        def wait(self, timeout=None):
+            self.waits.append(timeout)
+            return False
+
+    stop = Stop()
+
+    assert p.acquire(stop) == {"_id": "g2"}
+    assert stop.waits == [5.0, 10.0]
+
+
+def test_acquire_returns_none_once_stopped(clock):
+    stop = threading.Event()
+    stop.set()
+
+    assert poller(FakeClient(clock), long_poll=False).acquire(stop) is None
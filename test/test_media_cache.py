@@ -0,0 +1,97 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(ROOT))
+
+from core.media_cache import MediaCache
+
+# Pins media_id in the cache at argv[1], says so, then holds the pin until stdin closes
+PINNER = """
+import sys
+from core.media_cache import MediaCache
+
+MediaCache(sys.argv[1]).pin("build", [sys.argv[2]])
+print("pinned", flush=True)
+sys.stdin.read()
+"""
+
+
+def store(cache, media_id, size=100):
+    entry = cache.entry_dir(media_id)
+    entry.mkdir(parents=True, exist_ok=True)
+    (entry / "media.bin").write_bytes(b"x" * size)
+    return cache.record_stored(media_id)
+
+
+@pytest.fixture
+def pinner(tmp_path):
+    processes = []
+
+    def start(media_id):
+        process = subprocess.Popen(
+            [sys.executable, "-c", PINNER, str(tmp_path), media_id],
+            cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        assert process.stdout.readline().strip() == "pinned"
+        processes.append(process)
+        return process
+
+    yield start
+
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = MediaCache(tmp_path, max_bytes=250)
+    store(cache, "a")
+    store(cache, "b")
+
+    assert store(cache, "c") == ["a"]
+    assert not cache.entry_dir("a").exists()
+
+
+def test_pin_in_this_process_blocks_eviction(tmp_path):
+    cache = MediaCache(tmp_path, max_bytes=250)
+    store(cache, "a")
+    store(cache, "b")
+    cache.pin("build", ["a"])
+
+    assert store(cache, "c") == ["b"]
+
+    cache.unpin("build")
+    assert store(cache, "d") == ["a"]
+
+
+def test_pin_held_by_another_process_blocks_eviction(tmp_path, pinner):
+    cache = MediaCache(tmp_path, max_bytes=250)
+    store(cache, "a")
+    store(cache, "b")
+    process = pinner("a")
+
+    assert store(cache, "c") == ["b"]
+    assert cache.entry_dir("a").exists()
+
+    # The pin lapses with its process
+    process.stdin.close()
+    process.wait()
+    assert store(cache, "d") == ["a"]
+    assert not any((tmp_path / ".pins").iterdir())
+
+
+def test_pin_of_a_killed_process_lapses(tmp_path, pinner):
+    cache = MediaCache(tmp_path, max_bytes=250)
+    store(cache, "a")
+    store(cache, "b")
+    process = pinner("a")
+    process.kill()
+    process.wait()
+
+    assert store(cache, "c") == ["a"]
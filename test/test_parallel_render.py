@@ -0,0 +1,202 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.parallel_render import ParallelRenderer, ParallelRenderError, ProcessRunner, plan_segments
+
+
+class FakeProcess:
+    """Finished with exit code `code`, or still running (None) until terminated."""
+
+    def __init__(self, code):
+        self.code = code
+        self.terminated = False
+
+    def wait(self, timeout=None):
+        return self.code
+
+    def poll(self):
+        return self.code
+
+    def terminate(self):
+        self.terminated = True
+        self.code = -15
+
+
+class FakeRunner(ProcessRunner):
+    """
+    Stands in for blender and ffmpeg: a segment "render" writes its frame
+    range into the output file, and concat joins the listed files.
+    fail_segments maps a segment's start frame to the exit code it returns.
+    missing names the executable ("blender" or "ffmpeg") that cannot be
+    started after missing_after successful starts.
+    """
+
+    def __init__(self, fail_segments=None, concat_code=0, write_output=True, missing=None, missing_after=0):
+        super().__init__(blender="fake-blender", ffmpeg="fake-ffmpeg")
+        self.fail_segments = fail_segments or {}
+        self.concat_code = concat_code
+        self.write_output = write_output
+        self.missing = missing
+        self.missing_after = missing_after
+        self.commands = []
+        self.processes = []
+
+    def _check_missing(self, args):
+        if args[0] == f"fake-{self.missing}":
+            if self.missing_after:
+                self.missing_after -= 1
+            else:
+                raise FileNotFoundError(2, "No such file or directory", args[0])
+
+    def start(self, args, log_path):
+        self._check_missing(args)
+        self.commands.append(args)
+        Path(log_path).write_text(f"log of {' '.join(args)}\n")
+
+        start = int(args[args.index("-s") + 1])
+        end = int(args[args.index("-e") + 1])
+        code = self.fail_segments.get(start, 0)
+
+        if code == 0 and self.write_output:
+            prefix = args[args.index("-o") + 1].replace("####", "")
+            Path(f"{prefix}{start:04d}-{end:04d}.mp4").write_text(f"{start}-{end}\n")
+
+        process = FakeProcess(code)
+        self.processes.append(process)
+        return process
+
+    def run(self, args, log_path):
+        self._check_missing(args)
+        self.commands.append(args)
+        Path(log_path).write_text("concat log\n")
+        if self.concat_code:
+            return self.concat_code
+
+        list_path = Path(args[args.index("-i") + 1])
+        sources = [line[len("file '"):-1] for line in list_path.read_text().splitlines()]
+        Path(args[-1]).write_text("".join(Path(source).read_text() for source in sources))
+        return 0
+
+
+# -----------------------------------------------------------------------------
+# plan_segments
+# -----------------------------------------------------------------------------
+def test_even_split():
+    assert plan_segments(1, 100, 4) == [(1, 25), (26, 50), (51, 75), (76, 100)]
+
+
+def test_uneven_split_gives_the_first_segments_one_extra_frame():
+    segments = plan_segments(1, 10, 3)
+
+    assert segments == [(1, 4), (5, 7), (8, 10)]
+    lengths = [end - start + 1 for start, end in segments]
+    assert max(lengths) - min(lengths) <= 1
+
+
+def test_fewer_frames_than_processes_gives_one_frame_per_segment():
+    assert plan_segments(5, 7, 8) == [(5, 5), (6, 6), (7, 7)]
+
+
+def test_single_frame_and_single_process():
+    assert plan_segments(3, 3, 4) == [(3, 3)]
+    assert plan_segments(1, 50, 1) == [(1, 50)]
+    assert plan_segments(1, 50, 0) == [(1, 50)]
+
+
+def test_segments_cover_the_range_contiguously():
+    segments = plan_segments(17, 250, 7)
+
+    assert segments[0][0] == 17
+    assert segments[-1][1] == 250
+    for (_, end), (start, _) in zip(segments, segments[1:]):
+        assert start == end + 1
+
+
+def test_empty_range_is_rejected():
+    with pytest.raises(ValueError):
+        plan_segments(10, 9, 2)
+
+
+# -----------------------------------------------------------------------------
+# ParallelRenderer
+# -----------------------------------------------------------------------------
+def test_render_concats_segments_in_frame_order(tmp_path):
+    runner = FakeRunner()
+    renderer = ParallelRenderer(runner=runner, processes=3, cores=6)
+    output = tmp_path / "out.mp4"
+
+    renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, output)
+
+    assert output.read_text() == "1-4\n5-7\n8-10\n"
+    # Work directory with segments, logs and concat list is cleaned up
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.mp4"]
+
+    blender_commands = [c for c in runner.commands if c[0] == "fake-blender"]
+    assert len(blender_commands) == 3
+    assert all(c[c.index("-t") + 1] == "2" for c in blender_commands)
+
+
+def test_failed_segment_raises_before_concat(tmp_path):
+    runner = FakeRunner(fail_segments={5: 3})
+    renderer = ParallelRenderer(runner=runner, processes=3)
+
+    with pytest.raises(ParallelRenderError, match="Segment 1 exited with code 3"):
+        renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4")
+
+    assert not any(c[0] == "fake-ffmpeg" for c in runner.commands)
+    assert not (tmp_path / "out.mp4").exists()
+
+
+def test_segment_without_output_raises(tmp_path):
+    renderer = ParallelRenderer(runner=FakeRunner(write_output=False), processes=2)
+
+    with pytest.raises(ParallelRenderError, match="produced no output"):
+        renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4")
+
+
+def test_concat_failure_raises_with_log_tail(tmp_path):
+    renderer = ParallelRenderer(runner=FakeRunner(concat_code=1), processes=2)
+
+    with pytest.raises(ParallelRenderError, match="Concat exited with code 1:\nconcat log"):
+        renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4")
+
+
+def test_stale_segment_outputs_are_removed_before_rendering(tmp_path):
+    work_dir = tmp_path / "out_parallel"
+    work_dir.mkdir()
+    (work_dir / "segment_00000_0001-0099.mp4").write_text("stale\n")
+
+    renderer = ParallelRenderer(runner=FakeRunner(), processes=2)
+    renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4", work_dir)
+
+    assert (tmp_path / "out.mp4").read_text() == "1-5\n6-10\n"
+
+
+def test_missing_blender_raises_and_stops_started_segments(tmp_path):
+    class StuckRunner(FakeRunner):
+        # Segments keep running, so the ones already started must be terminated
+        def start(self, args, log_path):
+            process = super().start(args, log_path)
+            process.code = None
+            return process
+
+    runner = StuckRunner(missing="blender", missing_after=1)
+    renderer = ParallelRenderer(runner=runner, processes=3)
+
+    with pytest.raises(ParallelRenderError, match="Could not run segment renders"):
+        renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4")
+
+    assert len(runner.processes) == 1
+    assert runner.processes[0].terminated
+
+
+def test_missing_ffmpeg_raises_parallel_render_error(tmp_path):
+    renderer = ParallelRenderer(runner=FakeRunner(missing="ffmpeg"), processes=2)
+
+    with pytest.raises(ParallelRenderError, match="Could not run concat"):
+        renderer.render(tmp_path / "snap.blend", "Scene", 1, 10, tmp_path / "out.mp4")
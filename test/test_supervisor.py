@@ -0,0 +1,234 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add package root to sys.path so core can be imported
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.parallel_render import ProcessRunner
+from core.supervisor import MAX_RESTART_DELAY, STABLE_SECONDS, Supervisor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProcess:
+    _next_pid = 100
+
+    def __init__(self):
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+        self.code = None
+        self.terminated = False
+
+    def poll(self):
+        return self.code
+
+    def terminate(self):
+        self.terminated = True
+        self.code = -15
+
+
+class FakeRunner:
+    """Records every worker start instead of launching Blender."""
+
+    blender = "blender"
+
+    def __init__(self):
+        self.starts = []
+
+    def start(self, args, log_path, append=False):
+        self.starts.append((args, log_path, append))
+        return FakeProcess()
+
+
+class FakeConn:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.sent = []
+        self.closed = False
+
+    def send(self, message):
+        if self.broken:
+            raise OSError("broken pipe")
+        self.sent.append(message)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeListener:
+    address = ("127.0.0.1", 5000)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("core.supervisor.time.monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def failed(monkeypatch):
+    """Generations the supervisor marks FAILED, instead of posting them."""
+    reported = []
+    monkeypatch.setattr(Supervisor, "_report_failed", lambda self, generation_id: reported.append(generation_id))
+    return reported
+
+
+@pytest.fixture
+def sup(tmp_path, clock):
+    s = Supervisor("host1", 3, runner=FakeRunner(), log_dir=tmp_path)
+    s.listener = FakeListener()
+    return s
+
+
+def start_all(sup):
+    """Spawn every worker and connect it, as if each had said ready."""
+    sup._check_workers()
+    for slot in sup.slots:
+        slot.conn = FakeConn()
+
+
+# -----------------------------------------------------------------------------
+# Slot accounting
+# -----------------------------------------------------------------------------
+def test_workers_are_free_only_once_connected(sup):
+    sup._check_workers()
+
+    assert len(sup.runner.starts) == 3
+    assert sup.free_slots() == []
+
+    sup.slots[1].conn = FakeConn()
+    assert sup.free_slots() == [sup.slots[1]]
+
+
+def test_probe_payload_reports_free_and_total_slots(sup):
+    start_all(sup)
+
+    assert sup.probe_payload() == {"machine": "host1", "host_id": "host1", "free_slots": 3, "total_slots": 3}
+
+    sup.dispatch(sup.slots[0], {"_id": "g1"})
+    assert sup.probe_payload()["free_slots"] == 2
+
+
+def test_dispatch_sends_the_job_and_marks_the_slot_busy(sup):
+    start_all(sup)
+    slot = sup.slots[0]
+
+    assert sup.dispatch(slot, {"_id": "g1"})
+
+    assert slot.conn.sent == [("job", {"_id": "g1"})]
+    assert slot.generation_id == "g1"
+    assert slot not in sup.free_slots()
+
+
+def test_dispatch_over_a_broken_connection_fails_the_job_and_stops_the_worker(sup, failed):
+    start_all(sup)
+    slot = sup.slots[0]
+    conn = slot.conn = FakeConn(broken=True)
+
+    assert not sup.dispatch(slot, {"_id": "g1"})
+
+    assert failed == ["g1"]
+    assert conn.closed and slot.conn is None
+    assert slot.process.terminated
+    assert slot.generation_id is None
+
+
+# -----------------------------------------------------------------------------
+# Crash restart
+# -----------------------------------------------------------------------------
+def test_crashed_worker_fails_its_job_and_restarts_after_a_delay(sup, failed, clock):
+    start_all(sup)
+    slot = sup.slots[0]
+    sup.dispatch(slot, {"_id": "g1"})
+    conn = slot.conn
+
+    # Crashes after running for a while
+    clock.now += STABLE_SECONDS + 1
+    slot.process.code = 1
+    sup._check_workers()
+
+    assert failed == ["g1"]
+    assert conn.closed
+    assert slot.process is None and slot.generation_id is None
+    assert slot.restart_delay == 1.0
+
+    sup._check_workers()
+    assert len(sup.runner.starts) == 3
+
+    clock.now += 1.0
+    sup._check_workers()
+    assert len(sup.runner.starts) == 4
+    assert slot.process.poll() is None
+
+
+def test_crash_looping_worker_backs_off_up_to_the_limit(sup, failed, clock):
+    sup._check_workers()
+    slot = sup.slots[0]
+
+    delays = []
+    for _ in range(8):
+        slot.process.code = 1
+        sup._check_workers()
+        delays.append(slot.restart_delay)
+        clock.now = slot.restart_at
+        sup._check_workers()
+
+    assert delays == [2.0, 4.0, 8.0, 16.0, 32.0, MAX_RESTART_DELAY, MAX_RESTART_DELAY, MAX_RESTART_DELAY]
+    assert failed == []
+
+
+def test_stable_worker_resets_the_backoff(sup, failed, clock):
+    sup._check_workers()
+    slot = sup.slots[0]
+    slot.restart_delay = 32.0
+
+    clock.now += STABLE_SECONDS + 1
+    slot.process.code = 1
+    sup._check_workers()
+
+    assert slot.restart_delay == 1.0
+
+
+# -----------------------------------------------------------------------------
+# Worker logs
+# -----------------------------------------------------------------------------
+def test_worker_logs_are_appended_across_restarts(sup, tmp_path):
+    sup._check_workers()
+
+    args, log_path, append = sup.runner.starts[0]
+    assert log_path == tmp_path / "worker_0.log"
+    assert append
+
+
+def test_oversized_worker_log_is_rotated(sup, tmp_path, monkeypatch):
+    monkeypatch.setattr(Supervisor, "worker_log_bytes", 10)
+    (tmp_path / "worker_0.log").write_text("crash output from the last run\n")
+    (tmp_path / "worker_1.log").write_text("short\n")
+
+    sup._check_workers()
+
+    assert (tmp_path / "worker_0.log.1").read_text() == "crash output from the last run\n"
+    assert not (tmp_path / "worker_0.log").exists()
+    assert (tmp_path / "worker_1.log").read_text() == "short\n"
+
+
+def test_process_runner_appends_when_asked(tmp_path):
+    log_path = tmp_path / "worker.log"
+    runner = ProcessRunner()
+    command = [sys.executable, "-c", "print('run')"]
+
+    runner.start(command, log_path, append=True).wait()
+    runner.start(command, log_path, append=True).wait()
+    assert log_path.read_text().split() == ["run", "run"]
+
+    runner.run(command, log_path)
+    assert log_path.read_text().split() == ["run"]
@@ -33,4 +33,6 @@ class VSE_INSTRUCTOR_PT_MainPanel(Panel):
       layout.operator('vse_instructor.apply_instruction', text='Apply')
 
       layout.operator('vse_instructor.render_sequence', text='Render')
+
+      layout.operator('vse_instructor.render_sequence', text='Draft Render').draft = True
       
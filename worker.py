@@ -0,0 +1,20 @@
+"""
+Headless render worker.
+
+    blender -b --factory-startup --python worker.py -- [--machine-id NAME] [--max-interval 60] [--once]
+
+Runs the probe → build → render → upload loop without registering the
+add-on, so no UI modules or timers are loaded. --factory-startup keeps an
+installed copy of the add-on from starting its own poll timer.
+"""
+import os
+import sys
+
+# core/ only uses relative imports, so it can be loaded as a top-level package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.headless_worker import main  # noqa: E402
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)